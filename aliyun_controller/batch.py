@@ -0,0 +1,546 @@
+"""
+非交互式批处理子命令，供脚本和定时任务调用。
+
+结果写到标准输出（table 或 json），进度和错误信息写到标准错误，
+便于直接通过管道交给其他工具处理。
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import sys
+
+from aliyun_controller import profiling
+
+# 退出码
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_CONFIG_ERROR = 2
+
+# 顶层子命令名称
+BATCH_COMMANDS = ("bill", "dns")
+
+
+def billing_cycle_arg(value: str) -> str:
+    """argparse 使用的账单周期参数类型"""
+    from aliyun_controller.modules.billing import parse_billing_cycle
+    try:
+        return parse_billing_cycle(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _write_json(data):
+    with profiling.phase('render.json'):
+        json.dump(data, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+
+
+def _completeness(errors: dict) -> dict:
+    """
+    JSON 输出中标记结果是否完整，以及获取失败的账单类型
+    """
+    return {
+        "incomplete": bool(errors),
+        "errors": {subscription_type: str(error) for subscription_type, error in errors.items()},
+    }
+
+
+def _is_multi_account(args) -> bool:
+    return len(getattr(args, "accounts", None) or ()) > 1
+
+
+def _bill_accounts(args, include_products: bool) -> int:
+    from aliyun_controller.modules.accounts import (
+        accounts_billing_to_map,
+        compute_accounts_billing,
+        print_accounts_billing,
+    )
+
+    with contextlib.redirect_stdout(sys.stderr):
+        results, errors = compute_accounts_billing(args.cycle, args.accounts)
+
+    if args.format == "json":
+        _write_json(accounts_billing_to_map(args.cycle, results, errors))
+    else:
+        with profiling.phase('render.accounts'):
+            print_accounts_billing(args.cycle, results, errors, include_products=include_products)
+    return EXIT_FAILED if errors else EXIT_OK
+
+
+def _bill_summary(args) -> int:
+    from aliyun_controller.modules.billing import compute_billing_summary, print_billing_summary
+
+    if _is_multi_account(args):
+        return _bill_accounts(args, include_products=True)
+
+    errors = {}
+    with contextlib.redirect_stdout(sys.stderr):
+        summary, item_count = compute_billing_summary(args.cycle, errors=errors)
+
+    if args.format == "json":
+        products = sorted(summary.items(), key=lambda x: x[1]['total_amount'], reverse=True)
+        _write_json({
+            "billing_cycle": args.cycle,
+            "item_count": item_count,
+            "total_amount": round(sum(data['total_amount'] for data in summary.values()), 6),
+            "products": [
+                {
+                    "product_code": product_code,
+                    "product_name": data['product_name'],
+                    "count": data['count'],
+                    "total_amount": round(data['total_amount'], 6),
+                }
+                for product_code, data in products
+            ],
+            **_completeness(errors),
+        })
+    elif item_count:
+        with profiling.phase('render.summary'):
+            print_billing_summary(args.cycle, summary)
+    else:
+        print("未发现任何账单明细。")
+    return EXIT_FAILED if errors else EXIT_OK
+
+
+def _bill_traffic(args) -> int:
+    from aliyun_controller.modules.billing import compute_outbound_traffic, print_traffic_report
+
+    if _is_multi_account(args):
+        return _bill_accounts(args, include_products=False)
+
+    errors = {}
+    with contextlib.redirect_stdout(sys.stderr):
+        total_usage_bytes, item_count = compute_outbound_traffic(args.cycle, errors=errors)
+
+    if args.format == "json":
+        _write_json({
+            "billing_cycle": args.cycle,
+            "item_count": item_count,
+            "total_bytes": total_usage_bytes,
+            "total_gb": total_usage_bytes / (1024 * 1024 * 1024),
+            **_completeness(errors),
+        })
+    elif item_count:
+        with profiling.phase('render.traffic'):
+            print_traffic_report(args.cycle, total_usage_bytes)
+    else:
+        print("未发现任何账单明细。")
+    return EXIT_FAILED if errors else EXIT_OK
+
+
+def _bill_breakdown(args) -> int:
+    from aliyun_controller.modules.billing import compute_bill_breakdown, print_bill_breakdown
+
+    if args.pivot and args.pivot not in args.by:
+        print(f"--pivot {args.pivot} 需包含在 --by 中", file=sys.stderr)
+        return EXIT_FAILED
+
+    errors = {}
+    with contextlib.redirect_stdout(sys.stderr):
+        result = compute_bill_breakdown(args.cycle, args.by, errors=errors)
+
+    if args.format == "json":
+        _write_json(dict(result.to_map(), billing_cycle=args.cycle, **_completeness(errors)))
+    elif result.item_count:
+        with profiling.phase('render.breakdown'):
+            print_bill_breakdown(args.cycle, result, pivot_key=args.pivot, top=args.top)
+    else:
+        print("未发现任何账单明细。")
+    return EXIT_FAILED if errors else EXIT_OK
+
+
+def _bill_export(args) -> int:
+    from aliyun_controller.modules.billing import export_bill_details
+
+    # 导出到标准输出时，只有导出内容写到标准输出
+    output = sys.stdout if args.output == "-" else args.output
+    with contextlib.redirect_stdout(sys.stderr):
+        count = export_bill_details(args.cycle, output, args.format, args.columns)
+        print(f"已导出 {count} 条账单明细。")
+    return EXIT_OK
+
+
+def _bill_sync(args) -> int:
+    from aliyun_controller.modules.billing import AliCloudBssQuerier
+
+    with contextlib.redirect_stdout(sys.stderr):
+        stats = AliCloudBssQuerier().sync_daily_bills(args.cycle)
+    failed = stats['failed']
+
+    if args.format == "json":
+        _write_json({
+            "billing_cycle": args.cycle,
+            "fetched": stats['fetched'],
+            "reused": stats['reused'],
+            "failed": [
+                {"billing_date": billing_date, "subscription_type": subscription_type, "error": str(error)}
+                for (billing_date, subscription_type), error in failed.items()
+            ],
+        })
+    else:
+        print(f"账单周期 {args.cycle}: 拉取 {stats['fetched']} 个日期分区，复用 {stats['reused']} 个，失败 {len(failed)} 个")
+        for (billing_date, subscription_type), error in failed.items():
+            print(f"  {billing_date} [{subscription_type}]: {error}", file=sys.stderr)
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def _columns_arg(value: str) -> tuple:
+    """argparse 使用的列名参数类型"""
+    from aliyun_controller.modules.bill_export import parse_columns
+    try:
+        return parse_columns(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def profiles_arg(value: str) -> tuple:
+    """argparse 使用的账号列表参数类型"""
+    from aliyun_controller.modules.accounts import parse_profile_names
+    try:
+        return parse_profile_names(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _group_by_arg(value: str) -> tuple:
+    """argparse 使用的分组维度参数类型"""
+    from aliyun_controller.modules.bill_aggregate import parse_group_keys
+    try:
+        return parse_group_keys(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _dns_accounts_domains(args) -> int:
+    from aliyun_controller.modules.accounts import compute_accounts_domains
+
+    with contextlib.redirect_stdout(sys.stderr):
+        results, errors = compute_accounts_domains(args.accounts)
+    for profile, error in errors.items():
+        print(f"账号 {profile} 查询失败: {error}", file=sys.stderr)
+
+    if args.format == "json":
+        _write_json([dict(domain, Account=profile) for profile, domains in results.items() for domain in domains])
+    else:
+        for profile, domains in results.items():
+            for domain in domains:
+                print(f"{profile:<20} {domain.get('DomainName')}")
+    return EXIT_FAILED if errors else EXIT_OK
+
+
+def _dns_domains(args) -> int:
+    from aliyun_controller.modules.dns import AliCloudDnsQuerier
+
+    if _is_multi_account(args):
+        return _dns_accounts_domains(args)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        domains = AliCloudDnsQuerier().get_domains()
+
+    if args.format == "json":
+        _write_json(domains)
+    else:
+        for domain in domains:
+            print(domain.get('DomainName'))
+    return EXIT_OK
+
+
+def _dns_list(args) -> int:
+    from aliyun_controller.modules.dns import AliCloudDnsQuerier
+
+    with contextlib.redirect_stdout(sys.stderr):
+        records = AliCloudDnsQuerier().get_domain_records(args.domain)
+
+    if args.format == "json":
+        _write_json(records)
+    else:
+        print(f"{'主机记录(RR)':<20} {'类型':<10} {'记录值(Value)':<30} {'TTL'}")
+        for record in records:
+            print(f"{record.get('RR'):<20} {record.get('Type'):<10} {record.get('Value'):<30} {record.get('TTL')}")
+    return EXIT_OK
+
+
+def _dns_dump(args) -> int:
+    from aliyun_controller.modules.dns_async import fetch_all_domain_records
+
+    records_by_domain, errors = fetch_all_domain_records(args.domains or None, concurrency=args.concurrency)
+    for domain_name, error in errors.items():
+        print(f"获取域名 {domain_name} 的解析记录时出错: {error}", file=sys.stderr)
+
+    if args.format == "json":
+        _write_json(records_by_domain)
+    else:
+        print(f"{'域名':<30} {'主机记录(RR)':<20} {'类型':<10} {'记录值(Value)':<30} {'TTL'}")
+        for domain_name, records in records_by_domain.items():
+            for record in records:
+                print(f"{domain_name:<30} {record.get('RR'):<20} {record.get('Type'):<10} {record.get('Value'):<30} {record.get('TTL')}")
+    return EXIT_FAILED if errors else EXIT_OK
+
+
+def _dns_search(args) -> int:
+    import time
+    from aliyun_controller.modules.dns_index import load_record_index
+
+    if not (args.value or args.rr or args.type):
+        print("请至少指定 --value、--rr、--type 中的一个检索条件。", file=sys.stderr)
+        return EXIT_FAILED
+
+    with contextlib.redirect_stdout(sys.stderr):
+        index, errors = load_record_index(refresh=args.refresh, max_age=args.max_age)
+    for domain_name, error in errors.items():
+        print(f"获取域名 {domain_name} 的解析记录时出错: {error}", file=sys.stderr)
+
+    start = time.perf_counter()
+    matches = index.search(value=args.value, rr=args.rr, record_type=args.type)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"在 {len(index.records)} 个域名的 {len(index)} 条记录中找到 {len(matches)} 条，检索耗时 {elapsed_ms:.3f} ms",
+          file=sys.stderr)
+
+    if args.format == "json":
+        _write_json([{"DomainName": domain_name, **record} for domain_name, record in matches])
+    else:
+        print(f"{'域名':<30} {'主机记录(RR)':<20} {'类型':<10} {'记录值(Value)':<30} {'TTL'}")
+        for domain_name, record in matches:
+            print(f"{domain_name:<30} {record.get('RR'):<20} {record.get('Type'):<10} {record.get('Value'):<30} {record.get('TTL')}")
+    return EXIT_FAILED if errors else EXIT_OK
+
+
+def _dns_lint(args) -> int:
+    from aliyun_controller.modules.dns_index import load_record_snapshots
+    from aliyun_controller.modules.dns_lint import lint_records, lint_to_map, print_lint_report
+
+    with contextlib.redirect_stdout(sys.stderr):
+        records_by_domain, errors = load_record_snapshots(refresh=args.refresh, max_age=args.max_age)
+    for domain_name, error in errors.items():
+        print(f"获取域名 {domain_name} 的解析记录时出错: {error}", file=sys.stderr)
+    if args.domains:
+        unknown = [domain_name for domain_name in args.domains if domain_name not in records_by_domain]
+        if unknown:
+            print(f"没有以下域名的解析记录: {', '.join(unknown)}", file=sys.stderr)
+            return EXIT_FAILED
+
+    with profiling.phase('dns.lint'):
+        issues = lint_records(records_by_domain, domains=args.domains or None)
+    if args.domains:
+        records_by_domain = {domain_name: records_by_domain[domain_name] for domain_name in args.domains}
+
+    if args.format == "json":
+        _write_json(lint_to_map(records_by_domain, issues, errors))
+    else:
+        print_lint_report(records_by_domain, issues)
+    has_errors = any(issue['severity'] == 'error' for found in issues.values() for issue in found)
+    return EXIT_FAILED if errors or has_errors else EXIT_OK
+
+
+def _dns_add(args) -> int:
+    from aliyun_controller.modules.dns import AliCloudDnsQuerier
+
+    with contextlib.redirect_stdout(sys.stderr):
+        success = AliCloudDnsQuerier().add_domain_record(
+            domain_name=args.domain,
+            rr=args.rr,
+            type=args.type.upper(),
+            value=args.value,
+            ttl=args.ttl,
+        )
+
+    if args.format == "json":
+        _write_json({
+            "success": success,
+            "domain_name": args.domain,
+            "rr": args.rr,
+            "type": args.type.upper(),
+            "value": args.value,
+            "ttl": args.ttl,
+        })
+    return EXIT_OK if success else EXIT_FAILED
+
+
+def _dns_sync(args) -> int:
+    from aliyun_controller.modules.dns import AliCloudDnsQuerier
+    from aliyun_controller.modules.dns_sync import apply_plan, load_desired_records, plan_sync, print_plan, validate_plan
+
+    with contextlib.redirect_stdout(sys.stderr):
+        querier = AliCloudDnsQuerier()
+        desired = load_desired_records(args.file, args.domain)
+        existing = querier.get_domain_records(args.domain, refresh=True)
+        plan = plan_sync(existing, desired, delete_extra=not args.no_delete)
+        invalid = validate_plan(querier, plan)
+
+    if args.format == "json":
+        output = {"domain_name": args.domain, "plan": plan.to_map(), "invalid": invalid}
+    else:
+        print_plan(args.domain, plan)
+    if invalid:
+        print(f"有 {len(invalid)} 条期望记录未通过校验，未执行任何变更。", file=sys.stderr)
+        if args.format == "json":
+            _write_json(output)
+        return EXIT_FAILED
+
+    results = None
+    if args.apply and not plan.is_empty():
+        with contextlib.redirect_stdout(sys.stderr):
+            results = apply_plan(querier, args.domain, plan, workers=args.workers)
+    elif not args.apply:
+        print("以上为预览，使用 --apply 执行变更。", file=sys.stderr)
+
+    if args.format == "json":
+        output["results"] = results
+        _write_json(output)
+    elif results:
+        for name, label in (("delete", "删除"), ("update", "更新"), ("add", "新增")):
+            print(f"{label}: 成功 {results[name]['succeeded']} 条，失败 {results[name]['failed']} 条")
+
+    if results and any(result["failed"] for result in results.values()):
+        return EXIT_FAILED
+    return EXIT_OK
+
+
+def add_batch_subcommands(parser: argparse.ArgumentParser):
+    """
+    注册批处理子命令；未指定子命令时程序进入交互式菜单
+    """
+    current_cycle = datetime.datetime.now().strftime("%Y-%m")
+    format_parser = argparse.ArgumentParser(add_help=False)
+    format_parser.add_argument(
+        "--format",
+        choices=["table", "json"],
+        default="table",
+        help="输出格式 (默认 table)"
+    )
+    cycle_parser = argparse.ArgumentParser(add_help=False)
+    cycle_parser.add_argument(
+        "--cycle",
+        type=billing_cycle_arg,
+        default=current_cycle,
+        help=f"账单周期 YYYY-MM (默认当月 {current_cycle})"
+    )
+
+    subparsers = parser.add_subparsers(dest="command", metavar="{" + ",".join(BATCH_COMMANDS) + "}")
+
+    bill_parser = subparsers.add_parser("bill", help="账单查询")
+    bill_subparsers = bill_parser.add_subparsers(dest="bill_command", metavar="{summary,traffic,breakdown,export,sync}")
+    bill_subparsers.required = True
+    bill_subparsers.add_parser(
+        "summary", parents=[cycle_parser, format_parser], help="按产品归纳账单（支持多账号汇总）"
+    ).set_defaults(handler=_bill_summary, multi_account=True)
+    bill_subparsers.add_parser(
+        "traffic", parents=[cycle_parser, format_parser], help="查询总流出流量（支持多账号汇总）"
+    ).set_defaults(handler=_bill_traffic, multi_account=True)
+    breakdown_parser = bill_subparsers.add_parser(
+        "breakdown", parents=[cycle_parser, format_parser], help="按多个维度组合聚合账单"
+    )
+    breakdown_parser.add_argument(
+        "--by",
+        type=_group_by_arg,
+        default=("product",),
+        help="分组维度，逗号分隔: product,region,instance,item,resource_group,tag,subscription (默认 product)"
+    )
+    breakdown_parser.add_argument("--pivot", help="将该维度展开为列输出透视表，需包含在 --by 中")
+    breakdown_parser.add_argument("--top", type=int, help="只显示金额最高的前 N 行（透视表同时限制列数）")
+    breakdown_parser.set_defaults(handler=_bill_breakdown)
+    export_parser = bill_subparsers.add_parser(
+        "export", parents=[cycle_parser], help="流式导出账单明细到 CSV / JSON Lines / Parquet"
+    )
+    export_parser.add_argument(
+        "-o", "--output", default="-", help="输出文件，- 表示标准输出 (默认 -，Parquet 必须指定文件)"
+    )
+    export_parser.add_argument(
+        "--format",
+        choices=["csv", "jsonl", "parquet"],
+        help="导出格式，默认按输出文件后缀推断，无法推断时为 csv"
+    )
+    export_parser.add_argument(
+        "--columns",
+        type=_columns_arg,
+        help="导出的列，逗号分隔的接口字段名，如 BillingDate,ProductCode,PretaxAmount（JSON Lines 默认导出全部字段）"
+    )
+    export_parser.set_defaults(handler=_bill_export)
+    bill_subparsers.add_parser(
+        "sync", parents=[cycle_parser, format_parser], help="按日增量同步账单明细到本地（配合 --daily-sync 使用）"
+    ).set_defaults(handler=_bill_sync)
+
+    dns_parser = subparsers.add_parser("dns", help="DNS 解析管理")
+    dns_subparsers = dns_parser.add_subparsers(dest="dns_command", metavar="{domains,list,dump,search,lint,add,sync}")
+    dns_subparsers.required = True
+    dns_subparsers.add_parser(
+        "domains", parents=[format_parser], help="列出可管理的域名（支持多账号）"
+    ).set_defaults(handler=_dns_domains, multi_account=True)
+    list_parser = dns_subparsers.add_parser("list", parents=[format_parser], help="列出域名的解析记录")
+    list_parser.add_argument("domain", help="域名")
+    list_parser.set_defaults(handler=_dns_list)
+    dump_parser = dns_subparsers.add_parser(
+        "dump", parents=[format_parser], help="并发导出多个（默认全部）域名的解析记录"
+    )
+    dump_parser.add_argument("domains", nargs="*", help="域名，省略时导出全部域名")
+    dump_parser.add_argument("--concurrency", type=int, default=8, help="同时进行的请求数上限 (默认 8)")
+    dump_parser.set_defaults(handler=_dns_dump)
+    search_parser = dns_subparsers.add_parser(
+        "search", parents=[format_parser], help="跨全部域名检索解析记录（基于本地索引）"
+    )
+    search_parser.add_argument("--value", help="记录值，例如 1.2.3.4 或 CNAME 目标")
+    search_parser.add_argument("--rr", help="主机记录，例如 www")
+    search_parser.add_argument("--type", help="记录类型，例如 A、CNAME")
+    search_parser.add_argument("--refresh", action="store_true", help="重新拉取全部域名，重建本地索引")
+    search_parser.add_argument(
+        "--max-age", type=int, default=3600, help="本地快照有效期（秒），过期的域名会增量重建 (默认 3600)"
+    )
+    search_parser.set_defaults(handler=_dns_search)
+    lint_parser = dns_subparsers.add_parser(
+        "lint", parents=[format_parser], help="检查全部域名的解析记录（冲突、重复、悬空 CNAME、TTL 异常、非法 IP）"
+    )
+    lint_parser.add_argument("domains", nargs="*", help="只输出这些域名的问题，省略时输出全部域名")
+    lint_parser.add_argument("--refresh", action="store_true", help="重新拉取全部域名的解析记录")
+    lint_parser.add_argument(
+        "--max-age", type=int, default=3600, help="本地快照有效期（秒），过期的域名会重新拉取 (默认 3600)"
+    )
+    lint_parser.set_defaults(handler=_dns_lint)
+    add_parser = dns_subparsers.add_parser("add", parents=[format_parser], help="新增解析记录")
+    add_parser.add_argument("domain", help="域名")
+    add_parser.add_argument("rr", help="主机记录，例如 www")
+    add_parser.add_argument("type", help="记录类型，例如 A、CNAME")
+    add_parser.add_argument("value", help="记录值")
+    add_parser.add_argument("--ttl", type=int, default=600, help="TTL (默认 600)")
+    add_parser.set_defaults(handler=_dns_add)
+    sync_parser = dns_subparsers.add_parser(
+        "sync", parents=[format_parser], help="按期望状态文件（YAML 或 BIND zone）同步解析记录"
+    )
+    sync_parser.add_argument("domain", help="域名")
+    sync_parser.add_argument("file", help="期望状态文件，.zone/.db/.bind 按 BIND 格式解析，其余按 YAML 解析")
+    sync_parser.add_argument("--apply", action="store_true", help="执行变更（默认只输出计划）")
+    sync_parser.add_argument("--no-delete", action="store_true", help="保留期望状态中没有的现有记录")
+    sync_parser.add_argument("--workers", type=int, default=4, help="并发执行变更的线程数 (默认 4)")
+    sync_parser.set_defaults(handler=_dns_sync)
+
+
+def run_batch(args) -> int:
+    """
+    执行批处理子命令，返回进程退出码。不会弹出任何交互式提示。
+    """
+    from aliyun_controller.config import load_config
+    from aliyun_controller.modules.accounts import activate_profiles
+
+    try:
+        load_config()
+    except Exception as e:
+        print(f"配置文件不可用: {e}，请先运行 aliyunctl 完成交互式配置。", file=sys.stderr)
+        return EXIT_CONFIG_ERROR
+
+    try:
+        args.accounts = activate_profiles(args.profiles, args.all_profiles)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return EXIT_CONFIG_ERROR
+    if _is_multi_account(args) and not getattr(args, "multi_account", False):
+        print("该命令只能用于单个账号，请通过 --accounts 指定一个账号", file=sys.stderr)
+        return EXIT_FAILED
+
+    try:
+        return args.handler(args)
+    except KeyboardInterrupt:
+        print("\n操作被取消。", file=sys.stderr)
+        return EXIT_FAILED
+    except Exception as e:
+        print(f"执行失败: {e}", file=sys.stderr)
+        return EXIT_FAILED
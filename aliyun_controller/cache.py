@@ -0,0 +1,341 @@
+import calendar
+import datetime
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from aliyun_controller.config import DEFAULT_PROFILE, active_profile, get_config_dir
+
+# 当月（未出账）账单的缓存有效期，单位秒；历史月份结算后拉取的数据不再变化，永久有效
+OPEN_CYCLE_TTL = 600
+# 按日同步时，账单日结束后仍可能变化的天数：在该日之后第 N 天及以后拉取的数据视为最终结果
+BILL_DAY_SETTLE_DAYS = 2
+# 缓存表结构版本，结构变化时旧缓存会被丢弃
+SCHEMA_VERSION = 3
+
+
+def cache_refresh_requested() -> bool:
+    """
+    是否通过 --refresh/--no-cache 要求跳过缓存，强制从接口获取
+    """
+    return os.environ.get("ALIYUN_CONTROLLER_REFRESH") == "1"
+
+
+def daily_sync_requested() -> bool:
+    """
+    是否通过 --daily-sync 要求当月账单按日增量同步
+    """
+    return os.environ.get("ALIYUN_CONTROLLER_DAILY_SYNC") == "1"
+
+
+def is_closed_cycle(billing_cycle: str) -> bool:
+    """
+    判断账单周期是否已结束（早于当前月份）
+    """
+    return billing_cycle < datetime.datetime.now().strftime("%Y-%m")
+
+
+def is_settled_day(billing_date: str, fetched_at: float) -> bool:
+    """
+    判断某个账单日在 fetched_at 时拉取的数据是否已是最终结果
+    """
+    settled_from = datetime.datetime.strptime(billing_date, "%Y-%m-%d") + datetime.timedelta(days=BILL_DAY_SETTLE_DAYS)
+    return datetime.datetime.fromtimestamp(fetched_at) >= settled_from
+
+
+def is_settled_cycle(billing_cycle: str, fetched_at: float) -> bool:
+    """
+    判断账单周期在 fetched_at 时拉取的数据是否已是最终结果，即拉取时该周期的最后一个账单日也已结算。
+    月末之前或结算期内拉取的历史月份数据仍可能不完整。
+    """
+    year, month = map(int, billing_cycle.split('-'))
+    last_day = calendar.monthrange(year, month)[1]
+    return is_settled_day(f"{billing_cycle}-{last_day:02d}", fetched_at)
+
+
+def is_fresh_cycle(billing_cycle: str, fetched_at: float, now: float = None) -> bool:
+    """
+    fetched_at 时拉取的账单周期数据现在是否仍然有效：结算后拉取的数据永久有效，
+    其余情况（当月，或在月末前、结算期内拉取的历史月份）OPEN_CYCLE_TTL 秒内有效
+    """
+    now = time.time() if now is None else now
+    return is_settled_cycle(billing_cycle, fetched_at) or now - fetched_at < OPEN_CYCLE_TTL
+
+
+def profile_cache_path(profile: str = None) -> Path:
+    """
+    账号对应的缓存数据库路径：顶层密钥使用 cache.sqlite3，其余账号各自使用 cache-<账号>.sqlite3
+    """
+    profile = profile or active_profile()
+    if profile is None or profile == DEFAULT_PROFILE:
+        return get_config_dir() / "cache.sqlite3"
+    return get_config_dir() / f"cache-{profile}.sqlite3"
+
+
+class SqliteCache:
+    """
+    配置目录下 cache.sqlite3 的公共连接逻辑
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path) if path else profile_cache_path()
+        self._schema_ready = False
+
+    @contextmanager
+    def _connect(self):
+        """
+        打开数据库连接并在事务中执行，结束后自动关闭
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            if not self._schema_ready:
+                # WAL 模式下读写互不阻塞，多条分页链可以同时写入
+                conn.execute("PRAGMA journal_mode=WAL")
+                with conn:
+                    self._ensure_schema(conn)
+                self._schema_ready = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _ensure_schema(conn: sqlite3.Connection):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            # 缓存结构变化时直接丢弃旧数据
+            conn.execute("DROP TABLE IF EXISTS bill_meta")
+            conn.execute("DROP TABLE IF EXISTS bill_pages")
+            conn.execute("DROP TABLE IF EXISTS dns_records")
+            conn.execute("DROP TABLE IF EXISTS bill_days")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bill_meta ("
+            " billing_cycle TEXT NOT NULL,"
+            " subscription_type TEXT NOT NULL,"
+            " generation TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (billing_cycle, subscription_type))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bill_pages ("
+            " billing_cycle TEXT NOT NULL,"
+            " subscription_type TEXT NOT NULL,"
+            " generation TEXT NOT NULL,"
+            " page_no INTEGER NOT NULL,"
+            " items TEXT NOT NULL,"
+            " PRIMARY KEY (billing_cycle, subscription_type, generation, page_no))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bill_days ("
+            " billing_cycle TEXT NOT NULL,"
+            " billing_date TEXT NOT NULL,"
+            " subscription_type TEXT NOT NULL,"
+            " items TEXT NOT NULL,"
+            " item_count INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (billing_date, subscription_type))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS dns_records ("
+            " domain_name TEXT PRIMARY KEY,"
+            " records TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+
+
+class BillCache(SqliteCache):
+    """
+    账单明细的本地 SQLite 缓存，按 (账单周期, 付费类型) 分页保存
+    """
+
+    def fetched_at(self, billing_cycle: str, subscription_type: str) -> float:
+        """
+        当前生效的缓存的拉取时间，没有缓存时返回 None
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT fetched_at FROM bill_meta WHERE billing_cycle = ? AND subscription_type = ?",
+                (billing_cycle, subscription_type),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def is_fresh(self, billing_cycle: str, subscription_type: str) -> bool:
+        """
+        缓存是否存在且仍然有效
+        """
+        fetched_at = self.fetched_at(billing_cycle, subscription_type)
+        return fetched_at is not None and is_fresh_cycle(billing_cycle, fetched_at)
+
+    def iter_pages(self, billing_cycle: str, subscription_type: str):
+        """
+        逐页读取缓存中的账单明细
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT p.items FROM bill_pages p JOIN bill_meta m"
+                " ON p.billing_cycle = m.billing_cycle"
+                " AND p.subscription_type = m.subscription_type"
+                " AND p.generation = m.generation"
+                " WHERE p.billing_cycle = ? AND p.subscription_type = ?"
+                " ORDER BY p.page_no",
+                (billing_cycle, subscription_type),
+            )
+            for (items,) in rows:
+                yield json.loads(items)
+
+    def page_writer(self, billing_cycle: str, subscription_type: str) -> "BillPageWriter":
+        """
+        创建逐页写入缓存的写入器
+        """
+        return BillPageWriter(self, billing_cycle, subscription_type)
+
+
+class BillPageWriter:
+    """
+    逐页写入一次完整的分页结果。分页先以新的 generation 写入，
+    commit() 时才替换旧缓存，中途失败不会破坏已有缓存。
+    """
+
+    def __init__(self, cache: BillCache, billing_cycle: str, subscription_type: str):
+        self.cache = cache
+        self.billing_cycle = billing_cycle
+        self.subscription_type = subscription_type
+        self.generation = uuid.uuid4().hex
+        self.page_no = 0
+
+    def append(self, items: list):
+        with self.cache._connect() as conn:
+            conn.execute(
+                "INSERT INTO bill_pages (billing_cycle, subscription_type, generation, page_no, items)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (
+                    self.billing_cycle,
+                    self.subscription_type,
+                    self.generation,
+                    self.page_no,
+                    json.dumps(items, ensure_ascii=False),
+                ),
+            )
+        self.page_no += 1
+
+    def commit(self):
+        """
+        让本次写入的分页生效，并删除此前生效的那一代分页。
+        其他仍在写入的 generation 不受影响，由其自身 commit 或 discard 处理。
+        """
+        with self.cache._connect() as conn:
+            # 读取旧 generation 与替换 meta 在同一个写事务中完成，避免并发提交时删错
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT generation FROM bill_meta WHERE billing_cycle = ? AND subscription_type = ?",
+                (self.billing_cycle, self.subscription_type),
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO bill_meta (billing_cycle, subscription_type, generation, fetched_at)"
+                " VALUES (?, ?, ?, ?)",
+                (self.billing_cycle, self.subscription_type, self.generation, time.time()),
+            )
+            if row is not None and row[0] != self.generation:
+                conn.execute(
+                    "DELETE FROM bill_pages WHERE billing_cycle = ? AND subscription_type = ? AND generation = ?",
+                    (self.billing_cycle, self.subscription_type, row[0]),
+                )
+
+    def discard(self):
+        with self.cache._connect() as conn:
+            conn.execute(
+                "DELETE FROM bill_pages WHERE billing_cycle = ? AND subscription_type = ? AND generation = ?",
+                (self.billing_cycle, self.subscription_type, self.generation),
+            )
+
+
+class BillDayStore(SqliteCache):
+    """
+    按日分区保存的账单明细，每个 (账单日, 付费类型) 一个分区，整体替换
+    """
+
+    def load_meta(self, billing_cycle: str) -> dict:
+        """
+        读取账单周期内已保存的分区，返回 (账单日, 付费类型) -> 拉取时间
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT billing_date, subscription_type, fetched_at FROM bill_days WHERE billing_cycle = ?",
+                (billing_cycle,),
+            ).fetchall()
+        return {(billing_date, subscription_type): fetched_at for billing_date, subscription_type, fetched_at in rows}
+
+    def iter_days(self, billing_cycle: str):
+        """
+        按日期顺序逐个分区读取账单明细
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT items FROM bill_days WHERE billing_cycle = ? ORDER BY billing_date, subscription_type",
+                (billing_cycle,),
+            )
+            for (items,) in rows:
+                yield json.loads(items)
+
+    def save_day(self, billing_date: str, subscription_type: str, items: list, fetched_at: float):
+        """
+        保存（覆盖）一个分区
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO bill_days"
+                " (billing_cycle, billing_date, subscription_type, items, item_count, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    billing_date[:7],
+                    billing_date,
+                    subscription_type,
+                    json.dumps(items, ensure_ascii=False),
+                    len(items),
+                    fetched_at,
+                ),
+            )
+
+
+class DnsRecordStore(SqliteCache):
+    """
+    各域名解析记录的本地快照，用于跨域名检索等离线分析
+    """
+
+    def load_all(self) -> dict:
+        """
+        读取所有域名的快照，返回 域名 -> (拉取时间, 记录列表)
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT domain_name, records, fetched_at FROM dns_records").fetchall()
+        return {domain_name: (fetched_at, json.loads(records)) for domain_name, records, fetched_at in rows}
+
+    def save(self, records_by_domain: dict):
+        """
+        保存（覆盖）若干域名的快照
+        """
+        fetched_at = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO dns_records (domain_name, records, fetched_at) VALUES (?, ?, ?)",
+                [
+                    (domain_name, json.dumps(records, ensure_ascii=False), fetched_at)
+                    for domain_name, records in records_by_domain.items()
+                ],
+            )
+
+    def delete(self, domain_names: list):
+        """
+        删除若干域名的快照
+        """
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM dns_records WHERE domain_name = ?",
+                [(domain_name,) for domain_name in domain_names],
+            )
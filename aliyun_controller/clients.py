@@ -0,0 +1,83 @@
+import threading
+
+from aliyun_controller.config import active_profile, get_profile_config
+
+# 各服务客户端的连接参数
+SERVICE_ENDPOINTS = {
+    "bss": {"region_id": "cn-hangzhou"},
+    "dns": {"endpoint": "dns.aliyuncs.com"},
+}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _build_client(service: str, config: dict):
+    """
+    按服务创建 SDK 客户端，各服务的 SDK 在首次使用时才导入
+    """
+    from alibabacloud_tea_openapi import models as open_api_models
+
+    runtime = config["runtime"]
+    # 配置文件中的 endpoints 段可以覆盖默认的接入点和协议
+    endpoint_options = {**SERVICE_ENDPOINTS[service], **config.get("endpoints", {}).get(service, {})}
+    client_config = open_api_models.Config(
+        access_key_id=config["access_key_id"],
+        access_key_secret=config["access_key_secret"],
+        connect_timeout=runtime["connect_timeout"],
+        read_timeout=runtime["read_timeout"],
+        max_idle_conns=runtime["max_idle_conns"],
+        **endpoint_options,
+    )
+    if service == "bss":
+        from alibabacloud_bssopenapi20171214.client import Client as BssOpenApi20171214Client
+        return BssOpenApi20171214Client(client_config)
+    if service == "dns":
+        from alibabacloud_alidns20150109.client import Client as Alidns20150109Client
+        return Alidns20150109Client(client_config)
+    raise ValueError(f"未知的服务: {service}")
+
+
+def get_client(service: str, profile: str = None):
+    """
+    获取进程内共享的服务客户端。每个账号的每种服务在同一配置下只创建一次，
+    以复用底层的 HTTPS 长连接；配置文件变化后会重新创建。
+    profile 为 None 时使用当前默认账号。
+    """
+    profile = profile or active_profile()
+    config = get_profile_config(profile)
+    signature = (
+        config["access_key_id"],
+        config["access_key_secret"],
+        tuple(sorted(config["runtime"].items())),
+        tuple(sorted(config.get("endpoints", {}).get(service, {}).items())),
+    )
+    with _clients_lock:
+        cached = _clients.get((service, profile))
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        client = _build_client(service, config)
+        _clients[(service, profile)] = (signature, client)
+        return client
+
+
+def get_bss_client(profile: str = None):
+    """
+    获取共享的 BSS 账单客户端
+    """
+    return get_client("bss", profile)
+
+
+def get_dns_client(profile: str = None):
+    """
+    获取共享的 Alidns 客户端
+    """
+    return get_client("dns", profile)
+
+
+def reset_clients():
+    """
+    丢弃已创建的客户端，下次获取时重新创建
+    """
+    with _clients_lock:
+        _clients.clear()
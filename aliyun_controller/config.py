@@ -1,41 +1,232 @@
+import json
 import os
+import re
+import threading
 from pathlib import Path
 
 import yaml
-from InquirerPy.base.control import Choice
-from InquirerPy.resolver import prompt
 
 
-def _get_config_path() -> Path:
+def get_config_dir() -> Path:
     config_dir = os.environ.get(
         "ALIYUN_CONTROLLER_CONFIG_DIR",
         os.path.expanduser("~/.config/aliyun-controller"),
     )
-    return Path(config_dir) / "config.yaml"
+    return Path(config_dir)
+
+
+def _get_config_path() -> Path:
+    return get_config_dir() / "config.yaml"
+
+
+def _get_state_path() -> Path:
+    return get_config_dir() / "state.json"
+
+
+# Tea 客户端运行参数及其默认值：连接/读取超时（毫秒）、最大空闲连接数
+RUNTIME_DEFAULTS = {
+    "connect_timeout": 5000,
+    "read_timeout": 10000,
+    "max_idle_conns": 16,
+}
+
+# endpoints 段允许为各服务覆盖的连接参数（如指向本地模拟服务）
+ENDPOINT_SERVICES = ("bss", "dns")
+ENDPOINT_OPTIONS = ("endpoint", "protocol", "region_id")
+
+# 顶层密钥对应的账号名称
+DEFAULT_PROFILE = "default"
+# 账号名称会用于本地缓存文件名
+PROFILE_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+_config_cache = {}
+_config_lock = threading.Lock()
 
 
 def load_config() -> dict:
+    """
+    读取配置文件。解析结果按文件路径和修改时间缓存，文件未变化时不会重复解析。
+    """
     config_path = _get_config_path()
+    stat = config_path.stat()
+    cache_key = (str(config_path), stat.st_mtime_ns, stat.st_size)
+    with _config_lock:
+        cached = _config_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+
+    config = _parse_config(config_path)
+    with _config_lock:
+        _config_cache.clear()
+        _config_cache[cache_key] = config
+    return dict(config)
+
+
+def _parse_credentials(section: dict, prefix: str) -> tuple:
+    access_key_id = section.get("access_key_id")
+    access_key_secret = section.get("access_key_secret")
+    if not isinstance(access_key_id, str) or not access_key_id.strip():
+        raise ValueError(f"缺少有效的 {prefix}access_key_id")
+    if not isinstance(access_key_secret, str) or not access_key_secret.strip():
+        raise ValueError(f"缺少有效的 {prefix}access_key_secret")
+    return access_key_id.strip(), access_key_secret.strip()
+
+
+def _parse_runtime(runtime, prefix: str, base: dict) -> dict:
+    runtime = runtime or {}
+    if not isinstance(runtime, dict):
+        raise ValueError(f"{prefix}runtime 配置格式错误")
+    runtime_options = dict(base)
+    for key, value in runtime.items():
+        if key not in RUNTIME_DEFAULTS:
+            raise ValueError(f"不支持的 {prefix}runtime 配置项: {key}")
+        if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+            raise ValueError(f"{prefix}runtime.{key} 必须是正整数")
+        runtime_options[key] = value
+    return runtime_options
+
+
+def _parse_endpoints(endpoints, prefix: str, base: dict) -> dict:
+    endpoints = endpoints or {}
+    if not isinstance(endpoints, dict):
+        raise ValueError(f"{prefix}endpoints 配置格式错误")
+    endpoint_options = dict(base)
+    for service, options in endpoints.items():
+        if service not in ENDPOINT_SERVICES:
+            raise ValueError(f"不支持的 {prefix}endpoints 服务: {service}")
+        if not isinstance(options, dict):
+            raise ValueError(f"{prefix}endpoints.{service} 配置格式错误")
+        for key, value in options.items():
+            if key not in ENDPOINT_OPTIONS:
+                raise ValueError(f"不支持的 {prefix}endpoints.{service} 配置项: {key}")
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f"{prefix}endpoints.{service}.{key} 必须是非空字符串")
+        if str(options.get("protocol", "https")).lower() not in ("http", "https"):
+            raise ValueError(f"{prefix}endpoints.{service}.protocol 只能是 http 或 https")
+        endpoint_options[service] = {key: value.strip() for key, value in options.items()}
+    return endpoint_options
+
+
+def _parse_config(config_path: Path) -> dict:
     with open(config_path, "r", encoding="utf-8") as f:
         config = yaml.safe_load(f)
 
     if not isinstance(config, dict):
         raise ValueError("配置文件内容格式错误")
 
-    access_key_id = config.get("access_key_id")
-    access_key_secret = config.get("access_key_secret")
-    if not isinstance(access_key_id, str) or not access_key_id.strip():
-        raise ValueError("缺少有效的 access_key_id")
-    if not isinstance(access_key_secret, str) or not access_key_secret.strip():
-        raise ValueError("缺少有效的 access_key_secret")
+    profiles = config.get("profiles") or {}
+    if not isinstance(profiles, dict):
+        raise ValueError("profiles 配置格式错误")
+
+    # 配置了 profiles 时顶层的密钥可以省略；存在时作为 default 账号
+    if profiles and config.get("access_key_id") is None and config.get("access_key_secret") is None:
+        access_key_id = access_key_secret = None
+    else:
+        access_key_id, access_key_secret = _parse_credentials(config, "")
+
+    runtime_options = _parse_runtime(config.get("runtime"), "", RUNTIME_DEFAULTS)
+    endpoint_options = _parse_endpoints(config.get("endpoints"), "", {})
+
+    prefetch = config.get("prefetch", False)
+    if not isinstance(prefetch, bool):
+        raise ValueError("prefetch 必须是 true 或 false")
+
+    # 各账号只需填写密钥，runtime / endpoints 未填写的部分沿用顶层配置
+    profile_options = {}
+    for name, section in profiles.items():
+        if not isinstance(name, str) or not PROFILE_NAME_PATTERN.match(name):
+            raise ValueError(f"账号名称只能包含字母、数字、下划线、点和横线: {name}")
+        if name == DEFAULT_PROFILE and access_key_id is not None:
+            raise ValueError(f"账号名称 {DEFAULT_PROFILE} 已用于顶层密钥")
+        if not isinstance(section, dict):
+            raise ValueError(f"profiles.{name} 配置格式错误")
+        prefix = f"profiles.{name}."
+        profile_key_id, profile_key_secret = _parse_credentials(section, prefix)
+        unknown = set(section) - {"access_key_id", "access_key_secret", "runtime", "endpoints"}
+        if unknown:
+            raise ValueError(f"不支持的 profiles.{name} 配置项: {', '.join(sorted(unknown))}")
+        profile_options[name] = {
+            "access_key_id": profile_key_id,
+            "access_key_secret": profile_key_secret,
+            "runtime": _parse_runtime(section.get("runtime"), prefix, runtime_options),
+            "endpoints": _parse_endpoints(section.get("endpoints"), prefix, endpoint_options),
+        }
 
     return {
-        "access_key_id": access_key_id.strip(),
-        "access_key_secret": access_key_secret.strip(),
+        "access_key_id": access_key_id,
+        "access_key_secret": access_key_secret,
+        "runtime": runtime_options,
+        "endpoints": endpoint_options,
+        "prefetch": prefetch,
+        "profiles": profile_options,
     }
 
 
+def active_profile() -> str:
+    """
+    当前进程默认使用的账号（--accounts 只指定一个账号时设置），未设置时为 None
+    """
+    return os.environ.get("ALIYUN_CONTROLLER_PROFILE") or None
+
+
+def list_profiles(config: dict = None) -> list:
+    """
+    列出配置中的所有账号；顶层配置了密钥时 default 排在最前
+    """
+    config = config or load_config()
+    names = [DEFAULT_PROFILE] if config["access_key_id"] is not None else []
+    return names + [name for name in config["profiles"] if name not in names]
+
+
+def get_profile_config(profile: str = None) -> dict:
+    """
+    获取账号的连接配置（access_key_id、access_key_secret、runtime、endpoints）。
+    profile 为 None 时使用 active_profile()，仍未指定时使用顶层密钥。
+    """
+    config = load_config()
+    profile = profile or active_profile()
+    if profile is None or (profile == DEFAULT_PROFILE and config["access_key_id"] is not None):
+        if config["access_key_id"] is None:
+            raise ValueError("配置文件中没有顶层密钥，请使用 --accounts 指定账号")
+        return {key: config[key] for key in ("access_key_id", "access_key_secret", "runtime", "endpoints")}
+    if profile not in config["profiles"]:
+        raise ValueError(f"配置文件中没有账号: {profile}")
+    return dict(config["profiles"][profile])
+
+
+def load_state() -> dict:
+    """
+    读取配置目录下 state.json 中保存的会话状态（如最近管理的域名），文件不存在或损坏时返回空字典
+    """
+    try:
+        with open(_get_state_path(), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def update_state(**values):
+    """
+    更新会话状态中的若干键，先写临时文件再替换，写入失败时静默忽略
+    """
+    state_path = _get_state_path()
+    with _config_lock:
+        state = load_state()
+        state.update(values)
+        temp_path = state_path.with_name(f"{state_path.name}.part")
+        try:
+            state_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(temp_path, state_path)
+        except OSError:
+            pass
+
+
 def _run_setup_flow() -> bool:
+    from InquirerPy.resolver import prompt
+
     config_path = _get_config_path()
     config_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -92,6 +283,9 @@ def ensure_config_ready() -> bool:
     except Exception as e:
         print(f"配置文件损坏或不可读取: {e}")
 
+    from InquirerPy.base.control import Choice
+    from InquirerPy.resolver import prompt
+
     try:
         action = prompt(
             [
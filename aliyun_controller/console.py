@@ -0,0 +1,81 @@
+"""
+终端输出的静默控制：后台预取期间产生的输出（包括它启动的工作线程中的输出）被丢弃，
+前台照常输出。
+
+静默状态保存在 contextvars 中。线程池不会自动继承调用方的上下文，
+向线程池提交任务或启动生产者线程时需要用 propagate() 包装，把调用方的静默状态带过去。
+"""
+import contextlib
+import contextvars
+import sys
+import threading
+
+# 当前上下文的输出是否被丢弃
+_quiet = contextvars.ContextVar("aliyun_controller_quiet", default=False)
+_streams_lock = threading.Lock()
+
+
+class _QuietAwareStream:
+    """
+    包装 sys.stdout / sys.stderr：静默上下文中写入的内容被丢弃，其他上下文照常输出
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        if _quiet.get():
+            return len(text)
+        return self._stream.write(text)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        if not _quiet.get():
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def install_stream_filters():
+    """
+    为 sys.stdout / sys.stderr 安装静默过滤包装（重复调用时不会重复包装）。
+    contextlib.redirect_stdout 替换的是整个进程的输出，不能用于后台线程
+    """
+    with _streams_lock:
+        if not isinstance(sys.stdout, _QuietAwareStream):
+            sys.stdout = _QuietAwareStream(sys.stdout)
+        if not isinstance(sys.stderr, _QuietAwareStream):
+            sys.stderr = _QuietAwareStream(sys.stderr)
+
+
+def is_quiet() -> bool:
+    return _quiet.get()
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    在当前上下文中丢弃输出（需先调用 install_stream_filters）
+    """
+    token = _quiet.set(True)
+    try:
+        yield
+    finally:
+        _quiet.reset(token)
+
+
+def propagate(func):
+    """
+    包装交给其他线程执行的函数，使其在调用方当前上下文的副本中运行（继承静默状态）。
+    每次调用使用独立的副本，同一个包装函数可以被多个线程同时调用
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+
+    return run
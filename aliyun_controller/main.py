@@ -1,42 +1,63 @@
 import datetime
 import re
-import logging
 import traceback
 import argparse
 import os
-from InquirerPy.resolver import prompt
-from InquirerPy.base.control import Choice
-from aliyun_controller.modules.billing import get_outbound_traffic_module, summarize_billing_module
-from aliyun_controller.modules.dns import dns_management_module
-from aliyun_controller.config import ensure_config_ready
-
-# 设置根日志记录器的级别以抑制所有低于ERROR的消息
-logging.getLogger().setLevel(logging.ERROR)
-
-# 配置日志 - 设置为空处理器以彻底阻止输出
-logging.basicConfig(
-    level=logging.ERROR,
-    handlers=[logging.NullHandler()]  # 使用空处理器，不实际输出任何日志
-)
-
-# 为控制台单独创建一个handler，只显示严重错误
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.CRITICAL)  # 只有CRITICAL级别的日志才会显示
-formatter = logging.Formatter('%(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-
-# 获取根logger并添加控制台处理器
-root_logger = logging.getLogger()
-root_logger.addHandler(console_handler)
-
-# 保持对第三方库日志的严格限制
-logging.getLogger('alibabacloud').setLevel(logging.CRITICAL)
-logging.getLogger('telemetry').setLevel(logging.CRITICAL)
-logging.getLogger('concurrent').setLevel(logging.CRITICAL)
-logging.getLogger('urllib3').setLevel(logging.CRITICAL)
-logging.getLogger('requests').setLevel(logging.CRITICAL)
-logging.getLogger('asyncio').setLevel(logging.CRITICAL)
-logging.getLogger('InquirerPy').setLevel(logging.CRITICAL)  # 特别添加对InquirerPy的限制
+import sys
+from aliyun_controller.batch import BATCH_COMMANDS, add_batch_subcommands, billing_cycle_arg, profiles_arg
+
+def _configure_logging():
+    """
+    配置日志：仅在真正进入交互或执行命令时调用，避免 --help 等场景的额外开销
+    """
+    import logging
+
+    # 设置根日志记录器的级别以抑制所有低于ERROR的消息
+    logging.getLogger().setLevel(logging.ERROR)
+
+    # 配置日志 - 设置为空处理器以彻底阻止输出
+    logging.basicConfig(
+        level=logging.ERROR,
+        handlers=[logging.NullHandler()]  # 使用空处理器，不实际输出任何日志
+    )
+
+    # 为控制台单独创建一个handler，只显示严重错误
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.CRITICAL)  # 只有CRITICAL级别的日志才会显示
+    formatter = logging.Formatter('%(levelname)s - %(message)s')
+    console_handler.setFormatter(formatter)
+
+    # 获取根logger并添加控制台处理器
+    root_logger = logging.getLogger()
+    root_logger.addHandler(console_handler)
+
+    # 保持对第三方库日志的严格限制
+    logging.getLogger('alibabacloud').setLevel(logging.CRITICAL)
+    logging.getLogger('telemetry').setLevel(logging.CRITICAL)
+    logging.getLogger('concurrent').setLevel(logging.CRITICAL)
+    logging.getLogger('urllib3').setLevel(logging.CRITICAL)
+    logging.getLogger('requests').setLevel(logging.CRITICAL)
+    logging.getLogger('asyncio').setLevel(logging.CRITICAL)
+    logging.getLogger('InquirerPy').setLevel(logging.CRITICAL)  # 特别添加对InquirerPy的限制
+
+def _check_profile_flag(parser: argparse.ArgumentParser, argv: list):
+    """
+    --profile 是性能剖析开关，不接受参数。后面紧跟的不是选项或子命令名称时视为账号名称，
+    在解析前明确提示改用 --accounts，而不是报出“无效的子命令”
+    """
+    for i, arg in enumerate(argv):
+        if arg == "--":
+            break
+        if arg.startswith("--profile="):
+            value = arg.split("=", 1)[1]
+        elif (
+            arg == "--profile" and i + 1 < len(argv)
+            and not argv[i + 1].startswith("-") and argv[i + 1] not in BATCH_COMMANDS
+        ):
+            value = argv[i + 1]
+        else:
+            continue
+        parser.error(f"--profile 是性能剖析开关，不接受参数；指定账号请使用 --accounts {value}")
 
 def parse_args():
     """解析命令行参数"""
@@ -46,7 +67,68 @@ def parse_args():
         help="配置文件目录路径",
         default=os.path.expanduser("~/.config/aliyun-controller")
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--refresh", "--no-cache",
+        dest="refresh",
+        action="store_true",
+        help="忽略本地账单缓存，强制从阿里云重新获取"
+    )
+    parser.add_argument(
+        "--daily-sync",
+        action="store_true",
+        help="当月账单按日增量同步到本地，只重新拉取最近仍可能变化的日期"
+    )
+    parser.add_argument(
+        "--prefetch",
+        action="store_true",
+        help="显示主菜单时在后台预取当月账单、域名列表和最近管理的域名的解析记录"
+    )
+    # 账号参数不叫 --profiles，避免与性能剖析开关 --profile 混淆
+    profile_group = parser.add_mutually_exclusive_group()
+    profile_group.add_argument(
+        "--accounts",
+        dest="profiles",
+        type=profiles_arg,
+        metavar="A,B,C",
+        help="使用 config.yaml 中 profiles 段的账号（逗号分隔）；指定多个账号时并发查询并汇总"
+    )
+    profile_group.add_argument(
+        "--all-accounts",
+        dest="all_profiles",
+        action="store_true",
+        help="对配置中的全部账号并发查询并汇总"
+    )
+    parser.add_argument(
+        "--from",
+        dest="from_cycle",
+        type=billing_cycle_arg,
+        help="多月份对比的起始月份 (YYYY-MM)，需与 --to 同时使用"
+    )
+    parser.add_argument(
+        "--to",
+        dest="to_cycle",
+        type=billing_cycle_arg,
+        help="多月份对比的结束月份 (YYYY-MM)，需与 --from 同时使用"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="记录每个接口调用和处理阶段的耗时，退出时输出 p50/p95/max 统计"
+    )
+    parser.add_argument(
+        "--profile-json",
+        metavar="PATH",
+        help="退出时将剖析结果写入 JSON 文件（隐含 --profile）"
+    )
+    add_batch_subcommands(parser)
+    argv = sys.argv[1:]
+    _check_profile_flag(parser, argv)
+    args = parser.parse_args(argv)
+    if (args.from_cycle is None) != (args.to_cycle is None):
+        parser.error("--from 和 --to 必须同时指定")
+    if args.from_cycle and args.from_cycle > args.to_cycle:
+        parser.error("--from 不能晚于 --to")
+    return args
 
 def _prompt_for_billing_cycle() -> str | None:
     """
@@ -54,6 +136,8 @@ def _prompt_for_billing_cycle() -> str | None:
     支持 YYYY-MM 和 YYYY-M 格式。
     如果用户取消输入，则返回 None。
     """
+    from InquirerPy.resolver import prompt
+
     date_prompt = [
         {
             "type": "input",
@@ -84,11 +168,42 @@ def _prompt_for_billing_cycle() -> str | None:
         print(f"详细错误信息:\n{traceback.format_exc()}")
         return None
 
+def _prefetch_configured() -> bool:
+    """
+    配置文件中是否开启了 prefetch
+    """
+    from aliyun_controller.config import load_config
+    try:
+        return load_config().get("prefetch", False)
+    except Exception:
+        return False
+
+def _prompt_for_profile(profiles: list) -> str | None:
+    """
+    多账号模式下选择要管理的账号，取消时返回 None
+    """
+    from InquirerPy.base.control import Choice
+    from InquirerPy.resolver import prompt
+
+    try:
+        answer = prompt([{
+            "type": "list",
+            "message": "请选择账号:",
+            "choices": [Choice(profile, name=profile) for profile in profiles] + [Choice(value=None, name="[返回主菜单]")],
+            "name": "profile",
+        }])
+    except KeyboardInterrupt:
+        return None
+    return answer.get("profile") if answer else None
+
 def query_and_repeat(query_function):
     """
     包装查询函数：先查当月，然后提供子菜单让用户选择继续查询或返回。
     :param query_function: 接受 billing_cycle 参数的查询函数。
     """
+    from InquirerPy.base.control import Choice
+    from InquirerPy.resolver import prompt
+
     # 1. 默认查询当月
     current_cycle = datetime.datetime.now().strftime("%Y-%m")
     print(f"\n--- 正在查询默认月份 {current_cycle} 的账单 ---")
@@ -152,14 +267,55 @@ def main():
     主函数，提供交互式菜单
     """
     args = parse_args()
+    _configure_logging()
+
+    # 服务模块及其 SDK 只在用到时导入，保持启动速度
+    from aliyun_controller.config import ensure_config_ready
     
     # 设置配置目录环境变量，供模块使用
     os.environ['ALIYUN_CONTROLLER_CONFIG_DIR'] = args.dir
+    if args.refresh:
+        os.environ['ALIYUN_CONTROLLER_REFRESH'] = '1'
+    if args.daily_sync:
+        os.environ['ALIYUN_CONTROLLER_DAILY_SYNC'] = '1'
+
+    if args.profile or args.profile_json:
+        import atexit
+        from aliyun_controller import profiling
+        profiling.enable_profiling()
+        atexit.register(profiling.finish, args.profile_json)
+
+    if args.command:
+        from aliyun_controller.batch import run_batch
+        sys.exit(run_batch(args))
 
     if not ensure_config_ready():
         print("未完成配置，程序退出。")
         return
+
+    from aliyun_controller.modules.accounts import activate_profiles
+    try:
+        accounts = activate_profiles(args.profiles, args.all_profiles)
+    except ValueError as e:
+        print(e)
+        return
+    multi_account = len(accounts) > 1
+
+    if args.from_cycle:
+        if multi_account:
+            print("--from/--to 只能用于单个账号，请通过 --accounts 指定一个账号。")
+            return
+        from aliyun_controller.modules.billing import range_billing_module
+        range_billing_module(args.from_cycle, args.to_cycle)
+        return
+
+    if args.prefetch or _prefetch_configured():
+        from aliyun_controller.prefetch import start_prefetch
+        start_prefetch(profiles=accounts if multi_account else None)
     
+    from InquirerPy.base.control import Choice
+    from InquirerPy.resolver import prompt
+
     print("阿里云控制台工具")
     print("=" * 30)
     
@@ -186,13 +342,25 @@ def main():
                 
             action = result.get("action")
 
-            if action == "get_traffic":
+            if action in ("get_traffic", "summarize_bill") and multi_account:
+                import functools
+                from aliyun_controller.modules.accounts import accounts_billing_module
+                query_and_repeat(functools.partial(
+                    accounts_billing_module, profiles=accounts, include_products=action == "summarize_bill"
+                ))
+            elif action == "get_traffic":
+                from aliyun_controller.modules.billing import get_outbound_traffic_module
                 query_and_repeat(get_outbound_traffic_module)
             elif action == "summarize_bill":
+                from aliyun_controller.modules.billing import summarize_billing_module
                 query_and_repeat(summarize_billing_module)
             elif action == "manage_dns":
                 try:
-                    dns_management_module()
+                    from aliyun_controller.modules.dns import dns_management_module
+                    profile = _prompt_for_profile(accounts) if multi_account else None
+                    if multi_account and profile is None:
+                        continue
+                    dns_management_module(profile)
                 except KeyboardInterrupt:
                     print("\n操作被取消，返回主菜单。")
                 except Exception as e:
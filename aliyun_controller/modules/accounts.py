@@ -0,0 +1,165 @@
+"""
+多账号并发查询：对 config.yaml 中 profiles 段配置的多个账号同时执行账单和 DNS 查询，
+每个账号复用各自的客户端、本地缓存和限速器，结果合并为带“账号”列的汇总报表。
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from aliyun_controller.config import list_profiles
+from aliyun_controller.console import propagate
+
+# 同时查询的最大账号数
+PROFILE_WORKERS = 8
+# 账单汇总使用的报表
+ACCOUNT_BILL_REPORTS = ('item_count', 'traffic', 'summary')
+
+
+def parse_profile_names(value: str) -> tuple:
+    """
+    解析逗号分隔的账号名称并去重
+    """
+    names = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    if not names:
+        raise ValueError("至少需要指定一个账号")
+    return names
+
+
+def resolve_profiles(names: tuple = None, all_profiles: bool = False) -> list:
+    """
+    校验要查询的账号，all_profiles=True 时返回配置中的全部账号
+    """
+    available = list_profiles()
+    if all_profiles:
+        if not available:
+            raise ValueError("配置文件中没有任何账号")
+        return available
+    unknown = [name for name in names or () if name not in available]
+    if unknown:
+        raise ValueError(f"配置文件中没有账号: {', '.join(unknown)}，可用账号: {', '.join(available) or '无'}")
+    return list(names or ())
+
+
+def activate_profiles(names: tuple = None, all_profiles: bool = False) -> list:
+    """
+    处理 --accounts / --all-accounts：只选中一个账号时将其设为进程的默认账号，
+    所有命令照常执行；选中多个账号时由调用方并发查询。返回选中的账号列表（未指定时为空）。
+    """
+    profiles = resolve_profiles(names, all_profiles)
+    if len(profiles) == 1:
+        os.environ['ALIYUN_CONTROLLER_PROFILE'] = profiles[0]
+    return profiles
+
+
+def run_for_profiles(profiles: list, func, workers: int = PROFILE_WORKERS) -> tuple:
+    """
+    对每个账号并发执行 func(账号)，返回 ({账号: 结果}, {账号: 异常})，均按 profiles 的顺序排列
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(profiles)))) as executor:
+        run = propagate(func)
+        futures = {profile: executor.submit(run, profile) for profile in profiles}
+    results = {}
+    errors = {}
+    for profile, future in futures.items():
+        try:
+            results[profile] = future.result()
+        except Exception as e:
+            errors[profile] = e
+    return results, errors
+
+
+def compute_accounts_billing(billing_cycle: str, profiles: list) -> tuple:
+    """
+    并发计算各账号的账单条数、流出流量和按产品归纳的消费，
+    返回 ({账号: {'item_count', 'traffic', 'summary'}}, {账号: 异常})
+    """
+    from aliyun_controller.modules.bill_reports import get_bill_session
+
+    return run_for_profiles(
+        profiles, lambda profile: get_bill_session(profile).run_reports(billing_cycle, ACCOUNT_BILL_REPORTS)
+    )
+
+
+def compute_accounts_domains(profiles: list) -> tuple:
+    """
+    并发获取各账号的域名列表，返回 ({账号: 域名列表}, {账号: 异常})
+    """
+    from aliyun_controller.modules.dns import get_dns_querier
+
+    return run_for_profiles(profiles, lambda profile: get_dns_querier(profile).get_domains())
+
+
+def accounts_billing_to_map(billing_cycle: str, results: dict, errors: dict) -> dict:
+    accounts = []
+    products = []
+    for profile, reports in results.items():
+        summary = reports['summary']
+        accounts.append({
+            "account": profile,
+            "item_count": reports['item_count'],
+            "total_bytes": reports['traffic'],
+            "total_amount": round(sum(data['total_amount'] for data in summary.values()), 6),
+        })
+        products.extend(
+            {
+                "account": profile,
+                "product_code": product_code,
+                "product_name": data['product_name'],
+                "count": data['count'],
+                "total_amount": round(data['total_amount'], 6),
+            }
+            for product_code, data in summary.items()
+        )
+    products.sort(key=lambda row: row['total_amount'], reverse=True)
+    return {
+        "billing_cycle": billing_cycle,
+        "total_amount": round(sum(account['total_amount'] for account in accounts), 6),
+        "accounts": accounts,
+        "products": products,
+        "errors": {profile: str(error) for profile, error in errors.items()},
+    }
+
+
+def print_accounts_billing(billing_cycle: str, results: dict, errors: dict, include_products: bool = True):
+    """
+    输出多账号汇总：每个账号一行（账单条数、流出流量、金额），可选按产品和账号展开的明细
+    """
+    data = accounts_billing_to_map(billing_cycle, results, errors)
+    print("\n" + "="*90)
+    print(f"账单周期 {billing_cycle} 多账号汇总".center(90))
+    print("="*90)
+    print(f"{'账号':<20} {'账单条数':<12} {'流出流量 (GB)':<18} {'总金额 (元)':<15}")
+    print("-"*90)
+    for account in sorted(data['accounts'], key=lambda row: row['total_amount'], reverse=True):
+        traffic_gb = account['total_bytes'] / (1024 * 1024 * 1024)
+        print(f"{account['account']:<20} {account['item_count']:<12} {traffic_gb:<18.4f} {account['total_amount']:<15.2f}")
+    for profile, error in errors.items():
+        print(f"{profile:<20} 查询失败: {error}")
+
+    if include_products and data['products']:
+        print("-"*90)
+        print(f"{'产品名称':<25} {'产品代码':<15} {'账号':<20} {'账单条数':<10} {'总金额 (元)':<15}")
+        print("-"*90)
+        for row in data['products']:
+            print(
+                f"{row['product_name'][:24]:<25} {row['product_code']:<15} {row['account']:<20} "
+                f"{row['count']:<10} {row['total_amount']:<15.2f}"
+            )
+    print("-"*90)
+    print(f"总计: {data['total_amount']:.2f} 元".rjust(90))
+    print("="*90)
+
+
+def accounts_billing_module(billing_cycle: str, profiles: list, include_products: bool = True):
+    """
+    多账号账单汇总模块（交互式菜单使用）
+    """
+    try:
+        print(f"\n正在并发查询 {len(profiles)} 个账号在账单周期 {billing_cycle} 的账单明细...")
+        results, errors = compute_accounts_billing(billing_cycle, profiles)
+        if not any(reports['item_count'] for reports in results.values()) and not errors:
+            print("未发现任何账单明细。")
+            return
+        print_accounts_billing(billing_cycle, results, errors, include_products=include_products)
+    except KeyboardInterrupt:
+        print("\n操作被取消，返回上级菜单。")
+        return
@@ -0,0 +1,248 @@
+"""
+账单多维聚合：在列式账单存储上按任意分组维度组合一次性累计金额和条数。
+
+安装了 NumPy 时，各分组列的编号合成为一个整数键，用 np.bincount（键空间较大时先 np.unique）
+完成向量化分组；否则退回纯 Python 的字典分组，结果一致。
+"""
+from aliyun_controller.modules.bill_store import BillItemStore
+
+# 分组维度 -> (分组字段, 显示名称字段)；显示名称取同一分组值最后出现的名称
+GROUP_KEYS = {
+    'product': ('ProductCode', 'ProductName'),
+    'region': ('Region', None),
+    'instance': ('InstanceID', None),
+    'item': ('BillingItemCode', 'BillingItem'),
+    'resource_group': ('ResourceGroup', None),
+    'tag': ('Tag', None),
+    'subscription': ('SubscriptionType', None),
+}
+
+# 预设的分组方式
+PRESETS = {
+    'product_summary': ('product',),
+}
+
+# 合成整数键的上限，超过时改为按多列分组
+_MAX_COMBINED_KEY = 2 ** 62
+# 合成键空间不超过该值（或行数的两倍）时直接计数，不做排序去重
+_DENSE_KEY_LIMIT = 1 << 20
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def parse_group_keys(value) -> tuple:
+    """
+    解析分组维度（逗号分隔的字符串或序列），校验名称并去重
+    """
+    names = value.split(',') if isinstance(value, str) else list(value)
+    keys = []
+    for name in names:
+        name = name.strip().lower().replace('-', '_')
+        if not name:
+            continue
+        if name in PRESETS:
+            keys.extend(key for key in PRESETS[name] if key not in keys)
+            continue
+        if name not in GROUP_KEYS:
+            raise ValueError(f"不支持的分组维度: {name}，可选: {', '.join(GROUP_KEYS)}")
+        if name not in keys:
+            keys.append(name)
+    if not keys:
+        raise ValueError("至少需要一个分组维度")
+    return tuple(keys)
+
+
+def required_fields(group_keys) -> tuple:
+    """
+    按这些维度分组需要在账单存储中编码的字段
+    """
+    fields = []
+    for key in group_keys:
+        for field in GROUP_KEYS[key]:
+            if field and field not in fields:
+                fields.append(field)
+    return tuple(fields)
+
+
+class AggregateResult:
+    """
+    聚合结果。rows 中每行为 {维度: 取值, [维度_name: 显示名称], 'total_amount': 金额, 'count': 条数}，
+    按金额从大到小排列。
+    """
+
+    def __init__(self, group_keys: tuple, rows: list, item_count: int):
+        self.group_keys = group_keys
+        self.rows = rows
+        self.item_count = item_count
+
+    @property
+    def total_amount(self) -> float:
+        return sum(row['total_amount'] for row in self.rows)
+
+    def to_map(self) -> dict:
+        return {
+            "group_by": list(self.group_keys),
+            "item_count": self.item_count,
+            "total_amount": round(self.total_amount, 6),
+            "rows": [dict(row, total_amount=round(row['total_amount'], 6)) for row in self.rows],
+        }
+
+    def to_dataframe(self):
+        """
+        转换为 pandas DataFrame（需要安装 pandas）
+        """
+        try:
+            import pandas
+        except ImportError:
+            raise ImportError("to_dataframe 需要安装 pandas: pip install aliyun_controller[pandas]") from None
+        return pandas.DataFrame(self.rows)
+
+
+def _group_numpy(np, columns: list, sizes: list, amounts, need_last_rows: bool) -> tuple:
+    """
+    向量化分组，返回 (每组各列编号的列表, 每组金额, 每组条数, 每组最后一行的行号)
+    """
+    code_arrays = [np.frombuffer(column, dtype=np.uint32).astype(np.int64) for column in columns]
+    weights = np.frombuffer(amounts, dtype=np.float64)
+    row_count = len(weights)
+    sizes = [max(size, 1) for size in sizes]
+
+    combined_size = 1
+    for size in sizes:
+        combined_size *= size
+    if combined_size < _MAX_COMBINED_KEY:
+        combined = np.zeros(row_count, dtype=np.int64)
+        for codes, size in zip(code_arrays, sizes):
+            combined = combined * size + codes
+        if combined_size <= max(_DENSE_KEY_LIMIT, 2 * row_count):
+            # 键空间不大时直接按合成键计数，无需排序
+            counts = np.bincount(combined, minlength=combined_size)
+            unique = np.flatnonzero(counts)
+            counts = counts[unique]
+            totals = np.bincount(combined, weights=weights, minlength=combined_size)[unique]
+            inverse = None
+        else:
+            unique, inverse = np.unique(combined, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            counts = np.bincount(inverse, minlength=len(unique))
+            totals = np.bincount(inverse, weights=weights, minlength=len(unique))
+        group_codes = []
+        remaining = unique
+        for size in reversed(sizes):
+            group_codes.append(remaining % size)
+            remaining = remaining // size
+        group_codes.reverse()
+    else:
+        stacked = np.stack(code_arrays, axis=1)
+        unique, inverse = np.unique(stacked, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        counts = np.bincount(inverse, minlength=len(unique))
+        totals = np.bincount(inverse, weights=weights, minlength=len(unique))
+        group_codes = [unique[:, i] for i in range(len(columns))]
+        combined = None
+
+    last_rows = []
+    if need_last_rows:
+        last = np.full(combined_size if inverse is None else len(counts), -1, dtype=np.int64)
+        np.maximum.at(last, combined if inverse is None else inverse, np.arange(row_count))
+        last_rows = (last[unique] if inverse is None else last).tolist()
+    return (
+        [codes.tolist() for codes in group_codes],
+        totals.tolist(),
+        counts.tolist(),
+        last_rows,
+    )
+
+
+def _group_python(columns: list, amounts) -> tuple:
+    groups = {}
+    keys = zip(*columns) if len(columns) > 1 else columns[0]
+    for row, (key, amount) in enumerate(zip(keys, amounts)):
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [amount, 1, row]
+        else:
+            group[0] += amount
+            group[1] += 1
+            group[2] = row
+    keys = list(groups)
+    if len(columns) > 1:
+        group_codes = [list(codes) for codes in zip(*keys)] if keys else [[] for _ in columns]
+    else:
+        group_codes = [keys]
+    stats = list(groups.values())
+    return (
+        group_codes,
+        [group[0] for group in stats],
+        [group[1] for group in stats],
+        [group[2] for group in stats],
+    )
+
+
+def aggregate(store: BillItemStore, group_by, use_numpy: bool = None) -> AggregateResult:
+    """
+    按 group_by 中的维度组合分组，一次遍历累计每组的金额和条数。
+    use_numpy=None 时在安装了 NumPy 的情况下自动使用向量化实现。
+    """
+    group_keys = parse_group_keys(group_by)
+    missing = [field for field in required_fields(group_keys) if field not in store.codes]
+    if missing:
+        raise ValueError(f"账单存储缺少分组字段: {', '.join(missing)}")
+
+    fields = [GROUP_KEYS[key][0] for key in group_keys]
+    columns = [store.codes[field] for field in fields]
+    np = _numpy() if use_numpy is not False else None
+    if use_numpy and np is None:
+        raise ImportError("未安装 NumPy: pip install aliyun_controller[fast]")
+
+    if not len(store):
+        return AggregateResult(group_keys, [], 0)
+    if np is not None:
+        need_last_rows = any(GROUP_KEYS[key][1] for key in group_keys)
+        group_codes, totals, counts, last_rows = _group_numpy(
+            np, columns, [len(store.dictionaries[field]) for field in fields], store.amounts, need_last_rows
+        )
+    else:
+        group_codes, totals, counts, last_rows = _group_python(columns, store.amounts)
+
+    rows = []
+    for i in range(len(totals)):
+        row = {}
+        for key, field, codes in zip(group_keys, fields, group_codes):
+            row[key] = store.values(field)[codes[i]]
+            label_field = GROUP_KEYS[key][1]
+            if label_field:
+                row[f"{key}_name"] = store.values(label_field)[store.codes[label_field][last_rows[i]]]
+        row['total_amount'] = totals[i]
+        row['count'] = int(counts[i])
+        rows.append(row)
+    rows.sort(key=lambda row: row['total_amount'], reverse=True)
+    return AggregateResult(group_keys, rows, len(store))
+
+
+def pivot(result: AggregateResult, column_key: str) -> tuple:
+    """
+    将聚合结果按 column_key 展开为透视表。
+    返回 (列取值列表（按总金额排序）, [(行维度取值元组, {列取值: 金额}, 行合计)])
+    """
+    if column_key not in result.group_keys:
+        raise ValueError(f"透视列 {column_key} 不在分组维度中")
+    row_keys = [key for key in result.group_keys if key != column_key]
+    column_totals = {}
+    table = {}
+    for row in result.rows:
+        column_value = row[column_key]
+        row_value = tuple(row[key] for key in row_keys)
+        cells = table.setdefault(row_value, {})
+        cells[column_value] = cells.get(column_value, 0.0) + row['total_amount']
+        column_totals[column_value] = column_totals.get(column_value, 0.0) + row['total_amount']
+    columns = sorted(column_totals, key=lambda value: column_totals[value], reverse=True)
+    rows = [(row_value, cells, sum(cells.values())) for row_value, cells in table.items()]
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return columns, rows
@@ -0,0 +1,176 @@
+"""
+账单明细的流式导出：逐页写出 CSV、JSON Lines 或 Parquet（需要 pyarrow），
+内存中最多只保留一个 Parquet 行组，导出任意大小的账单都不会占满内存。
+"""
+import csv
+import json
+import os
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+# 未指定列时 CSV / Parquet 导出的列
+DEFAULT_COLUMNS = (
+    'BillingDate', 'SubscriptionType', 'ProductCode', 'ProductName', 'BillingItemCode', 'BillingItem',
+    'InstanceID', 'Region', 'Zone', 'ResourceGroup', 'Tag', 'Usage', 'UsageUnit',
+    'PretaxGrossAmount', 'PretaxAmount', 'Currency',
+)
+# 接口返回为数值的字段，Parquet 中使用 float64，其余字段一律为字符串
+NUMERIC_COLUMNS = frozenset((
+    'AdjustAmount', 'AfterDiscountAmount', 'CashAmount', 'DeductedByCashCoupons', 'DeductedByCoupons',
+    'DeductedByPrepaidCard', 'InvoiceDiscount', 'OutstandingAmount', 'PaymentAmount',
+    'PretaxAmount', 'PretaxGrossAmount',
+))
+# Parquet 每个行组的最大行数
+PARQUET_ROW_GROUP_SIZE = 50000
+
+_SUFFIX_FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.parquet': 'parquet'}
+
+
+def parse_columns(value: str) -> tuple:
+    """
+    解析逗号分隔的列名
+    """
+    columns = tuple(dict.fromkeys(column.strip() for column in value.split(',') if column.strip()))
+    if not columns:
+        raise ValueError("至少需要指定一列")
+    return columns
+
+
+def guess_format(path: str) -> str:
+    """
+    按输出文件后缀推断格式，无法推断时使用 CSV
+    """
+    if not path or path == '-':
+        return 'csv'
+    return _SUFFIX_FORMATS.get(os.path.splitext(path)[1].lower(), 'csv')
+
+
+class _CsvWriter:
+    def __init__(self, stream, columns: tuple):
+        self.columns = columns or DEFAULT_COLUMNS
+        self._writer = csv.writer(stream)
+        self._writer.writerow(self.columns)
+
+    def write_page(self, items_list: list):
+        columns = self.columns
+        self._writer.writerows([item.get(column) for column in columns] for item in items_list)
+
+    def close(self):
+        pass
+
+
+class _JsonLinesWriter:
+    def __init__(self, stream, columns: tuple):
+        # 未指定列时输出完整明细
+        self.columns = columns
+        self._stream = stream
+
+    def write_page(self, items_list: list):
+        columns = self.columns
+        if columns:
+            items_list = ({column: item.get(column) for column in columns} for item in items_list)
+        self._stream.write(''.join(json.dumps(item, ensure_ascii=False) + '\n' for item in items_list))
+
+    def close(self):
+        pass
+
+
+class _ParquetWriter:
+    def __init__(self, path: str, columns: tuple):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("导出 Parquet 需要安装 pyarrow: pip install aliyun_controller[parquet]") from None
+        self._pa = pyarrow
+        self.columns = columns or DEFAULT_COLUMNS
+        self.schema = pyarrow.schema([
+            (column, pyarrow.float64() if column in NUMERIC_COLUMNS else pyarrow.string())
+            for column in self.columns
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        self._buffer = {column: [] for column in self.columns}
+        self._buffered = 0
+
+    @staticmethod
+    def _convert(column: str, value):
+        if value is None or value == '':
+            return None
+        if column in NUMERIC_COLUMNS:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+        if isinstance(value, str):
+            return value
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False)
+        return str(value)
+
+    def write_page(self, items_list: list):
+        convert = self._convert
+        for column, values in self._buffer.items():
+            values.extend(convert(column, item.get(column)) for item in items_list)
+        self._buffered += len(items_list)
+        if self._buffered >= PARQUET_ROW_GROUP_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffered:
+            return
+        table = self._pa.Table.from_pydict(self._buffer, schema=self.schema)
+        self._writer.write_table(table)
+        self._buffer = {column: [] for column in self.columns}
+        self._buffered = 0
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def export_bill_pages(pages, output, export_format: str = None, columns: tuple = None, errors: dict = None) -> int:
+    """
+    将账单分页逐页写入 output（文件路径，或已打开的文本流；Parquet 只支持文件路径），返回导出的条数。
+    写入文件时先写临时文件，全部成功后才替换目标文件。
+    errors 为分页来源填写的 {类型: 异常}，分页读完后非空时视为导出不完整：
+    删除临时文件（不替换目标文件）并抛出 BillFetchError。
+    """
+    to_stream = hasattr(output, 'write')
+    export_format = export_format or ('csv' if to_stream else guess_format(output))
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {export_format}，可选: {', '.join(EXPORT_FORMATS)}")
+    if to_stream and export_format == 'parquet':
+        raise ValueError("Parquet 格式需要指定输出文件")
+
+    temp_path = None if to_stream else f"{output}.part"
+    stream = None
+    try:
+        if export_format == 'parquet':
+            writer = _ParquetWriter(temp_path, columns)
+        else:
+            stream = output if to_stream else open(temp_path, "w", encoding="utf-8", newline="")
+            writer = (_CsvWriter if export_format == 'csv' else _JsonLinesWriter)(stream, columns)
+
+        count = 0
+        for items_list in pages:
+            writer.write_page(items_list)
+            count += len(items_list)
+        writer.close()
+        if errors:
+            from aliyun_controller.modules.billing import BillFetchError
+            target = "标准输出" if to_stream else output
+            raise BillFetchError(
+                f"[{', '.join(errors)}] 类型账单获取失败，导出到 {target} 的内容不完整", errors
+            )
+        if to_stream:
+            output.flush()
+        else:
+            if stream is not None:
+                stream.close()
+            os.replace(temp_path, output)
+            temp_path = None
+        return count
+    finally:
+        if stream is not None and not to_stream:
+            stream.close()
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,183 @@
+"""
+账单报表引擎：同一会话内每个账单周期只拉取一次明细（保存为列式存储），
+所有已注册的报表都从这份数据计算，查看流量后再看消费归纳无需重新下载账单。
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from aliyun_controller import profiling
+from aliyun_controller.cache import is_fresh_cycle
+
+# 会话内最多保留的账单周期数，超过时淘汰最久未使用的周期
+SESSION_MAX_CYCLES = 6
+
+# 报表名称 -> (需要的维度列, reducer(store, querier) -> 结果)
+_REPORTS = OrderedDict()
+
+
+def register_report(name: str, reducer, dimensions: tuple = ()):
+    """
+    注册报表。reducer 接收列式账单存储和查询器并返回报表结果；
+    dimensions 为报表需要额外编码的分组字段（见 bill_store.DIMENSION_FIELDS）。
+    """
+    _REPORTS[name] = (tuple(dimensions), reducer)
+
+
+def registered_reports() -> tuple:
+    return tuple(_REPORTS)
+
+
+def _traffic_report(store, querier) -> float:
+    from aliyun_controller.modules.billing import _traffic_bytes
+    return _traffic_bytes(querier, store)
+
+
+def _summary_report(store, querier) -> dict:
+    from aliyun_controller.modules.billing import _summarize_store
+    return _summarize_store(store)
+
+
+register_report('item_count', lambda store, querier: len(store))
+register_report('traffic', _traffic_report)
+register_report('summary', _summary_report)
+
+
+class BillSession:
+    """
+    会话级账单数据缓存。同一周期并发请求时只有一个线程拉取，其余线程等待其结果；
+    结算后拉取的历史周期在会话内一直有效，当月账单（以及结算前拉取的历史周期）OPEN_CYCLE_TTL 秒后重新拉取。
+    部分类型账单获取失败时的不完整数据只交给发起拉取的调用方（后台预取会直接丢弃），不会被缓存。
+    """
+
+    def __init__(self, querier=None, max_cycles: int = SESSION_MAX_CYCLES, profile: str = None):
+        self._querier = querier
+        self.profile = profile
+        self.max_cycles = max(1, max_cycles)
+        self._stores = OrderedDict()
+        # 周期 -> {报表名称: 结果}，与该周期当前缓存的存储对应
+        self._results = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @property
+    def querier(self):
+        if self._querier is None:
+            from aliyun_controller.modules.billing import AliCloudBssQuerier
+            self._querier = AliCloudBssQuerier(profile=self.profile)
+        return self._querier
+
+    def _is_fresh(self, billing_cycle: str, fetched_at: float) -> bool:
+        return is_fresh_cycle(billing_cycle, fetched_at)
+
+    def get_store(self, billing_cycle: str, refresh: bool = False):
+        """
+        获取账单周期的列式存储，必要时拉取；拉取失败的异常会抛给所有等待者，且不会被缓存。
+        部分类型失败时，不完整的存储只返回给发起拉取的线程，正在等待的线程和之后的请求重新拉取。
+        """
+        while True:
+            with self._lock:
+                cached = self._stores.get(billing_cycle)
+                if cached is not None and not refresh and self._is_fresh(billing_cycle, cached[0]):
+                    self._stores.move_to_end(billing_cycle)
+                    return cached[1]
+                waiter = self._inflight.get(billing_cycle)
+                if waiter is None:
+                    waiter = self._inflight[billing_cycle] = {"event": threading.Event(), "error": None}
+                    break
+            waiter["event"].wait()
+            if waiter["error"] is not None:
+                raise waiter["error"]
+            refresh = False
+
+        try:
+            from aliyun_controller.modules.billing import _build_store
+            started = time.time()
+            errors = {}
+            fetched = {}
+            # 保留压缩后的原始明细，之后的报表需要新的维度时可以补充编码
+            store = _build_store(
+                self.querier.iter_all_bill_pages(billing_cycle, errors=errors, fetched=fetched), keep_raw=True
+            )
+            # 数据来自本地缓存时按缓存自身的拉取时间计算有效期，以最早的一部分为准
+            fetched_at = min(fetched.values(), default=started)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[billing_cycle]
+            waiter["error"] = e
+            waiter["event"].set()
+            raise
+
+        if errors:
+            with self._lock:
+                del self._inflight[billing_cycle]
+            waiter["event"].set()
+            return store
+
+        with self._lock:
+            self._stores[billing_cycle] = (fetched_at, store)
+            self._stores.move_to_end(billing_cycle)
+            self._results[billing_cycle] = {}
+            while len(self._stores) > self.max_cycles:
+                evicted, _ = self._stores.popitem(last=False)
+                self._results.pop(evicted, None)
+            del self._inflight[billing_cycle]
+        waiter["event"].set()
+        return store
+
+    def run_reports(self, billing_cycle: str, names: tuple = None, refresh: bool = False) -> dict:
+        """
+        对同一份账单数据计算多个报表（默认全部已注册的报表），返回 {报表名称: 结果}。
+        已经算过的报表直接返回上次的结果，数据重新拉取后才会重新计算。
+        """
+        names = tuple(names or _REPORTS)
+        unknown = [name for name in names if name not in _REPORTS]
+        if unknown:
+            raise ValueError(f"未注册的报表: {', '.join(unknown)}")
+
+        store = self.get_store(billing_cycle, refresh=refresh)
+        dimensions = tuple(field for name in names for field in _REPORTS[name][0])
+        if dimensions:
+            store.add_dimensions(dimensions)
+
+        with self._lock:
+            entry = self._stores.get(billing_cycle)
+            # 存储已被淘汰或替换时不写回结果缓存
+            cached = self._results.get(billing_cycle, {}) if entry and entry[1] is store else {}
+        results = {}
+        for name in names:
+            if name in cached:
+                results[name] = cached[name]
+                continue
+            with profiling.phase(f"report.{name}"):
+                results[name] = _REPORTS[name][1](store, self.querier)
+            cached[name] = results[name]
+        return results
+
+    def invalidate(self, billing_cycle: str = None):
+        with self._lock:
+            if billing_cycle is None:
+                self._stores.clear()
+                self._results.clear()
+            else:
+                self._stores.pop(billing_cycle, None)
+                self._results.pop(billing_cycle, None)
+
+
+# 账号 -> 共享的账单会话
+_sessions = {}
+_session_lock = threading.Lock()
+
+
+def get_bill_session(profile: str = None) -> BillSession:
+    """
+    获取进程内共享的账单会话（每个账号一个）
+    """
+    from aliyun_controller.config import active_profile
+
+    profile = profile or active_profile()
+    with _session_lock:
+        session = _sessions.get(profile)
+        if session is None:
+            session = _sessions[profile] = BillSession(profile=profile)
+        return session
@@ -0,0 +1,199 @@
+"""
+账单明细的列式内存存储。
+
+聚合只会用到少数几个字段，因此每条明细只按列保存这些字段：
+字符串字段做字典编码（每种取值只保存一份，行内只存整数编号），
+金额和用量保存在 array('d') 中。其余字段按页保存压缩后的原始 JSON，
+只有在需要时才解码。
+"""
+import json
+import math
+import threading
+import zlib
+from array import array
+
+# 字典编码的字符串列：字段名 -> 缺失时的默认值
+DICT_FIELDS = {
+    'ProductCode': 'Unknown',
+    'ProductName': 'Unknown',
+    'BillingItemCode': '',
+    'UsageUnit': '',
+}
+# 可选的分组维度列，只在需要按这些字段分组时编码
+DIMENSION_FIELDS = ('Region', 'InstanceID', 'BillingItem', 'ResourceGroup', 'Tag', 'SubscriptionType')
+# 编码前需要规范化的字段
+_NORMALIZERS = {
+    'UsageUnit': lambda value: (value or '').upper(),
+}
+
+
+class _Dictionary:
+    """
+    字典编码：取值 <-> 从 0 开始的整数编号
+    """
+
+    __slots__ = ('values', 'index')
+
+    def __init__(self):
+        self.values = []
+        self.index = {}
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _to_float(value, default: float) -> float:
+    if not value and value != 0:
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class BillItemStore:
+    """
+    列式账单明细存储，逐页追加，追加后原始分页即可释放。
+    keep_raw=False 时不保留原始 JSON，只能访问列式字段；
+    dimensions 指定额外按列编码的字段（见 DIMENSION_FIELDS）。
+    """
+
+    def __init__(self, keep_raw: bool = True, dimensions: tuple = ()):
+        self.keep_raw = keep_raw
+        self.fields = dict(DICT_FIELDS)
+        for field in dimensions:
+            self.fields.setdefault(field, '')
+        self.dictionaries = {field: _Dictionary() for field in self.fields}
+        self.codes = {field: array('I') for field in self.fields}
+        # 金额缺失时按 0 处理；用量缺失或无法解析时记为 NaN
+        self.amounts = array('d')
+        self.usages = array('d')
+        self._raw_pages = []
+        self._page_starts = []
+        self._decoded_page = (None, None)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def append_page(self, items_list: list):
+        """
+        追加一页账单明细
+        """
+        if not items_list:
+            return
+        if self.keep_raw:
+            self._page_starts.append(len(self.amounts))
+            raw = json.dumps(items_list, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            self._raw_pages.append(zlib.compress(raw, 1))
+
+        self._encode(items_list, self.fields)
+
+        append_amount = self.amounts.append
+        append_usage = self.usages.append
+        for item in items_list:
+            append_amount(_to_float(item.get('PretaxAmount'), 0.0))
+            append_usage(_to_float(item.get('Usage'), math.nan))
+
+    def _encode(self, items_list: list, fields: dict, dictionaries: dict = None, codes: dict = None):
+        dictionaries = dictionaries or self.dictionaries
+        codes = codes or self.codes
+        for field, default in fields.items():
+            dictionary = dictionaries[field]
+            index, values = dictionary.index, dictionary.values
+            append = codes[field].append
+            normalize = _NORMALIZERS.get(field)
+            for item in items_list:
+                value = item.get(field, default)
+                if normalize is not None:
+                    value = normalize(value)
+                code = index.get(value)
+                if code is None:
+                    code = index[value] = len(values)
+                    values.append(value)
+                append(code)
+
+    def add_dimensions(self, dimensions: tuple):
+        """
+        为已有数据补充编码维度列，需要保留原始明细；已有的列不会重复编码
+        """
+        with self._lock:
+            missing = {field: '' for field in dimensions if field not in self.fields}
+            if not missing:
+                return
+            self._require_raw()
+            dictionaries = {field: _Dictionary() for field in missing}
+            codes = {field: array('I') for field in missing}
+            for page in self._raw_pages:
+                self._encode(json.loads(zlib.decompress(page)), missing, dictionaries, codes)
+            # 全部编码完成后才对外可见
+            self.dictionaries.update(dictionaries)
+            self.codes.update(codes)
+            self.fields.update(missing)
+
+    def extend_pages(self, pages):
+        for items_list in pages:
+            self.append_page(items_list)
+        return self
+
+    def values(self, field: str) -> list:
+        """
+        字典编码列的所有取值（下标即编号）
+        """
+        return self.dictionaries[field].values
+
+    def column(self, field: str) -> list:
+        """
+        按行返回任意字段的值；非列式字段需要解码原始分页
+        """
+        if field in self.fields:
+            values = self.dictionaries[field].values
+            return [values[code] for code in self.codes[field]]
+        if field == 'PretaxAmount':
+            return list(self.amounts)
+        return [item.get(field) for item in self.iter_items()]
+
+    def _page(self, page_no: int) -> list:
+        cached_no, cached_items = self._decoded_page
+        if cached_no != page_no:
+            cached_items = json.loads(zlib.decompress(self._raw_pages[page_no]))
+            self._decoded_page = (page_no, cached_items)
+        return cached_items
+
+    def _require_raw(self):
+        if not self.keep_raw:
+            raise ValueError("该账单存储未保留原始明细")
+
+    def item(self, row: int) -> dict:
+        """
+        解码并返回第 row 条明细的完整字段
+        """
+        self._require_raw()
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        # 二分查找所在分页
+        lo, hi = 0, len(self._page_starts) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self._page_starts[mid] <= row:
+                lo = mid
+            else:
+                hi = mid - 1
+        return self._page(lo)[row - self._page_starts[lo]]
+
+    def iter_items(self):
+        """
+        按顺序逐页解码所有明细
+        """
+        self._require_raw()
+        for page in self._raw_pages:
+            yield from json.loads(zlib.decompress(page))
+
+    def nbytes(self) -> int:
+        """
+        列和压缩原始分页占用的字节数（不含字典中的字符串）
+        """
+        size = sum(column.itemsize * len(column) for column in self.codes.values())
+        size += self.amounts.itemsize * len(self.amounts) + self.usages.itemsize * len(self.usages)
+        return size + sum(len(page) for page in self._raw_pages)
+
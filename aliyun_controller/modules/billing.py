@@ -1,68 +1,393 @@
-from alibabacloud_bssopenapi20171214.client import Client as BssOpenApi20171214Client
-from alibabacloud_bssopenapi20171214.models import DescribeInstanceBillRequest
-from alibabacloud_tea_openapi import models as open_api_models
-from aliyun_controller.config import load_config
+import calendar
+import datetime
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from aliyun_controller.cache import (
+    OPEN_CYCLE_TTL,
+    BillCache,
+    BillDayStore,
+    cache_refresh_requested,
+    daily_sync_requested,
+    is_closed_cycle,
+    is_fresh_cycle,
+    is_settled_day,
+    profile_cache_path,
+)
+from aliyun_controller.config import active_profile
+from aliyun_controller.console import propagate
+from aliyun_controller.clients import get_bss_client
+from aliyun_controller import profiling
+from aliyun_controller.ratelimit import call_api
+from aliyun_controller.modules.bill_aggregate import aggregate, pivot, required_fields, parse_group_keys
+from aliyun_controller.modules.bill_store import BillItemStore
+from aliyun_controller.modules.bill_reports import get_bill_session
+
+# 需要查询的付费类型，每种类型是一条独立的 NextToken 分页链
+SUBSCRIPTION_TYPES = ('PayAsYouGo', 'Subscription')
+# 并发查询分页链的最大线程数
+BILL_FETCH_WORKERS = 4
+# 多月份对比时同时查询的最大月份数
+RANGE_FETCH_WORKERS = 3
+# 按日同步时同时拉取的日期分区数
+DAILY_SYNC_WORKERS = 4
+# 流式拉取时在内存中排队等待处理的最大分页数
+BILL_PAGE_BUFFER = 2
+# 流出流量对应的计费项代码
+TRAFFIC_ITEMS_CODES = (
+    "ECS_Out_Bytes",
+    "IPv6_Out_Bytes",
+    "Eip_Out_Bytes",
+    "Cdn_domestic_flow",
+    "Cdn_overseas_flow",
+    "OSS_Out_Traffic",
+)
+
+# 分页链结束标记
+_CHAIN_DONE = object()
+
+
+class BillFetchError(Exception):
+    """
+    账单明细获取失败
+    """
+
+    def __init__(self, message: str, errors: dict = None):
+        super().__init__(message)
+        self.errors = errors or {}
+
+
+def parse_billing_cycle(value: str) -> str:
+    """
+    校验并规范化账单周期，支持 YYYY-MM 和 YYYY-M 格式
+    """
+    if not isinstance(value, str) or not re.match(r"^\d{4}-(0?[1-9]|1[0-2])$", value.strip()):
+        raise ValueError(f"账单周期格式错误: {value}，请使用 YYYY-MM 或 YYYY-M 格式")
+    year, month = value.strip().split('-')
+    return f"{year}-{int(month):02d}"
+
+def iter_billing_cycles(start_cycle: str, end_cycle: str) -> list:
+    """
+    列出起止月份（含）之间的所有账单周期
+    """
+    year, month = map(int, parse_billing_cycle(start_cycle).split('-'))
+    end_year, end_month = map(int, parse_billing_cycle(end_cycle).split('-'))
+    cycles = []
+    while (year, month) <= (end_year, end_month):
+        cycles.append(f"{year}-{month:02d}")
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return cycles
+
+
+def _cycle_dates(billing_cycle: str) -> list:
+    """
+    账单周期内截至今天的所有日期 (YYYY-MM-DD)
+    """
+    year, month = map(int, billing_cycle.split('-'))
+    today = datetime.date.today()
+    last_day = calendar.monthrange(year, month)[1]
+    if (year, month) == (today.year, today.month):
+        last_day = today.day
+    elif (year, month) > (today.year, today.month):
+        return []
+    return [f"{billing_cycle}-{day:02d}" for day in range(1, last_day + 1)]
 
 class AliCloudBssQuerier:
-    def __init__(self):
+    def __init__(self, client=None, profile: str = None):
         """
-        初始化客户端
+        初始化客户端，默认使用进程内共享的 BSS 客户端；profile 指定账号（默认为当前账号），
+        各账号使用各自的客户端、本地缓存和限速器
         """
-        config = load_config()
-        self.client = BssOpenApi20171214Client(
-            open_api_models.Config(
-                access_key_id=config['access_key_id'],
-                access_key_secret=config['access_key_secret'],
-                region_id="cn-hangzhou",
-            )
-        )
+        self.profile = profile or active_profile()
+        self.client = client or get_bss_client(self.profile)
+        cache_path = profile_cache_path(self.profile)
+        self.cache = BillCache(cache_path)
+        self.day_store = BillDayStore(cache_path)
 
     def fetch_bill_details(self, billing_cycle: str, subscription_type: str) -> list:
         """
         根据指定的账单类型，分页获取所有账单明细。
+        已出账月份直接读取本地缓存，当月账单缓存短时间有效。
         """
-        all_items = []
-        next_token = None
         try:
-            while True:
-                request = DescribeInstanceBillRequest(
-                    billing_cycle=billing_cycle,
-                    subscription_type=subscription_type,
-                    is_billing_item=True,
-                    max_results=300
-                )
-                if next_token:
-                    request.next_token = next_token
-
-                response = self.client.describe_instance_bill(request)
-                
-                response_dict = response.body.to_map()
-                data = response_dict.get('Data', {})
-                if not data:
-                    break
-                
-                items_list = data.get('Items', [])
-                all_items.extend(items_list)
-                
-                next_token = data.get('NextToken')
-                if not next_token:
-                    break
-            
-            return all_items
-
+            return self._fetch_bill_items(billing_cycle, subscription_type)
         except Exception as e:
             print(f"\n查询 [{subscription_type}] 类型账单时出错: {e}")
             return []
 
+    def _fetch_bill_items(self, billing_cycle: str, subscription_type: str) -> list:
+        """
+        获取指定类型的账单明细，接口出错时直接抛出异常
+        """
+        return [
+            item
+            for items_list in self.iter_bill_pages(billing_cycle, subscription_type)
+            for item in items_list
+        ]
+
+    def iter_bill_pages(self, billing_cycle: str, subscription_type: str, fetched: dict = None):
+        """
+        逐页产出指定类型的账单明细，接口出错时直接抛出异常。
+        在线拉取的分页会同时写入本地缓存，完整拉取后才生效。
+        传入 fetched 时写入 {类型: 数据的拉取时间}：读取本地缓存时为缓存的拉取时间，否则为开始拉取的时间。
+        """
+        if not cache_refresh_requested():
+            try:
+                cached_at = self.cache.fetched_at(billing_cycle, subscription_type)
+            except Exception as e:
+                print(f"\n读取账单缓存失败，改为在线查询: {e}")
+                cached_at = None
+            if cached_at is not None and is_fresh_cycle(billing_cycle, cached_at):
+                if fetched is not None:
+                    fetched[subscription_type] = cached_at
+                yield from self.cache.iter_pages(billing_cycle, subscription_type)
+                return
+
+        if fetched is not None:
+            fetched[subscription_type] = time.time()
+        writer = self.cache.page_writer(billing_cycle, subscription_type)
+        completed = False
+        try:
+            for items_list in self._iter_remote_pages(billing_cycle, subscription_type):
+                if writer is not None:
+                    try:
+                        writer.append(items_list)
+                    except Exception as e:
+                        print(f"\n写入账单缓存失败: {e}")
+                        writer = None
+                yield items_list
+            completed = True
+        finally:
+            if writer is not None:
+                try:
+                    if completed:
+                        writer.commit()
+                    else:
+                        writer.discard()
+                except Exception as e:
+                    print(f"\n写入账单缓存失败: {e}")
+
+    def _iter_remote_pages(self, billing_cycle: str, subscription_type: str, billing_date: str = None):
+        """
+        沿 NextToken 分页链在线拉取账单明细；指定 billing_date 时按日粒度只查询该日
+        """
+        from alibabacloud_bssopenapi20171214.models import DescribeInstanceBillRequest
+
+        next_token = None
+        while True:
+            request = DescribeInstanceBillRequest(
+                billing_cycle=billing_cycle,
+                subscription_type=subscription_type,
+                is_billing_item=True,
+                max_results=300
+            )
+            if billing_date:
+                request.granularity = 'DAILY'
+                request.billing_date = billing_date
+            if next_token:
+                request.next_token = next_token
+
+            response = call_api('describe_instance_bill', self.client.describe_instance_bill, request, scope=self.profile)
+
+            with profiling.phase('bill.to_map'):
+                response_dict = response.body.to_map()
+            data = response_dict.get('Data', {})
+            if not data:
+                break
+
+            items_list = data.get('Items', [])
+            profiling.record_items('describe_instance_bill', len(items_list))
+            yield items_list
+
+            next_token = data.get('NextToken')
+            if not next_token:
+                break
+
+    def sync_daily_bills(self, billing_cycle: str) -> dict:
+        """
+        按日增量同步账单周期（截至今天）的明细到本地分区：已是最终结果的日期直接复用，
+        仍可能变化的日期（最近 BILL_DAY_SETTLE_DAYS 天）超过 OPEN_CYCLE_TTL 或使用 --refresh 时重新拉取。
+        返回 {'fetched': 拉取的分区数, 'reused': 复用的分区数, 'failed': {(日期, 类型): 异常}}
+        """
+        billing_dates = _cycle_dates(billing_cycle)
+        try:
+            meta = self.day_store.load_meta(billing_cycle)
+        except Exception as e:
+            print(f"\n读取账单缓存失败，改为全部重新拉取: {e}")
+            meta = {}
+
+        now = time.time()
+        refresh = cache_refresh_requested()
+        stale = []
+        for billing_date in billing_dates:
+            for subscription_type in SUBSCRIPTION_TYPES:
+                fetched_at = meta.get((billing_date, subscription_type))
+                if fetched_at is not None and (
+                    is_settled_day(billing_date, fetched_at) or (not refresh and now - fetched_at < OPEN_CYCLE_TTL)
+                ):
+                    continue
+                stale.append((billing_date, subscription_type))
+
+        def fetch_day(billing_date: str, subscription_type: str):
+            fetched_at = time.time()
+            items = [
+                item
+                for items_list in self._iter_remote_pages(billing_cycle, subscription_type, billing_date)
+                for item in items_list
+            ]
+            self.day_store.save_day(billing_date, subscription_type, items, fetched_at)
+
+        failed = {}
+        if stale:
+            with ThreadPoolExecutor(max_workers=max(1, min(DAILY_SYNC_WORKERS, len(stale)))) as executor:
+                run = propagate(fetch_day)
+                futures = {partition: executor.submit(run, *partition) for partition in stale}
+            for partition, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    failed[partition] = e
+        return {
+            'fetched': len(stale) - len(failed),
+            'reused': len(billing_dates) * len(SUBSCRIPTION_TYPES) - len(stale),
+            'failed': failed,
+        }
+
+    def iter_synced_bill_pages(self, billing_cycle: str, errors: dict = None, fetched: dict = None):
+        """
+        按日增量同步后，逐个分区产出账单周期的明细。部分日期同步失败时使用本地已有数据并给出警告，
+        同时把 {"日期 类型": 异常} 写入 errors（如果传入）；全部失败时抛出 BillFetchError。
+        传入 fetched 时写入仍可能变化的分区的 {"日期 类型": 拉取时间}。
+        """
+        stats = self.sync_daily_bills(billing_cycle)
+        failed = stats['failed']
+        if failed:
+            for (billing_date, subscription_type), error in list(failed.items())[:3]:
+                print(f"\n同步 {billing_date} [{subscription_type}] 账单时出错: {error}")
+            if not stats['fetched'] and not stats['reused']:
+                raise BillFetchError(f"账单周期 {billing_cycle} 的按日账单均同步失败", {
+                    f"{billing_date} {subscription_type}": error
+                    for (billing_date, subscription_type), error in failed.items()
+                })
+            print(f"警告: {len(failed)} 个日期分区同步失败，以下结果可能不完整。")
+            if errors is not None:
+                errors.update({
+                    f"{billing_date} {subscription_type}": error
+                    for (billing_date, subscription_type), error in failed.items()
+                })
+        if fetched is not None:
+            try:
+                meta = self.day_store.load_meta(billing_cycle)
+            except Exception as e:
+                print(f"\n读取账单缓存失败: {e}")
+                meta = {}
+            fetched.update({
+                f"{billing_date} {subscription_type}": fetched_at
+                for (billing_date, subscription_type), fetched_at in meta.items()
+                if not is_settled_day(billing_date, fetched_at)
+            })
+        yield from self.day_store.iter_days(billing_cycle)
+
+    def iter_all_bill_pages(self, billing_cycle: str, errors: dict = None, fetched: dict = None):
+        """
+        并发拉取所有类型的账单分页，按到达顺序逐页产出，内存中只保留少量待处理分页。
+        部分类型失败时给出警告并把 {类型: 异常} 写入 errors（如果传入），全部失败时抛出 BillFetchError。
+        传入 fetched 时写入各部分数据的拉取时间（见 iter_bill_pages），调用方据此计算整体数据的有效期。
+        使用 --daily-sync 时，当月账单改为按日增量同步，每个日期分区作为一页产出。
+        """
+        if daily_sync_requested() and not is_closed_cycle(billing_cycle):
+            yield from self.iter_synced_bill_pages(billing_cycle, errors=errors, fetched=fetched)
+            return
+
+        pages = queue.Queue(maxsize=BILL_PAGE_BUFFER)
+        stop = threading.Event()
+
+        def put(entry) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce(subscription_type: str):
+            chain = self.iter_bill_pages(billing_cycle, subscription_type, fetched=fetched)
+            try:
+                for items_list in chain:
+                    if not put((subscription_type, items_list, None)):
+                        return
+                put((subscription_type, _CHAIN_DONE, None))
+            except Exception as e:
+                put((subscription_type, _CHAIN_DONE, e))
+            finally:
+                chain.close()
+
+        workers = max(1, min(BILL_FETCH_WORKERS, len(SUBSCRIPTION_TYPES)))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            run = propagate(produce)
+            for subscription_type in SUBSCRIPTION_TYPES:
+                executor.submit(run, subscription_type)
+
+            errors = {} if errors is None else errors
+            remaining = len(SUBSCRIPTION_TYPES)
+            while remaining:
+                subscription_type, items_list, error = pages.get()
+                if items_list is not _CHAIN_DONE:
+                    yield items_list
+                    continue
+                remaining -= 1
+                if error is not None:
+                    print(f"\n查询 [{subscription_type}] 类型账单时出错: {error}")
+                    errors[subscription_type] = error
+        finally:
+            stop.set()
+            executor.shutdown(wait=True)
+
+        if errors and len(errors) == len(SUBSCRIPTION_TYPES):
+            raise BillFetchError(f"账单周期 {billing_cycle} 的所有类型账单均获取失败", errors)
+        if errors:
+            print(f"警告: [{', '.join(errors)}] 类型账单获取失败，以下结果不完整。")
+
     def fetch_all_bill_details(self, billing_cycle: str) -> list:
         """
-        获取所有类型的账单明细（PayAsYouGo + Subscription）
+        并发获取所有类型的账单明细（PayAsYouGo + Subscription），结果按类型顺序合并。
+        部分类型失败时给出警告并返回其余结果，全部失败时抛出 BillFetchError。
         """
+        workers = max(1, min(BILL_FETCH_WORKERS, len(SUBSCRIPTION_TYPES)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(propagate(self._fetch_bill_items), billing_cycle, subscription_type)
+                for subscription_type in SUBSCRIPTION_TYPES
+            ]
+
         all_items = []
-        all_items.extend(self.fetch_bill_details(billing_cycle, 'PayAsYouGo'))
-        all_items.extend(self.fetch_bill_details(billing_cycle, 'Subscription'))
+        errors = {}
+        for subscription_type, future in zip(SUBSCRIPTION_TYPES, futures):
+            try:
+                all_items.extend(future.result())
+            except Exception as e:
+                print(f"\n查询 [{subscription_type}] 类型账单时出错: {e}")
+                errors[subscription_type] = e
+
+        if errors and len(errors) == len(SUBSCRIPTION_TYPES):
+            raise BillFetchError(f"账单周期 {billing_cycle} 的所有类型账单均获取失败", errors)
+        if errors:
+            print(f"警告: [{', '.join(errors)}] 类型账单获取失败，以下结果不完整。")
         return all_items
 
+    def fetch_bill_store(self, billing_cycle: str, keep_raw: bool = True) -> BillItemStore:
+        """
+        流式获取所有类型的账单明细并保存为列式存储，内存占用远小于明细字典列表。
+        keep_raw=True 时保留压缩后的原始分页，可按需解码其余字段。
+        """
+        return _build_store(self.iter_all_bill_pages(billing_cycle), keep_raw=keep_raw)
+
     def convert_usage_to_bytes(self, usage: float, unit: str) -> float:
         """
         将用量转换为字节
@@ -77,49 +402,195 @@ class AliCloudBssQuerier:
         else:
             return usage
 
+def _build_store(pages, keep_raw: bool = False, dimensions: tuple = ()) -> BillItemStore:
+    """
+    将分页逐页追加到列式存储中，追加后原始分页即可释放
+    """
+    store = BillItemStore(keep_raw=keep_raw, dimensions=dimensions)
+    for items_list in pages:
+        # 逐页计时，不包含等待分页到达的时间
+        with profiling.phase('bill.encode'):
+            store.append_page(items_list)
+    return store
+
+def _traffic_bytes(querier: AliCloudBssQuerier, store: BillItemStore) -> float:
+    """
+    在列式存储上累计流出流量（字节）
+    """
+    item_index = store.dictionaries['BillingItemCode'].index
+    traffic_codes = {item_index[code] for code in TRAFFIC_ITEMS_CODES if code in item_index}
+    if not traffic_codes:
+        return 0.0
+    # 每种单位只计算一次换算系数
+    multipliers = [querier.convert_usage_to_bytes(1.0, unit) for unit in store.values('UsageUnit')]
+    total_usage_bytes = 0.0
+    for item_code, unit_code, usage in zip(store.codes['BillingItemCode'], store.codes['UsageUnit'], store.usages):
+        # 用量缺失或无法解析时为 NaN，不会通过 usage > 0
+        if item_code in traffic_codes and usage > 0:
+            total_usage_bytes += usage * multipliers[unit_code]
+    return total_usage_bytes
+
+def _summarize_store(store: BillItemStore) -> dict:
+    """
+    在列式存储上按产品代码归纳金额（即 product_summary 预设分组）
+    """
+    result = aggregate(store, 'product_summary')
+    return {
+        row['product']: {'product_name': row['product_name'], 'total_amount': row['total_amount'], 'count': row['count']}
+        for row in result.rows
+    }
+
+def _accumulate_traffic(querier: AliCloudBssQuerier, pages) -> tuple:
+    """
+    逐页累计流出流量，返回 (总字节数, 账单条数)
+    """
+    store = _build_store(pages)
+    with profiling.phase('aggregate.traffic'):
+        return _traffic_bytes(querier, store), len(store)
+
+def _accumulate_summary(pages) -> tuple:
+    """
+    逐页按产品代码归纳金额，返回 (归纳结果, 账单条数)
+    """
+    store = _build_store(pages)
+    with profiling.phase('aggregate.summary'):
+        return _summarize_store(store), len(store)
+
+def compute_outbound_traffic(billing_cycle: str, querier: AliCloudBssQuerier = None, errors: dict = None) -> tuple:
+    """
+    计算账单周期的总流出流量，返回 (总字节数, 账单条数)。
+    部分类型账单获取失败时把 {类型: 异常} 写入 errors（如果传入），此时结果不完整
+    """
+    querier = querier or AliCloudBssQuerier()
+    return _accumulate_traffic(querier, querier.iter_all_bill_pages(billing_cycle, errors=errors))
+
+def compute_billing_summary(billing_cycle: str, querier: AliCloudBssQuerier = None, errors: dict = None) -> tuple:
+    """
+    按产品代码归纳账单周期的消费，返回 (归纳结果, 账单条数)。
+    部分类型账单获取失败时把 {类型: 异常} 写入 errors（如果传入），此时结果不完整
+    """
+    querier = querier or AliCloudBssQuerier()
+    return _accumulate_summary(querier.iter_all_bill_pages(billing_cycle, errors=errors))
+
+def compute_bill_breakdown(billing_cycle: str, group_by, querier: AliCloudBssQuerier = None, errors: dict = None):
+    """
+    按任意维度组合（product/region/instance/item/resource_group/tag/subscription）聚合账单周期的消费，
+    返回 AggregateResult。部分类型账单获取失败时把 {类型: 异常} 写入 errors（如果传入）
+    """
+    group_keys = parse_group_keys(group_by)
+    querier = querier or AliCloudBssQuerier()
+    store = _build_store(querier.iter_all_bill_pages(billing_cycle, errors=errors),
+                         dimensions=required_fields(group_keys))
+    with profiling.phase('aggregate.breakdown'):
+        return aggregate(store, group_keys)
+
+def export_bill_details(billing_cycle: str, output, export_format: str = None, columns: tuple = None,
+                        querier: AliCloudBssQuerier = None) -> int:
+    """
+    流式导出账单周期的所有明细：分页到达后立即写出，不在内存中累积，返回导出条数。
+    部分类型账单获取失败时不写出目标文件，抛出 BillFetchError
+    """
+    from aliyun_controller.modules.bill_export import export_bill_pages
+
+    querier = querier or AliCloudBssQuerier()
+    errors = {}
+    return export_bill_pages(querier.iter_all_bill_pages(billing_cycle, errors=errors), output, export_format, columns,
+                             errors=errors)
+
+def print_traffic_report(billing_cycle: str, total_usage_bytes: float):
+    """
+    输出总流出流量
+    """
+    total_traffic_gb = total_usage_bytes / (1024 * 1024 * 1024)
+    print("\n" + "="*45)
+    print(f"账单周期 {billing_cycle} 的总公网流出流量: {total_traffic_gb:.4f} GB")
+    print("="*45)
+
+def print_billing_summary(billing_cycle: str, summary: dict):
+    """
+    以表格形式输出消费归纳
+    """
+    # 按金额从大到小排序
+    sorted_summary = sorted(summary.items(), key=lambda x: x[1]['total_amount'], reverse=True)
+
+    print("\n" + "="*70)
+    print(f"账单周期 {billing_cycle} 消费归纳".center(70))
+    print("="*70)
+    print(f"{'产品名称':<25} {'产品代码':<15} {'账单条数':<10} {'总金额 (元)':<15}")
+    print("-"*70)
+    
+    total_amount = 0.0
+    for product_code, data in sorted_summary:
+        total_amount += data['total_amount']
+        product_name = data['product_name'][:24]  # 截断过长的产品名称
+        print(f"{product_name:<25} {product_code:<15} {data['count']:<10} {data['total_amount']:<15.2f}")
+
+    print("-"*70)
+    print(f"总计: {total_amount:.2f} 元".rjust(70))
+    print("="*70)
+
+def _group_label(row: dict, key: str) -> str:
+    name = row.get(f"{key}_name")
+    value = row[key] or '-'
+    return f"{name}({value})" if name and name != value else str(value)
+
+def print_bill_breakdown(billing_cycle: str, result, pivot_key: str = None, top: int = None):
+    """
+    以表格形式输出多维聚合结果；指定 pivot_key 时该维度展开为列
+    """
+    if pivot_key:
+        columns, rows = pivot(result, pivot_key)
+        row_keys = [key for key in result.group_keys if key != pivot_key]
+        columns = columns[:top] if top else columns
+        width = 30 + 14 * (len(columns) + 1)
+        print("\n" + "="*width)
+        print(f"账单周期 {billing_cycle} 按 {'/'.join(row_keys) or '-'} x {pivot_key} 透视".center(width))
+        print("="*width)
+        print(f"{'/'.join(row_keys) or '合计':<30}" + "".join(f"{str(column)[:13] or '-':>14}" for column in columns) + f"{'合计':>14}")
+        print("-"*width)
+        for row_value, cells, row_total in (rows[:top] if top else rows):
+            label = " / ".join(str(value) or '-' for value in row_value) or '合计'
+            print(f"{label[:29]:<30}" + "".join(f"{cells.get(column, 0.0):>14.2f}" for column in columns) + f"{row_total:>14.2f}")
+        print("-"*width)
+        print(f"总计: {result.total_amount:.2f} 元".rjust(width))
+        print("="*width)
+        return
+
+    print("\n" + "="*90)
+    print(f"账单周期 {billing_cycle} 按 {'/'.join(result.group_keys)} 归纳".center(90))
+    print("="*90)
+    print(f"{' / '.join(result.group_keys):<60} {'账单条数':<10} {'总金额 (元)':<15}")
+    print("-"*90)
+    for row in (result.rows[:top] if top else result.rows):
+        label = " / ".join(_group_label(row, key) for key in result.group_keys)
+        print(f"{label[:59]:<60} {row['count']:<10} {row['total_amount']:<15.2f}")
+    if top and len(result.rows) > top:
+        print(f"... 其余 {len(result.rows) - top} 组未显示")
+    print("-"*90)
+    print(f"总计: {result.total_amount:.2f} 元".rjust(90))
+    print("="*90)
+
 def get_outbound_traffic_module(billing_cycle: str):
     """
     流量查询模块
     """
     try:
-        querier = AliCloudBssQuerier()
-        total_usage_bytes = 0.0
-
-        TRAFFIC_ITEMS_CODES = [
-            "ECS_Out_Bytes",
-            "IPv6_Out_Bytes",
-            "Eip_Out_Bytes",
-            "Cdn_domestic_flow",
-            "Cdn_overseas_flow",
-            "OSS_Out_Traffic",
-        ]
-
         print(f"\n正在查询账单周期 {billing_cycle} 的账单明细...")
-        
-        all_items = querier.fetch_all_bill_details(billing_cycle)
-        
-        if not all_items:
+
+        # 同时计算消费归纳，之后查看同一周期的归纳时直接读取会话中的数据
+        reports = get_bill_session().run_reports(billing_cycle, ('item_count', 'traffic', 'summary'))
+        total_usage_bytes, item_count = reports['traffic'], reports['item_count']
+
+        if not item_count:
             print("未发现任何账单明细。")
             return
 
-        print("账单明细获取成功，开始计算总流量...")
-        for item in all_items:
-            if item.get('BillingItemCode') in TRAFFIC_ITEMS_CODES:
-                usage_str = item.get('Usage')
-                unit = (item.get('UsageUnit') or '').upper()
-                if usage_str:
-                    try:
-                        usage = float(usage_str)
-                        if usage > 0:
-                            usage_bytes = querier.convert_usage_to_bytes(usage, unit)
-                            total_usage_bytes += usage_bytes
-                    except ValueError:
-                        continue
-        
-        total_traffic_gb = total_usage_bytes / (1024 * 1024 * 1024)
-        print("\n" + "="*45)
-        print(f"账单周期 {billing_cycle} 的总公网流出流量: {total_traffic_gb:.4f} GB")
-        print("="*45)
+        print(f"共处理 {item_count} 条账单明细。")
+        with profiling.phase('render.traffic'):
+            print_traffic_report(billing_cycle, total_usage_bytes)
+    except BillFetchError as e:
+        print(f"\n{e}")
+        return
     except KeyboardInterrupt:
         print("\n操作被取消，返回上级菜单。")
         return
@@ -129,44 +600,108 @@ def summarize_billing_module(billing_cycle: str):
     当月完整账单归纳模块
     """
     try:
-        querier = AliCloudBssQuerier()
-        summary = {}
-
         print(f"\n正在获取账单周期 {billing_cycle} 的所有账单明细...")
-        all_items = querier.fetch_all_bill_details(billing_cycle)
+        reports = get_bill_session().run_reports(billing_cycle, ('item_count', 'traffic', 'summary'))
+        summary, item_count = reports['summary'], reports['item_count']
+
+        if not item_count:
+            print("未发现任何账单明细。")
+            return
+
+        with profiling.phase('render.summary'):
+            print_billing_summary(billing_cycle, summary)
+    except BillFetchError as e:
+        print(f"\n{e}")
+        return
+    except KeyboardInterrupt:
+        print("\n操作被取消，返回上级菜单。")
+        return
+
+def _format_change(current: float, previous: float) -> tuple:
+    """
+    计算环比变化，返回 (变化金额文本, 变化百分比文本)
+    """
+    if previous is None:
+        return "-", "-"
+    delta = current - previous
+    percent = f"{delta / previous * 100:+.1f}%" if previous else "-"
+    return f"{delta:+.2f}", percent
+
+def range_billing_module(start_cycle: str, end_cycle: str):
+    """
+    多月份账单对比模块：并发查询各月份，按产品输出每月金额及环比变化
+    """
+    try:
+        cycles = iter_billing_cycles(start_cycle, end_cycle)
+        if not cycles:
+            print("起始月份不能晚于结束月份。")
+            return
+
+        session = get_bill_session()
+        print(f"\n正在并发获取 {cycles[0]} 至 {cycles[-1]} 共 {len(cycles)} 个月的账单明细...")
+
+        def summarize_cycle(billing_cycle: str) -> dict:
+            return session.run_reports(billing_cycle, ('summary',))['summary']
 
-        if not all_items:
+        summaries = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(RANGE_FETCH_WORKERS, len(cycles)))) as executor:
+            run = propagate(summarize_cycle)
+            futures = {cycle: executor.submit(run, cycle) for cycle in cycles}
+        for cycle, future in futures.items():
+            try:
+                summaries[cycle] = future.result()
+            except Exception as e:
+                print(f"\n账单周期 {cycle} 查询失败: {e}")
+
+        if not any(summaries.values()):
             print("未发现任何账单明细。")
             return
 
-        for item in all_items:
-            product_code = item.get('ProductCode', 'Unknown')
-            product_name = item.get('ProductName', 'Unknown')
-            amount = float(item.get('PretaxAmount', 0.0))
-            if product_code not in summary:
-                summary[product_code] = {'product_name': product_name, 'total_amount': 0.0, 'count': 0}
-            summary[product_code]['product_name'] = product_name  # 更新产品名称（同一产品代码可能有多个名称，取最后一个）
-            summary[product_code]['total_amount'] += amount
-            summary[product_code]['count'] += 1
-
-        # 按金额从大到小排序
-        sorted_summary = sorted(summary.items(), key=lambda x: x[1]['total_amount'], reverse=True)
-
-        print("\n" + "="*70)
-        print(f"账单周期 {billing_cycle} 消费归纳".center(70))
-        print("="*70)
-        print(f"{'产品名称':<25} {'产品代码':<15} {'账单条数':<10} {'总金额 (元)':<15}")
-        print("-"*70)
-        
-        total_amount = 0.0
-        for product_code, data in sorted_summary:
-            total_amount += data['total_amount']
-            product_name = data['product_name'][:24]  # 截断过长的产品名称
-            print(f"{product_name:<25} {product_code:<15} {data['count']:<10} {data['total_amount']:<15.2f}")
-
-        print("-"*70)
-        print(f"总计: {total_amount:.2f} 元".rjust(70))
-        print("="*70)
+        # 产品按区间内总金额从大到小排序
+        product_names = {}
+        product_totals = {}
+        for summary in summaries.values():
+            for product_code, data in summary.items():
+                product_names[product_code] = data['product_name']
+                product_totals[product_code] = product_totals.get(product_code, 0.0) + data['total_amount']
+        sorted_products = sorted(product_totals, key=lambda code: product_totals[code], reverse=True)
+
+        print("\n" + "="*90)
+        print(f"账单周期 {cycles[0]} 至 {cycles[-1]} 消费对比".center(90))
+        print("="*90)
+        print(f"{'产品名称':<25} {'产品代码':<15} {'月份':<10} {'金额 (元)':<15} {'环比变化':<12} {'环比':<10}")
+        print("-"*90)
+
+        def print_rows(name: str, code: str, amounts: dict):
+            previous = None
+            for cycle in cycles:
+                if cycle not in summaries:
+                    print(f"{name:<25} {code:<15} {cycle:<10} {'查询失败':<15}")
+                    previous = None
+                    continue
+                amount = amounts.get(cycle, 0.0)
+                delta, percent = _format_change(amount, previous)
+                print(f"{name:<25} {code:<15} {cycle:<10} {amount:<15.2f} {delta:<12} {percent:<10}")
+                previous = amount
+
+        for product_code in sorted_products:
+            amounts = {
+                cycle: summary[product_code]['total_amount']
+                for cycle, summary in summaries.items()
+                if product_code in summary
+            }
+            print_rows(product_names[product_code][:24], product_code, amounts)
+            print("-"*90)
+
+        totals = {
+            cycle: sum(data['total_amount'] for data in summary.values())
+            for cycle, summary in summaries.items()
+        }
+        print_rows("总计", "", totals)
+        print("="*90)
+    except ValueError as e:
+        print(f"\n{e}")
+        return
     except KeyboardInterrupt:
         print("\n操作被取消，返回上级菜单。")
         return
@@ -1,69 +1,244 @@
-import re
-from InquirerPy.resolver import prompt
-from InquirerPy.base.control import Choice
-from alibabacloud_tea_openapi import models as open_api_models
-from alibabacloud_alidns20150109.client import Client as Alidns20150109Client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from alibabacloud_alidns20150109 import models as alidns_20150109_models
-from aliyun_controller.config import load_config
+from aliyun_controller.clients import get_dns_client
+from aliyun_controller.config import active_profile
+from aliyun_controller.console import propagate
+from aliyun_controller import profiling
+from aliyun_controller.modules.dns_lint import check_record
+from aliyun_controller.ratelimit import call_api
+
+# 会话内解析记录缓存的有效期，单位秒；超时或手动刷新时才重新拉取整个域名的记录
+RECORDS_CACHE_TTL = 300
+# 会话内域名列表缓存的有效期，单位秒
+DOMAINS_CACHE_TTL = 300
+# 域名列表分页大小（接口上限 100）
+DOMAINS_PAGE_SIZE = 100
+# 解析记录分页大小（接口上限 500）
+RECORDS_PAGE_SIZE = 500
+# 并发拉取解析记录分页的最大线程数，避免超出接口的 QPS 限制
+RECORDS_PAGE_WORKERS = 4
+
+# 域名选择菜单中“预加载全部域名记录”选项的值（域名必然包含点号，不会冲突）
+_LOAD_ALL_RECORDS = "load_all"
+# 域名选择菜单中“刷新域名列表”选项的值
+_REFRESH_DOMAINS = "refresh_domains"
+
+# 账号 -> 共享的 DNS 查询器
+_shared_queriers = {}
+_shared_querier_lock = threading.Lock()
+
+
+def get_dns_querier(profile: str = None) -> "AliCloudDnsQuerier":
+    """
+    获取进程内共享的 DNS 查询器（每个账号一个），解析记录缓存在整个会话中保留
+    """
+    profile = profile or active_profile()
+    with _shared_querier_lock:
+        querier = _shared_queriers.get(profile)
+        if querier is None:
+            querier = _shared_queriers[profile] = AliCloudDnsQuerier(profile=profile)
+        return querier
+
+
+class DnsQueryError(Exception):
+    """
+    查询域名或解析记录失败（重试后仍然失败）
+    """
+
 
 class AliCloudDnsQuerier:
-    def __init__(self):
+    def __init__(self, client=None, profile: str = None):
         """
-        初始化DNS客户端
+        初始化DNS客户端，默认使用进程内共享的 Alidns 客户端；profile 指定账号（默认为当前账号）
         """
-        config = load_config()
-        self.client = Alidns20150109Client(
-            open_api_models.Config(
-                access_key_id=config['access_key_id'],
-                access_key_secret=config['access_key_secret'],
-                endpoint="dns.aliyuncs.com",
-            )
-        )
+        self.profile = profile or active_profile()
+        self.client = client or get_dns_client(self.profile)
+        # 域名 -> (拉取时间, 解析记录列表)
+        self._records_cache = {}
+        # 域名 -> 解析记录缓存的版本号，记录每次变化时加一
+        self._records_versions = {}
+        # 域名 -> (版本号, RecordIndex)，供记录选择器复用格式化结果和排序顺序
+        self._record_indexes = {}
+        # (拉取时间, 域名列表)
+        self._domains_cache = None
+        self._records_lock = threading.Lock()
 
-    def get_domains(self) -> list:
+    def get_domains(self, refresh: bool = False) -> list:
         """
-        获取所有可管理的域名列表
+        获取所有可管理的域名列表。
+        第一页返回 TotalCount 后其余页并发拉取；结果在会话内缓存，过期或 refresh=True 时重新拉取。
+        查询失败时抛出 DnsQueryError，避免被误认为没有域名。
         """
-        request = alidns_20150109_models.DescribeDomainsRequest()
+        if not refresh:
+            with self._records_lock:
+                cached = self._domains_cache
+            if cached is not None and time.time() - cached[0] < DOMAINS_CACHE_TTL:
+                return list(cached[1])
+
+        fetched_at = time.time()
         try:
-            response = self.client.describe_domains(request)
-            return response.body.to_map().get('Domains', {}).get('Domain', [])
+            domains, total_count = self._fetch_domains_page(1)
+            page_count = -(-total_count // DOMAINS_PAGE_SIZE)
+            if domains and page_count > 1:
+                domains = list(domains)
+                workers = max(1, min(RECORDS_PAGE_WORKERS, page_count - 1))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    for page_domains in executor.map(
+                        propagate(lambda page_number: self._fetch_domains_page(page_number)[0]),
+                        range(2, page_count + 1),
+                    ):
+                        domains.extend(page_domains)
         except Exception as e:
-            print(f"\n获取域名列表时出错: {e}")
-            return []
+            raise DnsQueryError(f"获取域名列表时出错: {e}") from e
+
+        with self._records_lock:
+            self._domains_cache = (fetched_at, domains)
+        return list(domains)
+
+    def _fetch_domains_page(self, page_number: int) -> tuple:
+        """
+        拉取一页域名，返回 (域名列表, 域名总数)
+        """
+        request = alidns_20150109_models.DescribeDomainsRequest(
+            page_number=page_number,
+            page_size=DOMAINS_PAGE_SIZE
+        )
+        response = call_api('describe_domains', self.client.describe_domains, request, scope=self.profile)
+        response_dict = response.body.to_map()
+        domains = response_dict.get('Domains', {}).get('Domain', [])
+        profiling.record_items('describe_domains', len(domains))
+        return domains, response_dict.get('TotalCount', 0)
+
+    def get_domain_records(self, domain_name: str, refresh: bool = False) -> list:
+        """
+        获取指定域名的所有解析记录。
+        优先使用会话内缓存，缓存过期或 refresh=True 时重新拉取；返回列表的副本，可以就地排序。
+        查询失败时抛出 DnsQueryError，避免被误认为没有记录。
+        """
+        return self._get_records(domain_name, refresh)[1]
 
-    def get_domain_records(self, domain_name: str) -> list:
+    def _get_records(self, domain_name: str, refresh: bool = False) -> tuple:
         """
-        获取指定域名的所有解析记录
+        同 get_domain_records，返回 (缓存版本号, 解析记录列表副本)
+        """
+        if not refresh:
+            with self._records_lock:
+                cached = self._records_cache.get(domain_name)
+                if cached is not None and time.time() - cached[0] < RECORDS_CACHE_TTL:
+                    return self._records_versions.get(domain_name, 0), list(cached[1])
+
+        fetched_at = time.time()
+        records = self._fetch_domain_records(domain_name)
+        with self._records_lock:
+            self._records_cache[domain_name] = (fetched_at, records)
+            version = self._bump_records_version(domain_name)
+        return version, list(records)
+
+    def get_record_index(self, domain_name: str, refresh: bool = False) -> "RecordIndex":
+        """
+        获取指定域名解析记录的选择器索引（显示文本和各排序方式的顺序）。
+        记录未变化时直接复用上次构建的索引，增删改或重新拉取后才重建。
+        """
+        version, records = self._get_records(domain_name, refresh)
+        with self._records_lock:
+            cached = self._record_indexes.get(domain_name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        from aliyun_controller.modules.dns_picker import RecordIndex
+
+        record_index = RecordIndex(records)
+        with self._records_lock:
+            # 构建期间记录又发生变化时不缓存，下次重新构建
+            if self._records_versions.get(domain_name, 0) == version:
+                self._record_indexes[domain_name] = (version, record_index)
+        return record_index
+
+    def _bump_records_version(self, domain_name: str) -> int:
+        """
+        标记域名的解析记录已变化，丢弃对应的选择器索引；调用方需持有 _records_lock
+        """
+        version = self._records_versions[domain_name] = self._records_versions.get(domain_name, 0) + 1
+        self._record_indexes.pop(domain_name, None)
+        return version
+
+    def prime_domain_records(self, records_by_domain: dict):
+        """
+        用外部（例如异步批量）拉取的结果填充解析记录缓存
+        """
+        fetched_at = time.time()
+        with self._records_lock:
+            for domain_name, records in records_by_domain.items():
+                self._records_cache[domain_name] = (fetched_at, list(records))
+                self._bump_records_version(domain_name)
+
+    def invalidate_domain_records(self, domain_name: str = None):
+        """
+        丢弃指定域名（或全部域名）的解析记录缓存
+        """
+        with self._records_lock:
+            if domain_name is None:
+                self._records_cache.clear()
+                for cached_domain in list(self._records_versions):
+                    self._bump_records_version(cached_domain)
+            else:
+                self._records_cache.pop(domain_name, None)
+                self._bump_records_version(domain_name)
+
+    def _patch_cached_records(self, patch):
+        """
+        在所有已缓存的记录列表上应用修改函数 patch(domain_name, records)
+        """
+        with self._records_lock:
+            for domain_name, (fetched_at, records) in self._records_cache.items():
+                patch(domain_name, records)
+                self._bump_records_version(domain_name)
+
+    def _fetch_domain_records(self, domain_name: str) -> list:
+        """
+        分页拉取指定域名的所有解析记录，出错时抛出 DnsQueryError。
+        第一页返回 TotalCount 后，其余页按页码并发拉取，结果仍按页码顺序合并。
         """
-        all_records = []
-        page_number = 1
-        page_size = 500
         try:
-            while True:
-                request = alidns_20150109_models.DescribeDomainRecordsRequest(
-                    domain_name=domain_name,
-                    page_number=page_number,
-                    page_size=page_size
+            records, total_count = self._fetch_records_page(domain_name, 1)
+            page_count = -(-total_count // RECORDS_PAGE_SIZE)
+            if not records or page_count <= 1:
+                return records
+
+            all_records = list(records)
+            workers = max(1, min(RECORDS_PAGE_WORKERS, page_count - 1))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pages = executor.map(
+                    propagate(lambda page_number: self._fetch_records_page(domain_name, page_number)[0]),
+                    range(2, page_count + 1),
                 )
-                response = self.client.describe_domain_records(request)
-                response_dict = response.body.to_map()
-                records = response_dict.get('DomainRecords', {}).get('Record', [])
-                if not records:
-                    break
-                all_records.extend(records)
-                total_count = response_dict.get('TotalCount', 0)
-                if len(all_records) >= total_count:
-                    break
-                page_number += 1
+                for records in pages:
+                    all_records.extend(records)
             return all_records
         except Exception as e:
-            print(f"\n获取域名 {domain_name} 的解析记录时出错: {e}")
-            return []
+            raise DnsQueryError(f"获取域名 {domain_name} 的解析记录时出错: {e}") from e
 
-    def add_domain_record(self, domain_name: str, rr: str, type: str, value: str, ttl: int = 600) -> bool:
+    def _fetch_records_page(self, domain_name: str, page_number: int) -> tuple:
+        """
+        拉取一页解析记录，返回 (记录列表, 记录总数)
         """
-        添加新的解析记录
+        request = alidns_20150109_models.DescribeDomainRecordsRequest(
+            domain_name=domain_name,
+            page_number=page_number,
+            page_size=RECORDS_PAGE_SIZE
+        )
+        response = call_api('describe_domain_records', self.client.describe_domain_records, request, scope=self.profile)
+        response_dict = response.body.to_map()
+        records = response_dict.get('DomainRecords', {}).get('Record', [])
+        profiling.record_items('describe_domain_records', len(records))
+        return records, response_dict.get('TotalCount', 0)
+
+    def add_domain_record(self, domain_name: str, rr: str, type: str, value: str, ttl: int = 600, line: str = None,
+                          priority: int = None) -> bool:
+        """
+        添加新的解析记录，line 为解析线路（默认 default），priority 为 MX 记录的优先级
         """
         # 验证输入参数
         if not self._validate_dns_record(rr, type, value, ttl):
@@ -74,19 +249,44 @@ class AliCloudDnsQuerier:
             rr=rr,
             type=type,
             value=value,
-            ttl=ttl
+            ttl=ttl,
+            line=line,
+            priority=priority
         )
         try:
-            self.client.add_domain_record(request)
+            # 新增记录不是幂等操作，只在被限流时重试
+            response = call_api('add_domain_record', self.client.add_domain_record, request, idempotent=False, scope=self.profile)
             print(f"\n成功添加解析记录: {rr}.{domain_name} -> {value}")
+            record_id = response.body.record_id if response and response.body else None
+            if record_id:
+                new_record = {
+                    'DomainName': domain_name,
+                    'RecordId': record_id,
+                    'RR': rr,
+                    'Type': type,
+                    'Value': value,
+                    'TTL': ttl,
+                    'Line': line or 'default',
+                    'Status': 'ENABLE',
+                }
+                if priority is not None:
+                    new_record['Priority'] = priority
+                with self._records_lock:
+                    cached = self._records_cache.get(domain_name)
+                    if cached is not None:
+                        cached[1].append(new_record)
+                        self._bump_records_version(domain_name)
+            else:
+                self.invalidate_domain_records(domain_name)
             return True
         except Exception as e:
             print(f"\n添加解析记录时出错: {e}")
             return False
 
-    def update_domain_record(self, record_id: str, rr: str, type: str, value: str, ttl: int = 600) -> bool:
+    def update_domain_record(self, record_id: str, rr: str, type: str, value: str, ttl: int = 600, line: str = None,
+                             priority: int = None) -> bool:
         """
-        更新现有的解析记录
+        更新现有的解析记录，line 为解析线路（不指定时为 default），priority 为 MX 记录的优先级（不指定时不修改）
         """
         # 验证输入参数
         if not self._validate_dns_record(rr, type, value, ttl):
@@ -97,11 +297,22 @@ class AliCloudDnsQuerier:
             rr=rr,
             type=type,
             value=value,
-            ttl=ttl
+            ttl=ttl,
+            line=line,
+            priority=priority
         )
         try:
-            self.client.update_domain_record(request)
+            call_api('update_domain_record', self.client.update_domain_record, request, scope=self.profile)
             print(f"\n成功更新解析记录 (ID: {record_id})")
+
+            def patch(domain_name, records):
+                for i, record in enumerate(records):
+                    if record.get('RecordId') == record_id:
+                        records[i] = {**record, 'RR': rr, 'Type': type, 'Value': value, 'TTL': ttl, 'Line': line or 'default'}
+                        if priority is not None:
+                            records[i]['Priority'] = priority
+
+            self._patch_cached_records(patch)
             return True
         except Exception as e:
             print(f"\n更新解析记录时出错: {e}")
@@ -115,8 +326,13 @@ class AliCloudDnsQuerier:
             record_id=record_id
         )
         try:
-            self.client.delete_domain_record(request)
+            call_api('delete_domain_record', self.client.delete_domain_record, request, idempotent=False, scope=self.profile)
             print(f"\n成功删除解析记录 (ID: {record_id})")
+
+            def patch(domain_name, records):
+                records[:] = [record for record in records if record.get('RecordId') != record_id]
+
+            self._patch_cached_records(patch)
             return True
         except Exception as e:
             print(f"\n删除解析记录时出错: {e}")
@@ -124,53 +340,12 @@ class AliCloudDnsQuerier:
 
     def _validate_dns_record(self, rr: str, type: str, value: str, ttl: int) -> bool:
         """
-        验证DNS记录参数的合法性
+        验证DNS记录参数的合法性（规则与 dns lint 共用，见 dns_lint.check_record）
         """
-        # 验证主机记录
-        if not rr or len(rr) > 253:
-            print("\n主机记录不能为空且长度不能超过253个字符")
-            return False
-            
-        # 验证记录类型
-        valid_types = ['A', 'CNAME', 'MX', 'TXT', 'SRV', 'AAAA', 'NS', 'ANAME']
-        if type.upper() not in valid_types:
-            print(f"\n不支持的记录类型: {type}")
+        error = check_record(rr, type, value, ttl)
+        if error:
+            print(f"\n{error}")
             return False
-            
-        # 验证记录值
-        if not value:
-            print("\n记录值不能为空")
-            return False
-            
-        # 验证TTL (60-86400秒)
-        if not (60 <= ttl <= 86400):
-            print("\nTTL值必须在60-86400之间")
-            return False
-            
-        # 针对不同类型的记录进行额外验证
-        if type.upper() == 'A':
-            # IPv4地址验证
-            if not re.match(r'^(\d{1,3}\.){3}\d{1,3}$', value):
-                print("\nA记录的值必须是有效的IPv4地址")
-                return False
-            parts = value.split('.')
-            if any(int(part) > 255 for part in parts):
-                print("\nA记录的值必须是有效的IPv4地址")
-                return False
-        elif type.upper() == 'AAAA':
-            # IPv6地址验证（简单验证）
-            if not re.match(r'^[0-9a-fA-F:]+$', value):
-                print("\nAAAA记录的值必须是有效的IPv6地址")
-                return False
-        elif type.upper() == 'CNAME':
-            # CNAME验证（简单验证）
-            if not re.match(r'^[a-zA-Z0-9.-]+$', value):
-                print("\nCNAME记录的值格式不正确")
-                return False
-            if value.endswith('.'):
-                print("\nCNAME记录的值不能以点结尾")
-                return False
-                
         return True
 
     def sort_records(self, records: list, sort_type: int, sort_order: int) -> list:
@@ -202,15 +377,42 @@ class AliCloudDnsQuerier:
             )
         return records
 
-def dns_management_module():
+def _preload_all_domain_records(dns_querier: AliCloudDnsQuerier, domain_names: list):
+    """
+    通过异步查询层一次性并发拉取查询器所属账号下所有域名的解析记录，写入会话缓存
+    """
+    from aliyun_controller.modules.dns_async import fetch_all_domain_records
+
+    print(f"\n正在并发加载 {len(domain_names)} 个域名的解析记录...")
+    records_by_domain, errors = fetch_all_domain_records(domain_names, profile=dns_querier.profile)
+    dns_querier.prime_domain_records(records_by_domain)
+    total = sum(len(records) for records in records_by_domain.values())
+    print(f"已加载 {len(records_by_domain)} 个域名共 {total} 条解析记录。")
+    for domain_name, error in errors.items():
+        print(f"获取域名 {domain_name} 的解析记录时出错: {error}")
+
+def dns_management_module(profile: str = None):
     """
-    DNS解析管理模块
+    DNS解析管理模块，profile 指定要管理的账号（默认为当前账号）
     """
+    # 交互界面依赖只在进入菜单时导入，批处理子命令不需要加载 prompt_toolkit
+    from InquirerPy.base.control import Choice
+    from InquirerPy.resolver import prompt
+    from aliyun_controller.modules.dns_picker import pick_record
+    from aliyun_controller.prefetch import remember_domain
+
     try:
-        dns_querier = AliCloudDnsQuerier()
+        dns_querier = get_dns_querier(profile)
+
+        refresh_domains = False
 
         while True: # 循环用于域名选择
-            domains = dns_querier.get_domains()
+            try:
+                domains = dns_querier.get_domains(refresh=refresh_domains)
+            except DnsQueryError as e:
+                print(f"\n{e}")
+                return
+            refresh_domains = False
             if not domains:
                 print("未能获取到任何域名，请检查您的账户权限或配置。")
                 return
@@ -218,6 +420,8 @@ def dns_management_module():
             domain_choices = [
                 Choice(value=domain['DomainName'], name=domain['DomainName']) for domain in domains
             ]
+            domain_choices.append(Choice(value=_REFRESH_DOMAINS, name="[刷新域名列表]"))
+            domain_choices.append(Choice(value=_LOAD_ALL_RECORDS, name="[预加载全部域名的解析记录]"))
             domain_choices.append(Choice(value=None, name="[返回主菜单]"))
 
             questions = [
@@ -236,19 +440,34 @@ def dns_management_module():
                     return
                 
                 selected_domain = result.get("domain_name")
+                if selected_domain == _REFRESH_DOMAINS:
+                    refresh_domains = True
+                    continue
+                if selected_domain == _LOAD_ALL_RECORDS:
+                    _preload_all_domain_records(dns_querier, [domain['DomainName'] for domain in domains])
+                    continue
                 if not selected_domain or not isinstance(selected_domain, str): # 用户选择 [返回主菜单]
                     return
             except KeyboardInterrupt:
                 print("\n操作被取消，返回主菜单。")
                 return
+            remember_domain(selected_domain)
 
             # 排序设置：类型(0-创建时间, 1-二级域名, 2-首字母) 和 顺序(0-逆序, 1-正序)
             sort_type = 0  # 默认按创建时间排序
             sort_order = 0  # 默认逆序
+            # 仅在手动刷新时强制重新拉取，其余情况使用会话内缓存（增删改会直接更新缓存）
+            force_refresh = False
 
             while True: # 循环用于对选定域名进行操作
-                records = dns_querier.get_domain_records(selected_domain)
-                # 根据排序设置对记录进行排序，确保参数是整数
+                try:
+                    record_index = dns_querier.get_record_index(selected_domain, refresh=force_refresh)
+                except DnsQueryError as e:
+                    print(f"\n{e}")
+                    break # 返回域名选择
+                force_refresh = False
+                records = record_index.records
+                # 排序设置确保是整数
                 st = 0
                 so = 0
                 try:
@@ -259,72 +478,53 @@ def dns_management_module():
                     so = int(sort_order) if sort_order is not None and str(sort_order).isdigit() else 0
                 except (ValueError, TypeError):
                     so = 0
-                records = dns_querier.sort_records(records, st, so)
-                    
-                # 构建记录选项列表
-                record_choices = []
-                if records:
-                    for i, record in enumerate(records):
-                        record_name = f"{record.get('RR'):<20} {record.get('Type'):<10} {record.get('Value'):<30} {record.get('TTL')}"
-                        record_choices.append(Choice(value=i, name=record_name))
-                    
-                    # 添加分隔线（不可选择）
-                    record_choices.append(Choice(value="separator", name="-" * 80, enabled=False))
-                
-                # 添加操作选项
-                sort_type_int = int(sort_type) if isinstance(sort_type, (int, str)) else 0
-                sort_order_int = int(sort_order) if isinstance(sort_order, (int, str)) else 0
-                sort_type_text = ["创建时间", "二级域名", "首字母"][sort_type_int]
-                sort_order_text = "逆序" if sort_order_int == 0 else "正序"
-                record_choices.extend([
-                    Choice(value="add", name="新增解析记录"),
-                    Choice(value="sort", name=f"排序设置 [{sort_type_text}, {sort_order_text}]"),
-                    Choice(value="refresh", name="刷新记录列表"),
-                    Choice(value=None, name="[返回域名选择]")
-                ])
+
+                # 添加操作选项（追加在记录之后，记录选项的值为记录下标）
+                sort_type_text = ["创建时间", "二级域名", "首字母"][st]
+                sort_order_text = "逆序" if so == 0 else "正序"
+                action_choices = [
+                    {"value": "add", "name": "新增解析记录"},
+                    {"value": "sort", "name": f"排序设置 [{sort_type_text}, {sort_order_text}]"},
+                    {"value": "refresh", "name": "刷新记录列表"},
+                    {"value": None, "name": "[返回域名选择]"},
+                ]
 
                 print("\n" + "="*80)
                 print(f"域名 {selected_domain} 的解析记录".center(80))
                 print("="*80)
-                
-                if not records:
-                    print("未找到任何解析记录。")
-                    print("="*80)
-                    # 如果没有记录，只显示添加和返回选项
-                    action_choices = [
-                        Choice(value="add", name="新增解析记录"),
-                        Choice(value=None, name="[返回域名选择]")]                
-                    action_questions = [
-                        {
-                            "type": "list",
-                            "message": "请选择操作:",
-                            "choices": action_choices,
-                            "name": "dns_action",
-                        }
-                    ]
-                else:
-                    print(f"{'主机记录(RR)':<20} {'类型':<10} {'记录值(Value)':<30} {'TTL'}")
-                    print("--------------------------------------------------------------------------------")
-                    action_questions = [
-                        {
-                            "type": "list",
-                            "message": "请选择要操作的记录或操作:",
-                            "choices": record_choices,
-                            "name": "dns_action",
-                        }
-                    ]
-                
+
                 try:
-                    action_result = prompt(action_questions)
-                    if not action_result: # 用户在操作选择时按 Ctrl+C
-                        print("\n操作已取消，返回域名选择。")
-                        break # 退出操作循环，返回域名选择
+                    if not records:
+                        print("未找到任何解析记录。")
+                        print("="*80)
+                        # 如果没有记录，只显示添加和返回选项
+                        action_questions = [
+                            {
+                                "type": "list",
+                                "message": "请选择操作:",
+                                "choices": [
+                                    Choice(value="add", name="新增解析记录"),
+                                    Choice(value=None, name="[返回域名选择]")],
+                                "name": "dns_action",
+                            }
+                        ]
+                        action_result = prompt(action_questions)
+                        if not action_result: # 用户在操作选择时按 Ctrl+C
+                            print("\n操作已取消，返回域名选择。")
+                            break # 退出操作循环，返回域名选择
+                        dns_action = action_result.get("dns_action")
+                    else:
+                        print(f"{'主机记录(RR)':<20} {'类型':<10} {'记录值(Value)':<30} {'TTL'}")
+                        print("--------------------------------------------------------------------------------")
+                        # 记录较多时使用可模糊筛选、只渲染可见窗口的选择器
+                        dns_action = pick_record(
+                            f"请选择要操作的记录或操作（共 {len(records)} 条记录）:", record_index, st, so, action_choices
+                        )
                 except KeyboardInterrupt:
                     print("\n操作被取消，返回域名选择。")
                     break # 退出操作循环，返回域名选择
 
-                dns_action = action_result.get("dns_action")
-                if not dns_action: # 用户选择 [返回域名选择]
+                if dns_action is None: # 用户选择 [返回域名选择]
                     break
 
                 # 处理记录选择
@@ -404,7 +604,8 @@ def dns_management_module():
                                 rr=rr,
                                 type=type_val,
                                 value=value,
-                                ttl=ttl
+                                ttl=ttl,
+                                line=selected_record.get('Line')
                             )
                         except KeyboardInterrupt:
                             print("\n操作被取消，返回记录列表。")
@@ -571,7 +772,8 @@ def dns_management_module():
                         continue
 
                 elif dns_action == "refresh":
-                    # 刷新操作，直接继续循环
+                    # 刷新操作，下一轮强制重新拉取记录
+                    force_refresh = True
                     continue
     except KeyboardInterrupt:
         print("\n操作被取消，返回主菜单。")
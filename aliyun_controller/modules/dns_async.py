@@ -0,0 +1,122 @@
+"""
+基于 asyncio 的 Alidns 查询层，用于跨多个域名并发拉取解析记录
+"""
+import asyncio
+
+from alibabacloud_alidns20150109 import models as alidns_20150109_models
+from aliyun_controller import profiling
+from aliyun_controller.clients import get_dns_client
+from aliyun_controller.config import active_profile
+from aliyun_controller.ratelimit import call_api_async
+from aliyun_controller.modules.dns import DOMAINS_PAGE_SIZE, RECORDS_PAGE_SIZE
+
+# 同时进行中的接口请求上限（所有域名共享）
+ASYNC_CONCURRENCY = 8
+
+
+class AsyncAliCloudDnsQuerier:
+    def __init__(self, client=None, concurrency: int = ASYNC_CONCURRENCY, profile: str = None):
+        """
+        初始化异步 DNS 查询器，默认使用进程内共享的 Alidns 客户端；profile 指定账号（默认为当前账号），
+        与同步查询器共享该账号的客户端和限速器
+        """
+        self.profile = profile or active_profile()
+        self.client = client or get_dns_client(self.profile)
+        self.concurrency = max(1, concurrency)
+        self._semaphore = None
+
+    async def _call(self, method_name: str, request):
+        """
+        在共享信号量限制下调用 SDK 的 *_async 方法，限速和重试与同步调用共享
+        """
+        if self._semaphore is None:
+            # 信号量需在事件循环内创建
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            return await call_api_async(
+                method_name, getattr(self.client, f"{method_name}_async"), request, scope=self.profile
+            )
+
+    async def _get_domains_page(self, page_number: int) -> tuple:
+        request = alidns_20150109_models.DescribeDomainsRequest(
+            page_number=page_number,
+            page_size=DOMAINS_PAGE_SIZE
+        )
+        response = await self._call("describe_domains", request)
+        response_dict = response.body.to_map()
+        domains = response_dict.get('Domains', {}).get('Domain', [])
+        profiling.record_items('describe_domains', len(domains))
+        return domains, response_dict.get('TotalCount', 0)
+
+    async def get_domains(self) -> list:
+        """
+        获取所有可管理的域名列表，第一页之后的分页并发拉取
+        """
+        domains, total_count = await self._get_domains_page(1)
+        page_count = -(-total_count // DOMAINS_PAGE_SIZE)
+        if not domains or page_count <= 1:
+            return domains
+        pages = await asyncio.gather(*(
+            self._get_domains_page(page_number) for page_number in range(2, page_count + 1)
+        ))
+        all_domains = list(domains)
+        for page_domains, _ in pages:
+            all_domains.extend(page_domains)
+        return all_domains
+
+    async def _get_records_page(self, domain_name: str, page_number: int) -> tuple:
+        request = alidns_20150109_models.DescribeDomainRecordsRequest(
+            domain_name=domain_name,
+            page_number=page_number,
+            page_size=RECORDS_PAGE_SIZE
+        )
+        response = await self._call("describe_domain_records", request)
+        response_dict = response.body.to_map()
+        records = response_dict.get('DomainRecords', {}).get('Record', [])
+        profiling.record_items('describe_domain_records', len(records))
+        return records, response_dict.get('TotalCount', 0)
+
+    async def get_domain_records(self, domain_name: str) -> list:
+        """
+        获取指定域名的所有解析记录，第一页之后的分页并发拉取并按页码顺序合并
+        """
+        records, total_count = await self._get_records_page(domain_name, 1)
+        page_count = -(-total_count // RECORDS_PAGE_SIZE)
+        if not records or page_count <= 1:
+            return records
+        pages = await asyncio.gather(*(
+            self._get_records_page(domain_name, page_number)
+            for page_number in range(2, page_count + 1)
+        ))
+        all_records = list(records)
+        for page_records, _ in pages:
+            all_records.extend(page_records)
+        return all_records
+
+    async def get_all_domain_records(self, domain_names: list = None) -> tuple:
+        """
+        一次性并发拉取多个域名（默认全部域名）的解析记录。
+        返回 (域名 -> 记录列表, 域名 -> 异常)，单个域名失败不影响其他域名。
+        """
+        if domain_names is None:
+            domain_names = [domain['DomainName'] for domain in await self.get_domains()]
+        results = await asyncio.gather(
+            *(self.get_domain_records(domain_name) for domain_name in domain_names),
+            return_exceptions=True,
+        )
+        records_by_domain = {}
+        errors = {}
+        for domain_name, result in zip(domain_names, results):
+            if isinstance(result, BaseException):
+                errors[domain_name] = result
+            else:
+                records_by_domain[domain_name] = result
+        return records_by_domain, errors
+
+
+def fetch_all_domain_records(domain_names: list = None, concurrency: int = ASYNC_CONCURRENCY, profile: str = None) -> tuple:
+    """
+    供同步代码调用的入口：并发拉取账号（默认为当前账号）下多个域名的解析记录，返回值同 get_all_domain_records
+    """
+    querier = AsyncAliCloudDnsQuerier(concurrency=concurrency, profile=profile)
+    return asyncio.run(querier.get_all_domain_records(domain_names))
@@ -0,0 +1,132 @@
+"""
+跨域名解析记录检索：按记录值、主机记录和类型建立倒排索引
+"""
+import time
+
+from aliyun_controller.cache import DnsRecordStore
+
+# 本地快照的默认有效期，单位秒；过期的域名在下次检索时增量重建
+INDEX_MAX_AGE = 3600
+
+
+def _normalize_value(value) -> str:
+    return str(value or '').strip().rstrip('.').lower()
+
+
+class DnsRecordIndex:
+    """
+    解析记录倒排索引。每条记录以 (域名, 序号) 引用，
+    value/rr/type 三个索引分别映射到记录引用集合，支持按域名增量重建。
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.by_value = {}
+        self.by_rr = {}
+        self.by_type = {}
+
+    @staticmethod
+    def _keys(record: dict) -> tuple:
+        return (
+            _normalize_value(record.get('Value')),
+            str(record.get('RR') or '').lower(),
+            str(record.get('Type') or '').upper(),
+        )
+
+    def _postings(self):
+        return (self.by_value, self.by_rr, self.by_type)
+
+    def remove_domain(self, domain_name: str):
+        """
+        从索引中移除一个域名的全部记录
+        """
+        for position, record in enumerate(self.records.pop(domain_name, [])):
+            ref = (domain_name, position)
+            for postings, key in zip(self._postings(), self._keys(record)):
+                refs = postings.get(key)
+                if refs is not None:
+                    refs.discard(ref)
+                    if not refs:
+                        del postings[key]
+
+    def update_domain(self, domain_name: str, records: list):
+        """
+        用最新的记录列表重建单个域名的索引
+        """
+        self.remove_domain(domain_name)
+        self.records[domain_name] = list(records)
+        for position, record in enumerate(self.records[domain_name]):
+            ref = (domain_name, position)
+            for postings, key in zip(self._postings(), self._keys(record)):
+                postings.setdefault(key, set()).add(ref)
+
+    def search(self, value: str = None, rr: str = None, record_type: str = None) -> list:
+        """
+        按给定条件（取交集）检索记录，返回 [(域名, 记录)]，按域名和原顺序排列
+        """
+        criteria = []
+        if value:
+            criteria.append(self.by_value.get(_normalize_value(value), set()))
+        if rr:
+            criteria.append(self.by_rr.get(rr.strip().lower(), set()))
+        if record_type:
+            criteria.append(self.by_type.get(record_type.strip().upper(), set()))
+        if not criteria:
+            return []
+        # 从最小的集合开始求交集
+        criteria.sort(key=len)
+        refs = set(criteria[0])
+        for other in criteria[1:]:
+            refs &= other
+            if not refs:
+                break
+        return [(domain_name, self.records[domain_name][position]) for domain_name, position in sorted(refs)]
+
+    def __len__(self):
+        return sum(len(records) for records in self.records.values())
+
+
+def load_record_snapshots(refresh: bool = False, max_age: int = INDEX_MAX_AGE, store: DnsRecordStore = None) -> tuple:
+    """
+    读取全部域名解析记录的本地快照，只重新拉取快照缺失或已过期的域名，并删除已不在账号下的域名。
+    返回 ({域名: 解析记录列表}（按域名列表顺序）, 域名 -> 拉取失败的异常)
+    """
+    from aliyun_controller.modules.dns import get_dns_querier
+    from aliyun_controller.modules.dns_async import fetch_all_domain_records
+
+    store = store or DnsRecordStore()
+    snapshots = store.load_all()
+    querier = get_dns_querier()
+    domain_names = [domain['DomainName'] for domain in querier.get_domains()]
+
+    now = time.time()
+    stale = [
+        domain_name for domain_name in domain_names
+        if refresh or domain_name not in snapshots or now - snapshots[domain_name][0] >= max_age
+    ]
+    errors = {}
+    if stale:
+        fetched, errors = fetch_all_domain_records(stale, profile=querier.profile)
+        store.save(fetched)
+        for domain_name, records in fetched.items():
+            snapshots[domain_name] = (now, records)
+
+    removed = [domain_name for domain_name in snapshots if domain_name not in domain_names]
+    if removed and domain_names:
+        store.delete(removed)
+
+    records_by_domain = {
+        domain_name: snapshots[domain_name][1] for domain_name in domain_names if domain_name in snapshots
+    }
+    return records_by_domain, errors
+
+
+def load_record_index(refresh: bool = False, max_age: int = INDEX_MAX_AGE, store: DnsRecordStore = None) -> tuple:
+    """
+    从本地快照构建索引（见 load_record_snapshots），返回 (索引, 域名 -> 拉取失败的异常)
+    """
+    records_by_domain, errors = load_record_snapshots(refresh, max_age, store)
+    index = DnsRecordIndex()
+    for domain_name, records in records_by_domain.items():
+        index.update_domain(domain_name, records)
+    return index, errors
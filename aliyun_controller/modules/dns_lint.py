@@ -0,0 +1,273 @@
+"""
+全账号解析记录检查：一次加载所有域名的记录，建立名称索引后单遍执行全部规则，
+结果按规则和域名分组输出。
+
+记录值的校验规则（预编译的正则和 ipaddress 解析）同时供 AliCloudDnsQuerier._validate_dns_record 使用，
+新增或修改记录时与离线检查的判断保持一致。
+"""
+import ipaddress
+import re
+from collections import Counter, OrderedDict
+
+# 支持新增和修改的记录类型
+VALID_RECORD_TYPES = frozenset(('A', 'CNAME', 'MX', 'TXT', 'SRV', 'AAAA', 'NS', 'ANAME'))
+# TTL 允许的范围，单位秒
+MIN_TTL = 60
+MAX_TTL = 86400
+# TTL 与所在域名最常见的 TTL 相差达到该倍数时视为异常
+TTL_OUTLIER_RATIO = 10
+# 记录数少于该值的域名不检查 TTL 异常
+TTL_OUTLIER_MIN_RECORDS = 5
+
+_HOSTNAME_PATTERN = re.compile(r'^[a-zA-Z0-9.-]+$')
+
+# 规则名称 -> (级别, 说明)，输出时按此顺序分组
+LINT_RULES = OrderedDict([
+    ('invalid_value', ('error', "记录值不合法")),
+    ('cname_conflict', ('error', "CNAME 与其他记录共存")),
+    ('dangling_cname', ('error', "CNAME 指向本账号域名下不存在的名称")),
+    ('duplicate', ('warning', "重复记录")),
+    ('ttl_outlier', ('warning', "TTL 与域名内其他记录差异过大")),
+])
+
+
+def _is_ipv4(value: str) -> bool:
+    try:
+        ipaddress.IPv4Address(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_ipv6(value: str) -> bool:
+    try:
+        ipaddress.IPv6Address(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _check_cname(value: str) -> str:
+    if not _HOSTNAME_PATTERN.match(value):
+        return "CNAME记录的值格式不正确"
+    if value.endswith('.'):
+        return "CNAME记录的值不能以点结尾"
+    return None
+
+
+# 记录类型 -> 检查函数(value) -> 错误信息或 None
+_VALUE_RULES = {
+    'A': lambda value: None if _is_ipv4(value) else "A记录的值必须是有效的IPv4地址",
+    'AAAA': lambda value: None if _is_ipv6(value) else "AAAA记录的值必须是有效的IPv6地址",
+    'CNAME': _check_cname,
+}
+
+
+def check_record_value(type: str, value: str) -> str:
+    """
+    按记录类型检查记录值，不合法时返回错误信息，否则返回 None
+    """
+    rule = _VALUE_RULES.get(str(type or '').upper())
+    return rule(str(value)) if rule is not None else None
+
+
+def check_record(rr: str, type: str, value: str, ttl: int) -> str:
+    """
+    检查一条待提交的解析记录，不合法时返回错误信息，否则返回 None
+    """
+    if not rr or len(rr) > 253:
+        return "主机记录不能为空且长度不能超过253个字符"
+    if type.upper() not in VALID_RECORD_TYPES:
+        return f"不支持的记录类型: {type}"
+    if not value:
+        return "记录值不能为空"
+    if not (MIN_TTL <= ttl <= MAX_TTL):
+        return f"TTL值必须在{MIN_TTL}-{MAX_TTL}之间"
+    return check_record_value(type, value)
+
+
+def _fqdn(domain_name: str, rr: str) -> str:
+    rr = str(rr or '@').lower()
+    return domain_name.lower() if rr == '@' else f"{rr}.{domain_name.lower()}"
+
+
+def _normalize_target(value) -> str:
+    return str(value or '').strip().rstrip('.').lower()
+
+
+def _ttl(record: dict):
+    try:
+        return int(record.get('TTL'))
+    except (TypeError, ValueError):
+        return None
+
+
+class _NameIndex:
+    """
+    账号下所有域名的名称索引：存在记录的完整名称、通配符名称和子域委派（NS）名称
+    """
+
+    def __init__(self, records_by_domain: dict):
+        self.zones = {domain_name.lower() for domain_name in records_by_domain}
+        self.names = set()
+        self.delegations = set()
+        for domain_name, records in records_by_domain.items():
+            zone = domain_name.lower()
+            for record in records:
+                name = _fqdn(domain_name, record.get('RR'))
+                self.names.add(name)
+                if str(record.get('Type') or '').upper() == 'NS' and name != zone:
+                    self.delegations.add(name)
+
+    def zone_of(self, name: str) -> str:
+        """
+        返回名称所属的本账号域名（最长匹配），不属于任何域名时返回 None
+        """
+        labels = name.split('.')
+        for i in range(len(labels)):
+            suffix = '.'.join(labels[i:])
+            if suffix in self.zones:
+                return suffix
+        return None
+
+    def resolves(self, name: str, zone: str) -> bool:
+        """
+        名称在所属域名内是否有记录（含通配符匹配），或位于委派出去的子域中
+        """
+        if name in self.names:
+            return True
+        labels = name.split('.')
+        # 从名称自身的上一级开始，直到所属域名为止
+        for i in range(1, len(labels) - zone.count('.')):
+            parent = '.'.join(labels[i:])
+            if parent in self.delegations or f"*.{parent}" in self.names:
+                return True
+        return False
+
+
+def _issue(rule: str, domain_name: str, record: dict, message: str) -> dict:
+    return {
+        "rule": rule,
+        "severity": LINT_RULES[rule][0],
+        "domain_name": domain_name,
+        "rr": record.get('RR'),
+        "type": record.get('Type'),
+        "value": record.get('Value'),
+        "ttl": record.get('TTL'),
+        "line": record.get('Line') or 'default',
+        "record_id": record.get('RecordId'),
+        "message": message,
+    }
+
+
+def lint_records(records_by_domain: dict, domains: list = None) -> OrderedDict:
+    """
+    对 {域名: 解析记录列表} 执行全部检查规则，返回 {规则名称: [问题]}（只包含有问题的规则）。
+    每个问题为包含 rule、severity、domain_name、记录字段和 message 的字典。
+    domains 指定只检查其中部分域名；悬空 CNAME 仍对照全部域名的记录判断。
+    """
+    names = _NameIndex(records_by_domain)
+    issues = OrderedDict((rule, []) for rule in LINT_RULES)
+    # (类型, 记录值) -> 检查结果，同一个 IP 或 CNAME 目标在账号内通常重复出现多次
+    value_errors = {}
+
+    for domain_name, records in records_by_domain.items():
+        if domains is not None and domain_name not in domains:
+            continue
+        # 主机记录 -> 记录类型集合 / 该主机记录下的 CNAME 记录
+        rr_types = {}
+        rr_cnames = {}
+        seen = {}
+        ttls = []
+        for record in records:
+            record_type = str(record.get('Type') or '').upper()
+            rr = str(record.get('RR') or '@').lower()
+            value = record.get('Value')
+            rr_types.setdefault(rr, set()).add(record_type)
+            ttl = _ttl(record)
+            if ttl is not None:
+                ttls.append((ttl, record))
+
+            value_key = (record_type, value)
+            if value_key in value_errors:
+                error = value_errors[value_key]
+            else:
+                error = value_errors[value_key] = check_record_value(record_type, value)
+            if error:
+                issues['invalid_value'].append(_issue('invalid_value', domain_name, record, error))
+
+            target = _normalize_target(value)
+            key = (rr, record_type, target, record.get('Line') or 'default')
+            first = seen.setdefault(key, record)
+            if first is not record:
+                issues['duplicate'].append(_issue(
+                    'duplicate', domain_name, record, f"与记录 {first.get('RecordId')} 完全相同"
+                ))
+
+            if record_type == 'CNAME':
+                rr_cnames.setdefault(rr, []).append(record)
+                zone = names.zone_of(target)
+                if zone is not None and not names.resolves(target, zone):
+                    issues['dangling_cname'].append(_issue(
+                        'dangling_cname', domain_name, record, f"{target} 在域名 {zone} 中没有任何记录"
+                    ))
+
+        for rr, cnames in rr_cnames.items():
+            types = rr_types[rr]
+            if len(types) > 1:
+                others = ', '.join(sorted(types - {'CNAME'}))
+                for record in cnames:
+                    issues['cname_conflict'].append(_issue(
+                        'cname_conflict', domain_name, record, f"同一主机记录下还有 {others} 记录"
+                    ))
+
+        if len(records) >= TTL_OUTLIER_MIN_RECORDS and ttls:
+            common_ttl = Counter(ttl for ttl, _ in ttls).most_common(1)[0][0]
+            if common_ttl > 0:
+                low, high = common_ttl / TTL_OUTLIER_RATIO, common_ttl * TTL_OUTLIER_RATIO
+                for ttl, record in ttls:
+                    if 0 < ttl <= low or ttl >= high:
+                        issues['ttl_outlier'].append(_issue(
+                            'ttl_outlier', domain_name, record, f"TTL {ttl}，该域名常用 TTL 为 {common_ttl}"
+                        ))
+
+    return OrderedDict((rule, found) for rule, found in issues.items() if found)
+
+
+def lint_to_map(records_by_domain: dict, issues: dict, errors: dict = None) -> dict:
+    return {
+        "domains": len(records_by_domain),
+        "records": sum(len(records) for records in records_by_domain.values()),
+        "issue_count": sum(len(found) for found in issues.values()),
+        "issues": {rule: found for rule, found in issues.items()},
+        "errors": {domain_name: str(error) for domain_name, error in (errors or {}).items()},
+    }
+
+
+def print_lint_report(records_by_domain: dict, issues: dict):
+    """
+    按规则分组、规则内按域名排列输出检查结果
+    """
+    total_records = sum(len(records) for records in records_by_domain.values())
+    print("\n" + "="*100)
+    print(f"{len(records_by_domain)} 个域名共 {total_records} 条解析记录的检查结果".center(100))
+    print("="*100)
+    if not issues:
+        print("未发现问题。")
+        print("="*100)
+        return
+
+    for rule, found in issues.items():
+        severity, description = LINT_RULES[rule]
+        print(f"\n[{severity}] {rule}: {description}（{len(found)} 条）")
+        print("-"*100)
+        print(f"{'域名':<25} {'主机记录(RR)':<20} {'类型':<8} {'记录值(Value)':<30} {'说明'}")
+        for issue in sorted(found, key=lambda issue: issue['domain_name']):
+            print(
+                f"{issue['domain_name']:<25} {str(issue['rr']):<20} {str(issue['type']):<8} "
+                f"{str(issue['value'])[:30]:<30} {issue['message']}"
+            )
+    print("\n" + "="*100)
+    counts = Counter(LINT_RULES[rule][0] for rule, found in issues.items() for _ in found)
+    print(f"共 {counts['error']} 个错误，{counts['warning']} 个警告".rjust(100))
+    print("="*100)
@@ -0,0 +1,149 @@
+"""
+大量解析记录的模糊搜索选择器。
+
+每个域名的记录只格式化一次，各种排序方式的顺序在首次使用时计算并缓存（记录变化后整体重建）；
+选择器基于 InquirerPy 的 fuzzy 提示，输入在后台协程中过滤；
+输入追加字符时只在上一次的结果中继续过滤，上万条记录时按键响应也不会变慢。
+"""
+import asyncio
+
+from InquirerPy.enum import INQUIRERPY_POINTER_SEQUENCE
+from InquirerPy.prompts.fuzzy import FuzzyPrompt, InquirerPyFuzzyControl, fuzzy_match
+
+# 选择器最多占用的终端高度
+PICKER_MAX_HEIGHT = "70%"
+# 排序类型 -> 排序键（与 AliCloudDnsQuerier.sort_records 一致），0 为接口返回的创建顺序
+_SORT_KEYS = {
+    1: lambda rr: rr.split('.')[-1],
+    2: lambda rr: rr,
+}
+
+
+def format_record(record: dict) -> str:
+    """
+    记录在列表中的显示文本
+    """
+    return f"{str(record.get('RR')):<20} {str(record.get('Type')):<10} {str(record.get('Value')):<30} {record.get('TTL')}"
+
+
+class RecordIndex:
+    """
+    一个域名解析记录的显示文本和各排序方式下的选项列表。
+    选项的 value 为记录在 records 中的下标。
+    """
+
+    def __init__(self, records: list):
+        self.records = records
+        self.names = [format_record(record) for record in records]
+        self._choices = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def _order(self, sort_type: int, sort_order: int) -> list:
+        reverse = sort_order == 0
+        if sort_type not in _SORT_KEYS:
+            indexes = range(len(self.records))
+            return list(reversed(indexes)) if reverse else list(indexes)
+        key = _SORT_KEYS[sort_type]
+        keys = [key(record.get('RR', '')) for record in self.records]
+        # sorted 是稳定排序，reverse=True 时相同键的记录仍保持原有顺序，与 list.sort 一致
+        return sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)
+
+    def choices(self, sort_type: int, sort_order: int) -> list:
+        """
+        按排序方式返回选项列表（缓存，调用方不要修改）
+        """
+        cache_key = (sort_type, sort_order)
+        choices = self._choices.get(cache_key)
+        if choices is None:
+            names = self.names
+            choices = self._choices[cache_key] = [
+                {"name": names[i], "value": i} for i in self._order(sort_type, sort_order)
+            ]
+        return choices
+
+
+class _IncrementalFuzzyControl(InquirerPyFuzzyControl):
+    """
+    输入在上一次的关键字后追加字符时，只在上一次的匹配结果中过滤
+    （子序列或子串匹配下，新关键字的匹配项一定也匹配旧关键字）。
+    切换精确/模糊匹配（_scorer 变化）后上一次的结果不再适用，重新在全部选项中过滤。
+    依赖 InquirerPy 0.3.4 InquirerPyFuzzyControl 的内部实现，升级时需要同步检查：
+    协程方法 _filter_choices(wait_time)、属性 _scorer（当前的 pfzy 评分函数）、
+    _current_text（返回当前输入的函数）和 choices
+    """
+
+    _last_text = ""
+    _last_matches = None
+    _last_scorer = None
+
+    async def _filter_choices(self, wait_time: float) -> list:
+        text = self._current_text()
+        if not text:
+            self._last_text, self._last_matches = "", None
+            return await super()._filter_choices(wait_time)
+
+        scorer = self._scorer
+        haystack = self.choices
+        if (
+            self._last_matches is not None and self._last_scorer is scorer
+            and self._last_text and text.startswith(self._last_text)
+        ):
+            haystack = self._last_matches
+        await asyncio.sleep(wait_time)
+        matches = await fuzzy_match(text, haystack, key="name", scorer=scorer)
+        self._last_text, self._last_matches, self._last_scorer = text, matches, scorer
+        return matches
+
+
+class _RecordPicker(FuzzyPrompt):
+    """
+    使用 _IncrementalFuzzyControl 过滤的 fuzzy 提示，渲染和按键处理沿用 InquirerPy 的实现。
+    InquirerPy 0.3.4 的 FuzzyPrompt.__init__ 直接实例化 InquirerPyFuzzyControl，没有可覆盖的工厂方法，
+    因此构造完成后用相同参数创建增量过滤的控件，替换 content_control 和 choice_window.content
+    （该控件只被这两处引用，按键处理和提示信息都通过 content_control 访问）
+    """
+
+    def __init__(self, message: str, choices: list, max_height, long_instruction: str):
+        # 父类创建的控件随即被替换，只给它一个占位选项，避免重复处理上万条选项
+        super().__init__(
+            message=message,
+            choices=[{"name": "", "value": None}],
+            pointer=INQUIRERPY_POINTER_SEQUENCE,
+            marker=INQUIRERPY_POINTER_SEQUENCE,
+            marker_pl=" ",
+            max_height=max_height,
+            info=True,
+            long_instruction=long_instruction,
+        )
+        control = _IncrementalFuzzyControl(
+            choices=choices,
+            pointer=INQUIRERPY_POINTER_SEQUENCE,
+            marker=INQUIRERPY_POINTER_SEQUENCE,
+            current_text=self._get_current_text,
+            max_lines=self._dimmension_max_height,
+            session_result=None,
+            multiselect=False,
+            marker_pl=" ",
+            match_exact=False,
+        )
+        self.content_control = control
+        self.choice_window.content = control
+
+
+def _make_picker(message: str, record_index: RecordIndex, sort_type: int, sort_order: int, actions: list) -> FuzzyPrompt:
+    return _RecordPicker(
+        message=message,
+        choices=record_index.choices(sort_type, sort_order) + actions,
+        max_height=PICKER_MAX_HEIGHT,
+        long_instruction="输入关键字模糊筛选记录，↑/↓ 选择（在第一项按 ↑ 可直接跳到末尾的操作项），回车确认",
+    )
+
+
+def pick_record(message: str, record_index: RecordIndex, sort_type: int, sort_order: int, actions: list):
+    """
+    显示模糊搜索的记录选择器，actions 为追加在记录之后的操作选项（{"name", "value"}）。
+    返回选中项的 value，用户按 Ctrl+C 时抛出 KeyboardInterrupt。
+    """
+    return _make_picker(message, record_index, sort_type, sort_order, actions).execute()
@@ -0,0 +1,364 @@
+"""
+声明式 DNS 同步：根据期望状态文件（YAML 或 BIND zone）计算最小变更并并发执行
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import yaml
+
+# 并发执行变更的默认线程数
+SYNC_WORKERS = 4
+# 期望状态文件中未指定 TTL 时使用的默认值
+DEFAULT_TTL = 600
+# 按 BIND zone 格式解析的文件后缀
+ZONE_FILE_SUFFIXES = ('.zone', '.db', '.bind')
+# 阿里云 MX 记录优先级的取值范围
+MX_PRIORITY_MIN = 1
+MX_PRIORITY_MAX = 50
+# YAML 中的 MX 记录未写 priority 时使用的优先级（阿里云新增 MX 记录时必须指定优先级）
+DEFAULT_MX_PRIORITY = 10
+# 这些类型的记录值是域名，比较时忽略大小写和末尾的点
+_HOSTNAME_TYPES = ('CNAME', 'MX', 'NS', 'ANAME', 'SRV')
+
+
+class SyncPlan:
+    """
+    同步计划：待新增、待更新（记录ID + 期望记录）和待删除的记录
+    """
+
+    def __init__(self):
+        self.adds = []
+        self.updates = []
+        self.deletes = []
+
+    def is_empty(self) -> bool:
+        return not (self.adds or self.updates or self.deletes)
+
+    def to_map(self) -> dict:
+        return {
+            "adds": self.adds,
+            "updates": [{"RecordId": record_id, **record} for record_id, record in self.updates],
+            "deletes": self.deletes,
+        }
+
+
+def _normalize_value(record_type: str, value: str) -> str:
+    value = str(value).strip()
+    if record_type in _HOSTNAME_TYPES:
+        return value.rstrip('.').lower()
+    return value
+
+
+def _make_record(rr, record_type, value, ttl=None, line=None, priority=None) -> dict:
+    """
+    构造期望记录。priority 只适用于 MX 记录（阿里云的取值范围为 1-50），未指定时为 DEFAULT_MX_PRIORITY；
+    SRV 记录的优先级、权重和端口是记录值的一部分。
+    """
+    record_type = str(record_type).strip().upper()
+    value = str(value).strip()
+    if record_type in _HOSTNAME_TYPES:
+        # 阿里云的记录值不带末尾的点
+        value = value.rstrip('.')
+    record = {
+        'RR': str(rr).strip() or '@',
+        'Type': record_type,
+        'Value': value,
+        'TTL': int(ttl) if ttl is not None else DEFAULT_TTL,
+        'Line': str(line).strip() if line else 'default',
+    }
+    if record_type == 'MX' and priority is None:
+        priority = DEFAULT_MX_PRIORITY
+    if priority is not None:
+        if record_type != 'MX':
+            raise ValueError(f"只有 MX 记录可以指定优先级: {record['RR']} {record_type}")
+        priority = int(priority)
+        if not MX_PRIORITY_MIN <= priority <= MX_PRIORITY_MAX:
+            raise ValueError(
+                f"MX 记录 {record['RR']} -> {value} 的优先级 {priority} 超出阿里云允许的范围 "
+                f"{MX_PRIORITY_MIN}-{MX_PRIORITY_MAX}"
+            )
+        record['Priority'] = priority
+    return record
+
+
+def _record_key(record: dict) -> tuple:
+    record_type = str(record.get('Type', '')).upper()
+    return (
+        str(record.get('RR', '')).lower(),
+        record_type,
+        _normalize_value(record_type, record.get('Value', '')),
+        record.get('Line') or 'default',
+    )
+
+
+def _load_yaml_records(path: Path) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    if isinstance(data, dict):
+        data = data.get("records")
+    if not isinstance(data, list):
+        raise ValueError("期望状态文件需为记录列表，或包含 records 列表")
+
+    records = []
+    for i, entry in enumerate(data, start=1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"第 {i} 条记录格式错误")
+        entry = {str(k).lower(): v for k, v in entry.items()}
+        for field in ('rr', 'type', 'value'):
+            if entry.get(field) in (None, ''):
+                raise ValueError(f"第 {i} 条记录缺少 {field}")
+        records.append(_make_record(
+            entry['rr'], entry['type'], entry['value'], entry.get('ttl'), entry.get('line'), entry.get('priority')
+        ))
+    return records
+
+
+def _strip_zone_comment(line: str) -> str:
+    in_quotes = False
+    for i, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ';' and not in_quotes:
+            return line[:i]
+    return line
+
+
+def _parse_zone_ttl(token: str, line: str) -> int:
+    """
+    只接受以秒为单位的 TTL；带单位的写法（如 1h、1d）直接报错，避免被误当作记录类型
+    """
+    if not token.isdigit():
+        raise ValueError(f"不支持带单位的 TTL {token}，请改为秒数: {line.strip()}")
+    return int(token)
+
+
+def _load_zone_records(path: Path, domain_name: str) -> list:
+    """
+    解析 BIND zone 文件。SOA 和根域名上的 NS 记录由阿里云托管，会被忽略；
+    MX 记录的优先级单独保存（超出阿里云允许范围时报错），SRV 记录的全部字段作为记录值。
+    """
+    origin = domain_name.rstrip('.').lower() + '.'
+    default_ttl = DEFAULT_TTL
+    last_name = '@'
+    records = []
+
+    # 先合并括号跨行的记录
+    logical_lines = []
+    buffer = ''
+    depth = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for raw_line in f:
+            line = _strip_zone_comment(raw_line.rstrip('\n'))
+            depth += line.count('(') - line.count(')')
+            line = line.replace('(', ' ').replace(')', ' ')
+            buffer = f"{buffer} {line}" if buffer else line
+            if depth <= 0:
+                if buffer.strip():
+                    logical_lines.append(buffer)
+                buffer = ''
+                depth = 0
+    if buffer.strip():
+        logical_lines.append(buffer)
+
+    for line in logical_lines:
+        tokens = re.findall(r'"(?:[^"\\]|\\.)*"|\S+', line)
+        if tokens[0].upper() == '$ORIGIN':
+            origin = tokens[1].lower() if tokens[1].endswith('.') else tokens[1].lower() + '.' + origin
+            continue
+        if tokens[0].upper() == '$TTL':
+            default_ttl = _parse_zone_ttl(tokens[1], line)
+            continue
+        if tokens[0].startswith('$'):
+            # $INCLUDE、$GENERATE 等指令无法在同步中等价处理
+            raise ValueError(f"不支持的 zone 指令 {tokens[0]}: {line.strip()}")
+
+        # 行首为空白时沿用上一条记录的名称
+        if line[0].isspace():
+            name = last_name
+        else:
+            name = tokens.pop(0)
+        last_name = name
+
+        ttl = default_ttl
+        while tokens and (tokens[0][0].isdigit() or tokens[0].upper() in ('IN', 'CH', 'HS')):
+            token = tokens.pop(0)
+            if token[0].isdigit():
+                ttl = _parse_zone_ttl(token, line)
+        if len(tokens) < 2:
+            raise ValueError(f"无法解析的 zone 记录: {line.strip()}")
+        record_type = tokens[0].upper()
+        rdata = tokens[1:]
+
+        if name == '@':
+            fqdn = origin
+        elif name.endswith('.'):
+            fqdn = name.lower()
+        else:
+            fqdn = name.lower() + '.' + origin
+        zone = domain_name.rstrip('.').lower() + '.'
+        if fqdn == zone:
+            rr = '@'
+        elif fqdn.endswith('.' + zone):
+            rr = fqdn[:-len(zone) - 1]
+        else:
+            raise ValueError(f"记录 {fqdn} 不属于域名 {domain_name}")
+
+        if record_type == 'SOA' or (record_type == 'NS' and rr == '@'):
+            continue
+        priority = None
+        if record_type == 'MX':
+            if len(rdata) != 2 or not rdata[0].isdigit():
+                raise ValueError(f"无法解析的 MX 记录: {line.strip()}")
+            priority, value = int(rdata[0]), rdata[1]
+        elif record_type == 'SRV':
+            value = ' '.join(rdata)
+        elif record_type == 'TXT':
+            value = ''.join(part[1:-1] if part.startswith('"') else part for part in rdata)
+        else:
+            value = rdata[0]
+        if record_type in ('CNAME', 'NS', 'MX') and value == '@':
+            value = origin
+        elif record_type in ('CNAME', 'NS', 'MX') and not value.endswith('.'):
+            # 相对名称补全为完整域名
+            value = value + '.' + origin
+        records.append(_make_record(rr, record_type, value, ttl, priority=priority))
+    return records
+
+
+def load_desired_records(path: str, domain_name: str) -> list:
+    """
+    读取期望状态文件：.zone/.db/.bind 按 BIND zone 格式解析，其余按 YAML 解析
+    """
+    path = Path(path)
+    if path.suffix.lower() in ZONE_FILE_SUFFIXES:
+        records = _load_zone_records(path, domain_name)
+    else:
+        records = _load_yaml_records(path)
+
+    # 去除重复的期望记录
+    unique = {}
+    for record in records:
+        unique.setdefault(_record_key(record), record)
+    return list(unique.values())
+
+
+def _priority_changed(current: dict, record: dict) -> bool:
+    priority = record.get('Priority')
+    return priority is not None and int(current.get('Priority') or 0) != priority
+
+
+def plan_sync(existing: list, desired: list, delete_extra: bool = True) -> SyncPlan:
+    """
+    按 (RR, Type, Value, Line) 比对现有记录和期望记录，计算最小变更：
+    - 完全匹配但 TTL（或期望记录指定的 MX 优先级）不同的记录原地更新
+    - 同一 (RR, Type, Line) 下多余的现有记录与缺失的期望记录配对，改为原地更新
+    - 剩余的缺失记录新增，多余记录删除
+    delete_extra=False 时保留所有多余的现有记录，缺失记录一律新增
+    """
+    plan = SyncPlan()
+    existing_by_key = {}
+    for record in existing:
+        existing_by_key.setdefault(_record_key(record), record)
+
+    missing = []
+    matched_ids = set()
+    for record in desired:
+        current = existing_by_key.get(_record_key(record))
+        if current is None:
+            missing.append(record)
+            continue
+        matched_ids.add(current.get('RecordId'))
+        if int(current.get('TTL') or 0) != record['TTL'] or _priority_changed(current, record):
+            plan.updates.append((current.get('RecordId'), record))
+
+    # 未被匹配的现有记录（包括重复记录）按 (RR, Type, Line) 分组，供配对更新或删除
+    extra = {}
+    for record in existing:
+        if record.get('RecordId') in matched_ids:
+            continue
+        key = _record_key(record)
+        extra.setdefault((key[0], key[1], key[3]), []).append(record)
+
+    for record in missing:
+        key = _record_key(record)
+        candidates = extra.get((key[0], key[1], key[3])) if delete_extra else None
+        if candidates:
+            plan.updates.append((candidates.pop(0).get('RecordId'), record))
+        else:
+            plan.adds.append(record)
+
+    if delete_extra:
+        for records in extra.values():
+            plan.deletes.extend(records)
+    return plan
+
+
+def validate_plan(querier, plan: SyncPlan) -> list:
+    """
+    使用 _validate_dns_record 校验所有待新增和待更新的记录，返回不合法的记录
+    """
+    invalid = []
+    for record in plan.adds + [record for _, record in plan.updates]:
+        if record['Type'] == 'MX' and record.get('Priority') is None:
+            print(f"MX 记录 {record['RR']} -> {record['Value']} 缺少优先级")
+            invalid.append(record)
+        elif not querier._validate_dns_record(record['RR'], record['Type'], record['Value'], record['TTL']):
+            invalid.append(record)
+    return invalid
+
+
+def _format_record(record: dict) -> str:
+    value = record.get('Value')
+    if record.get('Priority') is not None:
+        value = f"{record['Priority']} {value}"
+    return f"{record.get('RR'):<20} {record.get('Type'):<8} {value:<40} {record.get('TTL'):<6} {record.get('Line') or 'default'}"
+
+
+def print_plan(domain_name: str, plan: SyncPlan):
+    """
+    输出同步计划
+    """
+    print("\n" + "="*90)
+    print(f"域名 {domain_name} 的同步计划".center(90))
+    print("="*90)
+    if plan.is_empty():
+        print("现有记录与期望状态一致，无需变更。")
+    for record in plan.adds:
+        print(f"+ {_format_record(record)}")
+    for record_id, record in plan.updates:
+        print(f"~ {_format_record(record)} (ID: {record_id})")
+    for record in plan.deletes:
+        print(f"- {_format_record(record)} (ID: {record.get('RecordId')})")
+    print("-"*90)
+    print(f"新增 {len(plan.adds)} 条，更新 {len(plan.updates)} 条，删除 {len(plan.deletes)} 条")
+    print("="*90)
+
+
+def apply_plan(querier, domain_name: str, plan: SyncPlan, workers: int = SYNC_WORKERS) -> dict:
+    """
+    并发执行同步计划。按 删除 -> 更新 -> 新增 的顺序分阶段执行，
+    避免同名 CNAME 与其他记录冲突；返回各类操作的成功、失败数。
+    """
+    def delete(record):
+        return querier.delete_domain_record(record.get('RecordId'))
+
+    def update(item):
+        record_id, record = item
+        return querier.update_domain_record(
+            record_id, record['RR'], record['Type'], record['Value'], record['TTL'], line=record['Line'],
+            priority=record.get('Priority'),
+        )
+
+    def add(record):
+        return querier.add_domain_record(
+            domain_name, record['RR'], record['Type'], record['Value'], record['TTL'], line=record['Line'],
+            priority=record.get('Priority'),
+        )
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for name, func, items in (("delete", delete, plan.deletes), ("update", update, plan.updates), ("add", add, plan.adds)):
+            outcomes = list(executor.map(func, items))
+            results[name] = {"succeeded": sum(1 for ok in outcomes if ok), "failed": sum(1 for ok in outcomes if not ok)}
+    return results
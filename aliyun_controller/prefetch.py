@@ -0,0 +1,85 @@
+"""
+后台预取：主菜单显示期间在后台线程中拉取当月账单、域名列表和最近管理的域名的解析记录，
+结果写入会话内缓存，用户第一次选择菜单时通常无需等待。
+
+预取线程的输出被丢弃，失败或只拿到部分结果时静默放弃，前台查询会照常重新拉取并报告错误；
+前台查询与尚未完成的预取请求同一份数据时，会等待预取结果而不是重复下载。
+"""
+import datetime
+import threading
+
+from aliyun_controller import console, profiling
+
+# 记录最近管理的域名时使用的状态键
+LAST_DOMAIN_KEY = "last_domain"
+
+
+def _prefetch_bill(billing_cycle: str):
+    from aliyun_controller.modules.bill_reports import get_bill_session
+
+    with profiling.phase('prefetch.bill'):
+        get_bill_session().run_reports(billing_cycle)
+
+
+def _prefetch_dns(last_domain: str = None):
+    from aliyun_controller.modules.dns import get_dns_querier
+
+    querier = get_dns_querier()
+    with profiling.phase('prefetch.domains'):
+        domains = querier.get_domains()
+    if last_domain and any(domain.get('DomainName') == last_domain for domain in domains):
+        with profiling.phase('prefetch.records'):
+            querier.get_domain_records(last_domain)
+
+
+def _run_quietly(target, *args):
+    # 静默状态经 console.propagate 传给预取启动的线程池和生产者线程
+    with console.quiet():
+        try:
+            target(*args)
+        except Exception:
+            # 预取只是优化，失败时交给前台查询处理
+            pass
+
+
+def _prefetch_accounts_bill(billing_cycle: str, profiles: list):
+    from aliyun_controller.modules.accounts import compute_accounts_billing
+
+    with profiling.phase('prefetch.bill'):
+        compute_accounts_billing(billing_cycle, profiles)
+
+
+def start_prefetch(records: bool = True, profiles: list = None) -> list:
+    """
+    启动后台预取线程（守护线程，不会阻止程序退出），返回启动的线程列表。
+    records=True 时同时预取最近管理的域名的解析记录；
+    指定多个账号（profiles）时只预取各账号的当月账单，DNS 管理需要先选择账号，不做预取。
+    """
+    from aliyun_controller.config import load_state
+
+    console.install_stream_filters()
+    billing_cycle = datetime.datetime.now().strftime("%Y-%m")
+    if profiles:
+        thread = threading.Thread(
+            target=_run_quietly, args=(_prefetch_accounts_bill, billing_cycle, profiles), name="prefetch-bill", daemon=True
+        )
+        thread.start()
+        return [thread]
+
+    last_domain = load_state().get(LAST_DOMAIN_KEY) if records else None
+    threads = [
+        threading.Thread(target=_run_quietly, args=(_prefetch_bill, billing_cycle), name="prefetch-bill", daemon=True),
+        threading.Thread(target=_run_quietly, args=(_prefetch_dns, last_domain), name="prefetch-dns", daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def remember_domain(domain_name: str):
+    """
+    记录最近管理的域名，供下次启动时预取其解析记录
+    """
+    from aliyun_controller.config import update_state
+
+    update_state(**{LAST_DOMAIN_KEY: domain_name})
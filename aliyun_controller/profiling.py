@@ -0,0 +1,200 @@
+"""
+性能剖析：记录每次接口调用的耗时、分页数、条目数和响应大小，以及聚合、输出等阶段的耗时。
+默认关闭，通过 --profile 开启后在程序退出时输出各操作的 p50/p95/max 统计。
+"""
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_enabled = False
+_lock = threading.Lock()
+# 操作名 -> 统计数据；接口调用与阶段分开存放
+_calls = {}
+_phases = {}
+
+
+def enable_profiling():
+    global _enabled
+    _enabled = True
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _calls.clear()
+        _phases.clear()
+
+
+def _new_call_stats() -> dict:
+    return {"latencies": [], "errors": 0, "items": 0, "bytes": 0}
+
+
+def _response_size(response) -> int:
+    """
+    响应大小：优先取 Content-Length，没有时按响应体序列化后的长度估算
+    """
+    headers = getattr(response, 'headers', None) or {}
+    for key, value in headers.items():
+        if key.lower() == 'content-length':
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                break
+    body = getattr(response, 'body', None)
+    if body is None or not hasattr(body, 'to_map'):
+        return 0
+    try:
+        return len(json.dumps(body.to_map(), ensure_ascii=False).encode('utf-8'))
+    except (TypeError, ValueError):
+        return 0
+
+
+def record_call(operation: str, seconds: float, response=None, error: Exception = None):
+    """
+    记录一次接口调用（每次尝试单独计入，包括被限流后的重试）
+    """
+    if not _enabled:
+        return
+    size = _response_size(response) if response is not None else 0
+    with _lock:
+        stats = _calls.setdefault(operation, _new_call_stats())
+        stats["latencies"].append(seconds)
+        stats["bytes"] += size
+        if error is not None:
+            stats["errors"] += 1
+
+
+def record_items(operation: str, count: int):
+    """
+    记录一次接口调用返回的条目数（账单明细、解析记录、域名等）
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _calls.setdefault(operation, _new_call_stats())["items"] += count
+
+
+def record_phase(name: str, seconds: float):
+    if not _enabled:
+        return
+    with _lock:
+        _phases.setdefault(name, []).append(seconds)
+
+
+@contextmanager
+def phase(name: str):
+    """
+    统计一个代码阶段的耗时，未开启剖析时几乎没有开销
+    """
+    if not _enabled:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - started)
+
+
+def _percentile(sorted_values: list, percent: float) -> float:
+    # 最近秩法
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _summarize(latencies: list) -> dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "total_ms": sum(values) * 1000,
+        "p50_ms": _percentile(values, 50) * 1000,
+        "p95_ms": _percentile(values, 95) * 1000,
+        "max_ms": (values[-1] if values else 0.0) * 1000,
+    }
+
+
+def get_report() -> dict:
+    """
+    汇总当前的剖析数据，结构可直接序列化为 JSON
+    """
+    with _lock:
+        calls = {name: dict(stats, latencies=list(stats["latencies"])) for name, stats in _calls.items()}
+        phases = {name: list(values) for name, values in _phases.items()}
+
+    report = {"generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "calls": {}, "phases": {}}
+    for name, stats in sorted(calls.items()):
+        summary = _summarize(stats["latencies"])
+        summary.update({
+            "pages": summary["count"] - stats["errors"],
+            "errors": stats["errors"],
+            "items": stats["items"],
+            "bytes": stats["bytes"],
+        })
+        report["calls"][name] = summary
+    for name, values in sorted(phases.items()):
+        report["phases"][name] = _summarize(values)
+    return report
+
+
+def print_report(report: dict = None, file=None):
+    """
+    以表格形式输出剖析结果（默认输出到 stderr，不影响子命令的标准输出）
+    """
+    report = report or get_report()
+    file = file or sys.stderr
+    print("\n" + "="*100, file=file)
+    print("性能剖析".center(100), file=file)
+    print("="*100, file=file)
+    if report["calls"]:
+        print(f"{'接口调用':<26} {'次数':>6} {'失败':>5} {'条目':>8} {'响应KB':>10} {'p50(ms)':>9} {'p95(ms)':>9} {'max(ms)':>9} {'合计(ms)':>10}", file=file)
+        print("-"*100, file=file)
+        for name, stats in report["calls"].items():
+            print(
+                f"{name:<26} {stats['count']:>6} {stats['errors']:>5} {stats['items']:>8} {stats['bytes'] / 1024:>10.1f} "
+                f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['max_ms']:>9.1f} {stats['total_ms']:>10.1f}",
+                file=file,
+            )
+    if report["phases"]:
+        if report["calls"]:
+            print("-"*100, file=file)
+        print(f"{'阶段':<26} {'次数':>6} {'':>5} {'':>8} {'':>10} {'p50(ms)':>9} {'p95(ms)':>9} {'max(ms)':>9} {'合计(ms)':>10}", file=file)
+        print("-"*100, file=file)
+        for name, stats in report["phases"].items():
+            print(
+                f"{name:<26} {stats['count']:>6} {'':>5} {'':>8} {'':>10} "
+                f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['max_ms']:>9.2f} {stats['total_ms']:>10.2f}",
+                file=file,
+            )
+    if not report["calls"] and not report["phases"]:
+        print("没有记录到任何接口调用。", file=file)
+    print("="*100, file=file)
+
+
+def dump_report(path: str, report: dict = None):
+    """
+    将剖析结果写入 JSON 文件，便于长期跟踪趋势
+    """
+    report = report or get_report()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def finish(json_path: str = None):
+    """
+    程序退出时调用：输出剖析表格，并按需写入 JSON
+    """
+    report = get_report()
+    print_report(report)
+    if json_path:
+        try:
+            dump_report(json_path, report)
+            print(f"剖析结果已写入 {json_path}", file=sys.stderr)
+        except OSError as e:
+            print(f"写入剖析结果失败: {e}", file=sys.stderr)
@@ -0,0 +1,249 @@
+"""
+所有 SDK 调用共享的请求层：按接口限速、遇到限流或临时错误时退避重试，
+并用 AIMD 自适应调整每个接口的请求速率和同时在途的请求数。每次尝试的耗时都会计入性能剖析。
+"""
+import asyncio
+import random
+import threading
+import time
+
+from aliyun_controller import profiling
+
+# 每个接口的初始、最小和最大 QPS
+DEFAULT_RATE = 10.0
+MIN_RATE = 0.5
+MAX_RATE = 50.0
+# 每次成功请求后速率的加性增量（约每秒请求数的 1/10 次成功提升 1 QPS）
+RATE_INCREASE = 0.1
+# 被限流后速率的乘性衰减系数
+RATE_DECREASE = 0.5
+# 每个接口同时在途请求数的初始、最小和最大值
+DEFAULT_CONCURRENCY = 8
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 32
+# 每次成功请求后并发上限的加性增量；被限流后与速率一样按 RATE_DECREASE 减半
+CONCURRENCY_INCREASE = 0.1
+# 异步调用等待空闲并发名额时的轮询间隔，单位秒（限速器同时被线程和协程使用，无法共用一个条件变量）
+ASYNC_SLOT_POLL_INTERVAL = 0.01
+# 最多尝试次数（含首次请求）
+MAX_ATTEMPTS = 6
+# 退避等待的基准与上限，单位秒
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 20.0
+
+# 视为临时错误、可以重试的错误码
+_TRANSIENT_CODES = ('ServiceUnavailable', 'InternalError', 'ServiceBusy', 'RequestTimeout')
+
+
+def _unwrap(error: Exception) -> Exception:
+    """
+    SDK 把网络异常等包装为 UnretryableException，原始异常保存在 inner_exception 中
+    """
+    while getattr(error, 'inner_exception', None) is not None:
+        error = error.inner_exception
+    return error
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """
+    是否为限流错误（请求已被服务端拒绝，重试是安全的）
+    """
+    error = _unwrap(error)
+    code = str(getattr(error, 'code', '') or '')
+    status_code = getattr(error, 'status_code', None) or getattr(error, 'statusCode', None)
+    return (
+        type(error).__name__ == 'ThrottlingException'
+        or 'Throttling' in code
+        or status_code == 429
+    )
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    是否为网络异常、超时或服务端临时错误
+    """
+    error = _unwrap(error)
+    if isinstance(error, (OSError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    if type(error).__name__ == 'RetryError':
+        return True
+    code = str(getattr(error, 'code', '') or '')
+    if any(code.startswith(transient) for transient in _TRANSIENT_CODES):
+        return True
+    status_code = getattr(error, 'status_code', None) or getattr(error, 'statusCode', None)
+    return isinstance(status_code, int) and status_code >= 500
+
+
+class AdaptiveRateLimiter:
+    """
+    单个接口的令牌桶和并发上限。速率和并发上限都按 AIMD 调整：成功时加性增加，被限流时乘性减少，
+    最终稳定在账号允许的最高 QPS 附近；慢接口被限流时在途请求数也随之收缩，
+    而不是仍由调用方的线程池大小决定。
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, min_rate: float = MIN_RATE, max_rate: float = MAX_RATE,
+                 concurrency: float = DEFAULT_CONCURRENCY, min_concurrency: int = MIN_CONCURRENCY,
+                 max_concurrency: int = MAX_CONCURRENCY):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.concurrency = concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self._tokens = 1.0
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._slot_released = threading.Condition(self._lock)
+
+    @property
+    def concurrency_limit(self) -> int:
+        """
+        当前允许同时在途的请求数
+        """
+        return max(self.min_concurrency, int(self.concurrency))
+
+    def reserve(self) -> float:
+        """
+        预占一个令牌，返回需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            # 桶容量为 1 秒的请求量，避免空闲后瞬间突发
+            capacity = max(1.0, self.rate)
+            self._tokens = min(capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def try_acquire(self) -> bool:
+        """
+        有空闲的并发名额时占用一个并返回 True
+        """
+        with self._lock:
+            if self.in_flight >= self.concurrency_limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(self):
+        """
+        占用一个并发名额，没有空闲名额时阻塞等待
+        """
+        with self._lock:
+            while self.in_flight >= self.concurrency_limit:
+                self._slot_released.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._slot_released.notify_all()
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+            previous_limit = self.concurrency_limit
+            self.concurrency = min(self.max_concurrency, self.concurrency + CONCURRENCY_INCREASE)
+            if self.concurrency_limit > previous_limit:
+                self._slot_released.notify_all()
+
+    def on_throttled(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * RATE_DECREASE)
+            self.concurrency = max(self.min_concurrency, self.concurrency * RATE_DECREASE)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(api_name: str, scope: str = None) -> AdaptiveRateLimiter:
+    """
+    获取接口对应的共享限速器。阿里云按账号限流，scope（账号名称）不同的调用使用各自的限速器
+    """
+    key = api_name if scope is None else (scope, api_name)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = AdaptiveRateLimiter()
+        return limiter
+
+
+def _backoff_delay(attempt: int, error: Exception) -> float:
+    """
+    指数退避 + 全抖动；服务端给出 retry_after 时以其为准
+    """
+    retry_after = getattr(_unwrap(error), 'retry_after', None)
+    if isinstance(retry_after, (int, float)) and retry_after > 0:
+        # retry_after 单位为毫秒
+        return min(BACKOFF_MAX, retry_after / 1000)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _should_retry(error: Exception, idempotent: bool) -> bool:
+    if is_throttling_error(error):
+        return True
+    # 非幂等请求（如新增记录）遇到网络错误时无法确定是否已生效，不重试
+    return idempotent and is_transient_error(error)
+
+
+def call_api(api_name: str, func, *args, idempotent: bool = True, scope: str = None, **kwargs):
+    """
+    经限速和重试调用同步 SDK 方法；退避等待期间不占用并发名额
+    """
+    limiter = get_limiter(api_name, scope)
+    for attempt in range(MAX_ATTEMPTS):
+        limiter.acquire()
+        try:
+            time.sleep(limiter.reserve())
+            started = time.perf_counter()
+            try:
+                result, error = func(*args, **kwargs), None
+            except Exception as e:
+                result, error = None, e
+            seconds = time.perf_counter() - started
+        finally:
+            limiter.release()
+        if error is None:
+            profiling.record_call(api_name, seconds, response=result)
+            limiter.on_success()
+            return result
+        profiling.record_call(api_name, seconds, error=error)
+        if is_throttling_error(error):
+            limiter.on_throttled()
+        if attempt == MAX_ATTEMPTS - 1 or not _should_retry(error, idempotent):
+            raise error
+        time.sleep(_backoff_delay(attempt, error))
+
+
+async def call_api_async(api_name: str, func, *args, idempotent: bool = True, scope: str = None, **kwargs):
+    """
+    经限速和重试调用异步 SDK 方法（*_async），与同步调用共享限速器和并发名额
+    """
+    limiter = get_limiter(api_name, scope)
+    for attempt in range(MAX_ATTEMPTS):
+        while not limiter.try_acquire():
+            await asyncio.sleep(ASYNC_SLOT_POLL_INTERVAL)
+        try:
+            await asyncio.sleep(limiter.reserve())
+            started = time.perf_counter()
+            try:
+                result, error = await func(*args, **kwargs), None
+            except Exception as e:
+                result, error = None, e
+            seconds = time.perf_counter() - started
+        finally:
+            limiter.release()
+        if error is None:
+            profiling.record_call(api_name, seconds, response=result)
+            limiter.on_success()
+            return result
+        profiling.record_call(api_name, seconds, error=error)
+        if is_throttling_error(error):
+            limiter.on_throttled()
+        if attempt == MAX_ATTEMPTS - 1 or not _should_retry(error, idempotent):
+            raise error
+        await asyncio.sleep(_backoff_delay(attempt, error))
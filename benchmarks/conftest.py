@@ -0,0 +1,168 @@
+"""
+基准测试的公共夹具：在子进程中启动本地模拟服务（避免与被测代码争抢 GIL），
+让 aliyunctl 的客户端连接到它，并在测试结束后汇总输出 items/s、耗时和内存峰值。
+
+数据规模和延迟可通过环境变量调整:
+    BENCH_BILL_ITEMS        每个账单周期的账单明细条数（默认 20000）
+    BENCH_DOMAINS           域名数量（默认 20）
+    BENCH_RECORDS           每个域名的解析记录数（默认 1000）
+    BENCH_LATENCY           每个请求注入的延迟，单位秒（默认 0.005）
+    BENCH_JSON              将结果写入该 JSON 文件
+"""
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+import yaml
+
+BENCH_DIR = Path(__file__).resolve().parent
+BILL_ITEMS = int(os.environ.get("BENCH_BILL_ITEMS", 20000))
+DOMAINS = int(os.environ.get("BENCH_DOMAINS", 20))
+RECORDS_PER_DOMAIN = int(os.environ.get("BENCH_RECORDS", 1000))
+LATENCY = float(os.environ.get("BENCH_LATENCY", 0.005))
+
+_results = []
+
+
+class FakeServerProcess:
+    def __init__(self, process: subprocess.Popen, endpoint: str, options: dict):
+        self.process = process
+        self.endpoint = endpoint
+        self.options = options
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait(timeout=10)
+
+
+def start_fake_server(**options) -> FakeServerProcess:
+    """
+    启动模拟服务子进程，options 对应 fake_aliyun.py 的命令行参数
+    """
+    args = [sys.executable, str(BENCH_DIR / "fake_aliyun.py"), "--port", "0"]
+    for key, value in options.items():
+        args += [f"--{key.replace('_', '-')}", str(value)]
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, text=True)
+    endpoint = process.stdout.readline().strip()
+    if not endpoint:
+        process.kill()
+        raise RuntimeError("模拟服务启动失败")
+    return FakeServerProcess(process, endpoint, options)
+
+
+def use_fake_server(server: FakeServerProcess, config_dir: Path):
+    """
+    写入指向模拟服务的配置，并让后续创建的客户端使用它
+    """
+    from aliyun_controller import ratelimit
+    from aliyun_controller.clients import reset_clients
+
+    config_dir.mkdir(parents=True, exist_ok=True)
+    with open(config_dir / "config.yaml", "w", encoding="utf-8") as f:
+        yaml.safe_dump({
+            "access_key_id": "bench",
+            "access_key_secret": "bench",
+            "endpoints": {
+                service: {"endpoint": server.endpoint, "protocol": "http"} for service in ("bss", "dns")
+            },
+        }, f)
+    os.environ["ALIYUN_CONTROLLER_CONFIG_DIR"] = str(config_dir)
+    # 基准测量的是客户端自身的吞吐，不使用本地缓存
+    os.environ["ALIYUN_CONTROLLER_REFRESH"] = "1"
+    reset_clients()
+    ratelimit._limiters.clear()
+
+
+def unthrottled():
+    """
+    放开各接口的限速，使测量结果反映客户端处理能力而不是默认 QPS
+    """
+    from aliyun_controller import ratelimit
+
+    for api_name in ("describe_instance_bill", "describe_domains", "describe_domain_records"):
+        ratelimit._limiters[api_name] = ratelimit.AdaptiveRateLimiter(rate=10000, max_rate=10000)
+
+
+@pytest.fixture(scope="session")
+def fake_server(tmp_path_factory):
+    server = start_fake_server(
+        bill_items=BILL_ITEMS,
+        domains=DOMAINS,
+        records_per_domain=RECORDS_PER_DOMAIN,
+        latency=LATENCY,
+    )
+    try:
+        yield server
+    finally:
+        server.stop()
+
+
+@pytest.fixture
+def aliyun_env(fake_server, tmp_path):
+    use_fake_server(fake_server, tmp_path / "config")
+    unthrottled()
+    return fake_server
+
+
+@pytest.fixture
+def bench():
+    """
+    bench(name, func, count) 先正常运行一次测量耗时，再在 tracemalloc 下运行一次测量内存峰值。
+    count(result) 返回本次处理的条目数；返回第一次运行的结果。
+    """
+    def run(name: str, func, count=len):
+        gc.collect()
+        started = time.perf_counter()
+        result = func()
+        wall = time.perf_counter() - started
+        items = count(result)
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        _results.append({
+            "name": name,
+            "items": items,
+            "wall_s": wall,
+            "items_per_s": items / wall if wall else 0.0,
+            "peak_mb": peak / (1024 * 1024),
+        })
+        return result
+    return run
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    write = terminalreporter.write_line
+    terminalreporter.section("benchmarks")
+    write(f"{'name':<36} {'items':>10} {'wall(s)':>9} {'items/s':>12} {'peak(MB)':>10}")
+    for result in _results:
+        write(
+            f"{result['name']:<36} {result['items']:>10} {result['wall_s']:>9.3f} "
+            f"{result['items_per_s']:>12.0f} {result['peak_mb']:>10.1f}"
+        )
+    json_path = os.environ.get("BENCH_JSON")
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "config": {
+                    "bill_items": BILL_ITEMS,
+                    "domains": DOMAINS,
+                    "records_per_domain": RECORDS_PER_DOMAIN,
+                    "latency": LATENCY,
+                },
+                "results": _results,
+            }, f, ensure_ascii=False, indent=2)
+        write(f"benchmark results written to {json_path}")
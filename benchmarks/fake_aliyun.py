@@ -0,0 +1,422 @@
+"""
+本地模拟的 BSS / Alidns 接口服务，用于离线测量账单和 DNS 路径的性能
+
+支持的接口（RPC 风格，按 Action 参数分发，不校验签名）:
+- DescribeInstanceBill: NextToken 分页，账单条数可配置到数百万条，按序号确定性生成；支持 Granularity=DAILY 按日查询
+- DescribeDomains / DescribeDomainRecords: PageNumber 分页
+- AddDomainRecord / UpdateDomainRecord / DeleteDomainRecord: 修改保存在内存中
+
+可注入固定延迟，以及每 N 个请求返回一次限流错误（附带 x-acs-retry-after 头）或 503 服务端错误；
+也可以让指定付费类型的账单查询一直失败，模拟部分分页链出错。
+
+用法:
+    python benchmarks/fake_aliyun.py [--port 8000] [--bill-items 100000] [--latency 0.02] [--throttle-every 50]
+
+启动后在 config.yaml 中加入以下配置即可让 aliyunctl 连接到本服务:
+    endpoints:
+      bss: {endpoint: "127.0.0.1:8000", protocol: http}
+      dns: {endpoint: "127.0.0.1:8000", protocol: http}
+"""
+import argparse
+import itertools
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+SUBSCRIPTION_TYPES = ("PayAsYouGo", "Subscription")
+RECORD_TYPES = ("A", "CNAME", "TXT", "AAAA", "MX")
+
+# 生成账单明细时轮换使用的取值：(产品代码, 产品名称, 计费项代码, 计费项, 用量单位)
+_BILL_PRODUCTS = (
+    ("ecs", "云服务器 ECS", "ECS_Out_Bytes", "公网流出流量", "GB"),
+    ("ecs", "云服务器 ECS", "Cpu", "计算资源", "Core*Hour"),
+    ("oss", "对象存储 OSS", "OSS_Out_Traffic", "外网流出流量", "MB"),
+    ("oss", "对象存储 OSS", "Storage", "标准存储容量", "GB*Hour"),
+    ("cdn", "CDN", "Cdn_domestic_flow", "中国内地流量", "GB"),
+    ("eip", "弹性公网 IP", "Eip_Out_Bytes", "公网流出流量", "KB"),
+    ("slb", "负载均衡 SLB", "InstanceRent", "实例费", "Hour"),
+    ("rds", "云数据库 RDS", "DiskUsage", "存储空间", "GB*Hour"),
+)
+_REGIONS = ("cn-hangzhou", "cn-shanghai", "cn-beijing", "cn-hongkong", "ap-southeast-1")
+_RESOURCE_GROUPS = ("默认资源组", "生产环境", "测试环境")
+
+
+class FakeAliyunState:
+    """
+    模拟服务的数据和故障注入参数
+    """
+
+    def __init__(self, bill_items: int = 10000, domains: int = 20, records_per_domain: int = 200,
+                 latency: float = 0.0, throttle_every: int = 0, retry_after_ms: int = 100,
+                 billing_cycle_days: int = 30, server_error_every: int = 0,
+                 failing_subscription_types: tuple = ()):
+        self.bill_items = bill_items
+        self.domain_count = domains
+        self.records_per_domain = records_per_domain
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.retry_after_ms = retry_after_ms
+        self.server_error_every = server_error_every
+        self.failing_subscription_types = tuple(failing_subscription_types)
+        self.billing_cycle_days = billing_cycle_days
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._records = {}
+        self._next_record_id = itertools.count(10**12)
+        self.requests = {}
+
+    def count_request(self, action: str) -> str:
+        """
+        统计请求数，返回本次请求应注入的错误："throttling"、"server_error" 或 None
+        """
+        with self._lock:
+            self.requests[action] = self.requests.get(action, 0) + 1
+        sequence = next(self._counter)
+        if self.throttle_every and sequence % self.throttle_every == 0:
+            return "throttling"
+        if self.server_error_every and sequence % self.server_error_every == 0:
+            return "server_error"
+        return None
+
+    # ---- 账单 ----
+
+    def bill_item(self, billing_cycle: str, subscription_type: str, index: int) -> dict:
+        product_code, product_name, item_code, item_name, unit = _BILL_PRODUCTS[index % len(_BILL_PRODUCTS)]
+        day = index % self.billing_cycle_days + 1
+        instance = index % 997
+        return {
+            "BillingDate": f"{billing_cycle}-{day:02d}",
+            "ProductCode": product_code,
+            "ProductName": product_name,
+            "SubscriptionType": subscription_type,
+            "BillingItemCode": item_code,
+            "BillingItem": item_name,
+            "InstanceID": f"i-{product_code}{instance:06d}",
+            "Region": _REGIONS[instance % len(_REGIONS)],
+            "ResourceGroup": _RESOURCE_GROUPS[instance % len(_RESOURCE_GROUPS)],
+            "Tag": f"key:env value:{('prod', 'test')[instance % 2]}",
+            "Usage": f"{(index % 1000) / 10 + 0.1:.4f}",
+            "UsageUnit": unit,
+            "PretaxAmount": round((index % 5000) / 100 + 0.01, 2),
+            "PretaxGrossAmount": round((index % 5000) / 100 + 0.01, 2),
+            "Currency": "CNY",
+        }
+
+    def bill_items_for(self, subscription_type: str) -> int:
+        # 两种付费类型按 3:1 分配
+        pay_as_you_go = self.bill_items * 3 // 4
+        return pay_as_you_go if subscription_type == "PayAsYouGo" else self.bill_items - pay_as_you_go
+
+    def describe_instance_bill(self, params: dict) -> dict:
+        billing_cycle = params.get("BillingCycle", "")
+        subscription_type = params.get("SubscriptionType", "PayAsYouGo")
+        if subscription_type in self.failing_subscription_types:
+            raise FakeApiError(400, "InvalidParameter.SubscriptionType", f"Cannot query {subscription_type} bills.")
+        max_results = min(int(params.get("MaxResults") or 20), 300)
+        offset = int(params.get("NextToken") or 0)
+        total = self.bill_items_for(subscription_type)
+        if params.get("Granularity") == "DAILY":
+            # 按日查询时只返回 BillingDate 为该日的明细，即序号 day-1, day-1+days, ...
+            billing_date = params.get("BillingDate", "")
+            day = int(billing_date[8:10] or 0) if billing_date.startswith(billing_cycle) else 0
+            days = self.billing_cycle_days
+            first = day - 1
+            total = (total - first + days - 1) // days if 0 <= first < min(days, total) else 0
+            end = min(offset + max_results, total)
+            indexes = range(first + offset * days, first + end * days, days)
+        else:
+            end = min(offset + max_results, total)
+            indexes = range(offset, end)
+        items = [self.bill_item(billing_cycle, subscription_type, index) for index in indexes]
+        return {
+            "Code": "Success",
+            "Message": "Successful!",
+            "Success": True,
+            "Data": {
+                "BillingCycle": billing_cycle,
+                "AccountID": "1000000000000000",
+                "TotalCount": total,
+                "MaxResults": max_results,
+                "NextToken": str(end) if end < total else "",
+                "Items": items,
+            },
+        }
+
+    # ---- DNS ----
+
+    def domain_names(self) -> list:
+        return [f"example{i}.com" for i in range(self.domain_count)]
+
+    def _domain_records(self, domain_name: str) -> list:
+        with self._lock:
+            records = self._records.get(domain_name)
+            if records is None:
+                records = self._records[domain_name] = [
+                    self._make_record(domain_name, f"host{i}", RECORD_TYPES[i % len(RECORD_TYPES)], i)
+                    for i in range(self.records_per_domain)
+                ]
+            return records
+
+    def _make_record(self, domain_name: str, rr: str, record_type: str, seed: int, value: str = None,
+                     ttl: int = 600, line: str = "default", priority: int = None) -> dict:
+        if value is None:
+            value = {
+                "A": f"10.{seed // 65536 % 256}.{seed // 256 % 256}.{seed % 256}",
+                "AAAA": f"2001:db8::{seed:x}",
+                "CNAME": f"target{seed}.example.net",
+                "MX": f"mx{seed}.example.net",
+                "TXT": f"v=spf1 include:spf{seed}.example.net ~all",
+            }[record_type]
+        record = {
+            "DomainName": domain_name,
+            "RecordId": str(next(self._next_record_id)),
+            "RR": rr,
+            "Type": record_type,
+            "Value": value,
+            "TTL": ttl,
+            "Line": line,
+            "Status": "ENABLE",
+            "Locked": False,
+            "Weight": 1,
+        }
+        if record_type == "MX":
+            record["Priority"] = priority or 10
+        return record
+
+    def describe_domains(self, params: dict) -> dict:
+        page_number = int(params.get("PageNumber") or 1)
+        page_size = int(params.get("PageSize") or 20)
+        names = self.domain_names()
+        page = names[(page_number - 1) * page_size:page_number * page_size]
+        return {
+            "TotalCount": len(names),
+            "PageNumber": page_number,
+            "PageSize": page_size,
+            "Domains": {"Domain": [
+                {"DomainName": name, "DomainId": f"d-{i}", "RecordCount": self.records_per_domain}
+                for i, name in enumerate(page, start=(page_number - 1) * page_size)
+            ]},
+        }
+
+    def describe_domain_records(self, params: dict) -> dict:
+        domain_name = params.get("DomainName", "")
+        if domain_name not in self.domain_names():
+            raise FakeApiError(400, "InvalidDomainName.NoExist", "The specified domain name does not exist.")
+        page_number = int(params.get("PageNumber") or 1)
+        page_size = int(params.get("PageSize") or 20)
+        records = self._domain_records(domain_name)
+        with self._lock:
+            page = [dict(record) for record in records[(page_number - 1) * page_size:page_number * page_size]]
+            total = len(records)
+        return {
+            "TotalCount": total,
+            "PageNumber": page_number,
+            "PageSize": page_size,
+            "DomainRecords": {"Record": page},
+        }
+
+    def add_domain_record(self, params: dict) -> dict:
+        domain_name = params.get("DomainName", "")
+        if domain_name not in self.domain_names():
+            raise FakeApiError(400, "InvalidDomainName.NoExist", "The specified domain name does not exist.")
+        records = self._domain_records(domain_name)
+        record = self._make_record(
+            domain_name, params.get("RR", "@"), params.get("Type", "A"), 0, value=params.get("Value", ""),
+            ttl=int(params.get("TTL") or 600), line=params.get("Line") or "default",
+            priority=int(params["Priority"]) if params.get("Priority") else None,
+        )
+        with self._lock:
+            records.append(record)
+        return {"RecordId": record["RecordId"]}
+
+    def _find_record(self, record_id: str) -> tuple:
+        with self._lock:
+            for records in self._records.values():
+                for position, record in enumerate(records):
+                    if record["RecordId"] == record_id:
+                        return records, position
+        raise FakeApiError(400, "DomainRecordNotBelongToUser", "The DNS record does not exist.")
+
+    def update_domain_record(self, params: dict) -> dict:
+        record_id = params.get("RecordId", "")
+        records, position = self._find_record(record_id)
+        with self._lock:
+            record = records[position]
+            record.update({
+                "RR": params.get("RR", record["RR"]),
+                "Type": params.get("Type", record["Type"]),
+                "Value": params.get("Value", record["Value"]),
+                "TTL": int(params.get("TTL") or record["TTL"]),
+                "Line": params.get("Line") or record["Line"],
+            })
+            if params.get("Priority"):
+                record["Priority"] = int(params["Priority"])
+        return {"RecordId": record_id}
+
+    def delete_domain_record(self, params: dict) -> dict:
+        record_id = params.get("RecordId", "")
+        records, position = self._find_record(record_id)
+        with self._lock:
+            del records[position]
+        return {"RecordId": record_id}
+
+    def dispatch(self, action: str, params: dict) -> dict:
+        handler = {
+            "DescribeInstanceBill": self.describe_instance_bill,
+            "DescribeDomains": self.describe_domains,
+            "DescribeDomainRecords": self.describe_domain_records,
+            "AddDomainRecord": self.add_domain_record,
+            "UpdateDomainRecord": self.update_domain_record,
+            "DeleteDomainRecord": self.delete_domain_record,
+        }.get(action)
+        if handler is None:
+            raise FakeApiError(400, "InvalidAction.NotFound", f"Specified api is not found: {action}")
+        return handler(params)
+
+
+class FakeApiError(Exception):
+    def __init__(self, status: int, code: str, message: str, headers: dict = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+        self.headers = headers or {}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeAliyun/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _params(self) -> dict:
+        params = dict(parse_qsl(urlsplit(self.path).query, keep_blank_values=True))
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            body = self.rfile.read(length).decode("utf-8")
+            params.update(parse_qsl(body, keep_blank_values=True))
+        return params
+
+    def _send(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        state = self.server.state
+        params = self._params()
+        # RPC 签名的请求在参数中携带 Action，V3 签名的请求放在 x-acs-action 头中
+        action = params.get("Action") or self.headers.get("x-acs-action", "")
+        request_id = str(uuid.uuid4()).upper()
+        fault = state.count_request(action)
+        if state.latency:
+            time.sleep(state.latency)
+        try:
+            if fault == "throttling":
+                raise FakeApiError(
+                    400, "Throttling.User", "Request was denied due to user flow control.",
+                    headers={"x-acs-retry-after": str(state.retry_after_ms)},
+                )
+            if fault == "server_error":
+                raise FakeApiError(503, "ServiceUnavailable", "The request has failed due to a temporary failure of the server.")
+            payload = state.dispatch(action, params)
+        except FakeApiError as e:
+            self._send(e.status, {"RequestId": request_id, "Code": e.code, "Message": e.message}, e.headers)
+            return
+        except (KeyError, ValueError) as e:
+            self._send(400, {"RequestId": request_id, "Code": "InvalidParameter", "Message": str(e)})
+            return
+        self._send(200, {"RequestId": request_id, **payload})
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+class FakeAliyunServer:
+    """
+    在后台线程中运行的模拟服务，可作为上下文管理器使用
+    """
+
+    def __init__(self, state: FakeAliyunState = None, host: str = "127.0.0.1", port: int = 0):
+        self.state = state or FakeAliyunState()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.state = self.state
+        self._thread = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    def endpoints_config(self) -> dict:
+        """
+        返回可以直接写入 config.yaml 的 endpoints 段
+        """
+        return {service: {"endpoint": self.endpoint, "protocol": "http"} for service in ("bss", "dns")}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟的 BSS / Alidns 接口服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000, help="监听端口，0 表示随机端口")
+    parser.add_argument("--bill-items", type=int, default=10000, help="每个账单周期的账单明细条数")
+    parser.add_argument("--domains", type=int, default=20, help="域名数量")
+    parser.add_argument("--records-per-domain", type=int, default=200, help="每个域名的初始解析记录数")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求注入的延迟（秒）")
+    parser.add_argument("--throttle-every", type=int, default=0, help="每 N 个请求返回一次限流错误，0 表示不限流")
+    parser.add_argument("--server-error-every", type=int, default=0, help="每 N 个请求返回一次 503 错误，0 表示不注入")
+    parser.add_argument("--retry-after-ms", type=int, default=100, help="限流响应中建议的重试等待时间（毫秒）")
+    args = parser.parse_args()
+
+    state = FakeAliyunState(
+        bill_items=args.bill_items,
+        domains=args.domains,
+        records_per_domain=args.records_per_domain,
+        latency=args.latency,
+        throttle_every=args.throttle_every,
+        retry_after_ms=args.retry_after_ms,
+        server_error_every=args.server_error_every,
+    )
+    server = FakeAliyunServer(state, host=args.host, port=args.port)
+    # 第一行输出监听地址，供启动本服务的脚本读取
+    print(server.endpoint, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+aliyunctl 冷启动耗时基准
+
+对每个入口分别测量：
+- 多次启动子进程的墙钟耗时（取中位数与最小值）
+- `python -X importtime` 统计的导入总耗时及最耗时的顶层模块
+
+用法:
+    python benchmarks/startup.py [--runs 10] [--top 5] [--json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# 入口名称 -> 传给 python 解释器的参数
+ENTRY_POINTS = {
+    "aliyunctl --help": ["-m", "aliyun_controller.main", "--help"],
+    "import main": ["-c", "import aliyun_controller.main"],
+    "import billing": ["-c", "import aliyun_controller.modules.billing"],
+    "import dns": ["-c", "import aliyun_controller.modules.dns"],
+}
+
+
+def measure_wall_clock(args: list, runs: int) -> list:
+    """
+    多次启动子进程，返回每次的耗时（毫秒）
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def measure_import_time(args: list, top: int) -> dict:
+    """
+    使用 -X importtime 统计导入耗时，返回总耗时（毫秒）和累计耗时最高的顶层模块
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    total_us = 0
+    top_level = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        total_us += int(self_us)
+        # 顶层模块的名称前没有额外缩进
+        if not name[1:].startswith(" "):
+            top_level.append((name.strip(), int(cumulative_us)))
+    top_level.sort(key=lambda x: x[1], reverse=True)
+    return {
+        "total_ms": total_us / 1000,
+        "top_modules": [{"module": name, "cumulative_ms": us / 1000} for name, us in top_level[:top]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="aliyunctl 冷启动耗时基准")
+    parser.add_argument("--runs", type=int, default=10, help="每个入口的启动次数")
+    parser.add_argument("--top", type=int, default=5, help="列出导入最耗时的顶层模块数量")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出，便于长期跟踪")
+    args = parser.parse_args()
+
+    report = {}
+    for name, entry_args in ENTRY_POINTS.items():
+        timings = measure_wall_clock(entry_args, args.runs)
+        report[name] = {
+            "wall_median_ms": statistics.median(timings),
+            "wall_min_ms": min(timings),
+            **measure_import_time(entry_args, args.top),
+        }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'入口':<20} {'中位数(ms)':<12} {'最小值(ms)':<12} {'导入总耗时(ms)':<15}")
+    print("-" * 62)
+    for name, data in report.items():
+        print(f"{name:<20} {data['wall_median_ms']:<12.1f} {data['wall_min_ms']:<12.1f} {data['total_ms']:<15.1f}")
+    for name, data in report.items():
+        print(f"\n[{name}] 导入耗时最高的顶层模块:")
+        for module in data["top_modules"]:
+            print(f"  {module['module']:<45} {module['cumulative_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+账单路径基准：全量拉取、流量统计、消费归纳、多报表单次拉取和按日增量同步
+"""
+from conftest import BILL_ITEMS, start_fake_server, use_fake_server
+
+CYCLE = "2026-09"
+
+
+def test_fetch_all_bill_details(aliyun_env, bench):
+    from aliyun_controller.modules.billing import AliCloudBssQuerier
+
+    items = bench("fetch_all_bill_details", lambda: AliCloudBssQuerier().fetch_all_bill_details(CYCLE))
+    assert len(items) == BILL_ITEMS
+
+
+def test_fetch_bill_store(aliyun_env, bench):
+    from aliyun_controller.modules.billing import AliCloudBssQuerier
+
+    store = bench("fetch_bill_store", lambda: AliCloudBssQuerier().fetch_bill_store(CYCLE))
+    assert len(store) == BILL_ITEMS
+
+
+def test_compute_outbound_traffic(aliyun_env, bench):
+    from aliyun_controller.modules.billing import compute_outbound_traffic
+
+    total_bytes, item_count = bench(
+        "compute_outbound_traffic", lambda: compute_outbound_traffic(CYCLE), count=lambda result: result[1]
+    )
+    assert item_count == BILL_ITEMS
+    assert total_bytes > 0
+
+
+def test_compute_billing_summary(aliyun_env, bench):
+    from aliyun_controller.modules.billing import compute_billing_summary
+
+    summary, item_count = bench(
+        "compute_billing_summary", lambda: compute_billing_summary(CYCLE), count=lambda result: result[1]
+    )
+    assert item_count == BILL_ITEMS
+    assert sum(data['count'] for data in summary.values()) == BILL_ITEMS
+
+
+def test_run_reports(aliyun_env, bench):
+    """
+    一次拉取同时计算流量和消费归纳（每次使用新的会话，测量的是拉取加计算）
+    """
+    from aliyun_controller.modules.bill_reports import BillSession
+
+    reports = bench(
+        "run_reports (traffic+summary)",
+        lambda: BillSession().run_reports(CYCLE, ("item_count", "traffic", "summary")),
+        count=lambda result: result["item_count"],
+    )
+    assert reports["item_count"] == BILL_ITEMS
+    assert sum(data['count'] for data in reports["summary"].values()) == BILL_ITEMS
+
+
+def test_compute_bill_breakdown(aliyun_env, bench):
+    from aliyun_controller.modules.billing import compute_bill_breakdown
+
+    result = bench(
+        "compute_bill_breakdown",
+        lambda: compute_bill_breakdown(CYCLE, "product,region,instance,tag"),
+        count=lambda result: result.item_count,
+    )
+    assert result.item_count == BILL_ITEMS
+    assert sum(row['count'] for row in result.rows) == BILL_ITEMS
+
+
+def test_export_bill_details(aliyun_env, bench, tmp_path):
+    from aliyun_controller.modules.billing import export_bill_details
+
+    output = tmp_path / "bill.csv"
+    count = bench("export_bill_details (csv)", lambda: export_bill_details(CYCLE, str(output)), count=lambda result: result)
+    assert count == BILL_ITEMS
+    with open(output, encoding="utf-8") as f:
+        assert sum(1 for _ in f) == BILL_ITEMS + 1
+
+
+def test_daily_sync_incremental(aliyun_env, bench, monkeypatch):
+    """
+    按日增量同步：首次同步整月后，每次只重新拉取仍可能变化的日期分区
+    """
+    from aliyun_controller.modules.billing import AliCloudBssQuerier
+
+    querier = AliCloudBssQuerier()
+    first = querier.sync_daily_bills(CYCLE)
+    assert not first['failed']
+    # 模拟月末：把全部分区都当作仍可能变化的日期，--refresh 时逐个重新拉取，测量单个分区的同步开销
+    monkeypatch.setattr("aliyun_controller.modules.billing.is_settled_day", lambda billing_date, fetched_at: False)
+    stats = bench("sync_daily_bills (resync)", lambda: querier.sync_daily_bills(CYCLE), count=lambda result: result['fetched'])
+    assert stats['fetched'] == first['fetched']
+
+
+def test_fetch_under_throttling(tmp_path, bench):
+    """
+    每 10 个请求限流一次时，使用默认的自适应限速和重试
+    """
+    from aliyun_controller.modules.billing import AliCloudBssQuerier
+
+    bill_items = min(BILL_ITEMS, 6000)
+    server = start_fake_server(bill_items=bill_items, throttle_every=10, retry_after_ms=20)
+    try:
+        use_fake_server(server, tmp_path / "config")
+        items = bench("fetch_all_bill_details (throttled)", lambda: AliCloudBssQuerier().fetch_all_bill_details(CYCLE))
+    finally:
+        server.stop()
+    assert len(items) == bill_items
@@ -0,0 +1,43 @@
+"""
+DNS 路径基准：单个域名的分页拉取、多域名异步并发拉取和全账号解析记录检查
+"""
+from conftest import DOMAINS, RECORDS_PER_DOMAIN
+
+
+def test_get_domain_records(aliyun_env, bench):
+    from aliyun_controller.modules.dns import AliCloudDnsQuerier
+
+    records = bench("get_domain_records", lambda: AliCloudDnsQuerier().get_domain_records("example0.com", refresh=True))
+    assert len(records) == RECORDS_PER_DOMAIN
+
+
+def test_get_domains(aliyun_env, bench):
+    from aliyun_controller.modules.dns import AliCloudDnsQuerier
+
+    domains = bench("get_domains", lambda: AliCloudDnsQuerier().get_domains(refresh=True))
+    assert len(domains) == DOMAINS
+
+
+def test_fetch_all_domain_records(aliyun_env, bench):
+    from aliyun_controller.modules.dns_async import fetch_all_domain_records
+
+    records_by_domain, errors = bench(
+        "fetch_all_domain_records (async)",
+        fetch_all_domain_records,
+        count=lambda result: sum(len(records) for records in result[0].values()),
+    )
+    assert not errors
+    assert len(records_by_domain) == DOMAINS
+
+
+def test_lint_dns_records(aliyun_env, bench):
+    from aliyun_controller.modules.dns_async import fetch_all_domain_records
+    from aliyun_controller.modules.dns_lint import lint_records
+
+    records_by_domain, errors = fetch_all_domain_records()
+    assert not errors
+    bench(
+        "lint_records",
+        lambda: lint_records(records_by_domain),
+        count=lambda result: sum(len(records) for records in records_by_domain.values()),
+    )
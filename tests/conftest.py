@@ -0,0 +1,85 @@
+"""
+测试的公共夹具：每个测试使用独立的配置目录，并清空进程内共享的客户端、限速器和会话缓存；
+需要接口时在进程内启动本地模拟服务（benchmarks/fake_aliyun.py）。
+"""
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from fake_aliyun import FakeAliyunServer, FakeAliyunState  # noqa: E402
+
+_ENV_FLAGS = (
+    "ALIYUN_CONTROLLER_REFRESH",
+    "ALIYUN_CONTROLLER_DAILY_SYNC",
+    "ALIYUN_CONTROLLER_PROFILE",
+)
+
+
+def _reset_shared_state():
+    from aliyun_controller import ratelimit
+    from aliyun_controller.clients import reset_clients
+    from aliyun_controller.modules import bill_reports, dns
+
+    reset_clients()
+    ratelimit._limiters.clear()
+    bill_reports._sessions.clear()
+    dns._shared_queriers.clear()
+
+
+def write_config(config_dir: Path, endpoint: str, **extra):
+    """
+    写入指向 endpoint 的 config.yaml，extra 中的键直接合并到配置顶层
+    """
+    config = {
+        "access_key_id": "test",
+        "access_key_secret": "test",
+        "endpoints": {service: {"endpoint": endpoint, "protocol": "http"} for service in ("bss", "dns")},
+    }
+    config.update(extra)
+    with open(config_dir / "config.yaml", "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+
+
+@pytest.fixture(autouse=True)
+def config_dir(tmp_path, monkeypatch):
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    monkeypatch.setenv("ALIYUN_CONTROLLER_CONFIG_DIR", str(config_dir))
+    for name in _ENV_FLAGS:
+        monkeypatch.delenv(name, raising=False)
+    _reset_shared_state()
+    yield config_dir
+    _reset_shared_state()
+
+
+@pytest.fixture
+def fake_aliyun(config_dir):
+    """
+    fake_aliyun(**options) 启动模拟服务并写入指向它的配置，options 对应 FakeAliyunState 的参数
+    """
+    servers = []
+
+    def start(**options) -> FakeAliyunServer:
+        server = FakeAliyunServer(FakeAliyunState(**options)).start()
+        servers.append(server)
+        write_config(config_dir, server.endpoint)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def unthrottled():
+    """
+    放开各接口的限速，测试不必等待默认 QPS
+    """
+    from aliyun_controller import ratelimit
+
+    for api_name in ("describe_instance_bill", "describe_domains", "describe_domain_records"):
+        ratelimit._limiters[api_name] = ratelimit.AdaptiveRateLimiter(rate=10000, max_rate=10000)
@@ -0,0 +1,49 @@
+"""
+bill 批处理子命令：部分类型账单获取失败时标记结果不完整，并以非零退出码结束
+"""
+import json
+import sys
+
+import pytest
+
+from aliyun_controller.batch import EXIT_FAILED, EXIT_OK
+
+
+def _run_bill(monkeypatch, *argv) -> int:
+    from aliyun_controller.batch import run_batch
+    from aliyun_controller.main import parse_args
+
+    monkeypatch.setattr(sys, "argv", ["aliyunctl", "bill", *argv, "--cycle", "2025-03", "--format", "json"])
+    return run_batch(parse_args())
+
+
+COMMANDS = [
+    pytest.param(("summary",), id="summary"),
+    pytest.param(("traffic",), id="traffic"),
+    pytest.param(("breakdown", "--by", "product,subscription"), id="breakdown"),
+]
+
+
+@pytest.mark.parametrize("command", COMMANDS)
+def test_complete_result(fake_aliyun, unthrottled, monkeypatch, capsys, command):
+    fake_aliyun(bill_items=40)
+
+    assert _run_bill(monkeypatch, *command) == EXIT_OK
+    report = json.loads(capsys.readouterr().out)
+    assert report["item_count"] == 40
+    assert report["incomplete"] is False
+    assert report["errors"] == {}
+
+
+@pytest.mark.parametrize("command", COMMANDS)
+def test_failed_subscription_type_marks_result_incomplete(fake_aliyun, unthrottled, monkeypatch, capsys, command):
+    server = fake_aliyun(bill_items=40, failing_subscription_types=("Subscription",))
+
+    assert _run_bill(monkeypatch, *command) == EXIT_FAILED
+    out, err = capsys.readouterr()
+    report = json.loads(out)
+    assert report["item_count"] == server.state.bill_items_for("PayAsYouGo")
+    assert report["incomplete"] is True
+    assert list(report["errors"]) == ["Subscription"]
+    assert "InvalidParameter.SubscriptionType" in report["errors"]["Subscription"]
+    assert "结果不完整" in err
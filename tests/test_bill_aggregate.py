@@ -0,0 +1,89 @@
+"""
+账单多维聚合：NumPy 向量化分组与纯 Python 分组的结果一致
+"""
+import math
+
+import pytest
+from fake_aliyun import FakeAliyunState
+
+from aliyun_controller.modules import bill_aggregate
+from aliyun_controller.modules.bill_aggregate import GROUP_KEYS, aggregate, required_fields
+from aliyun_controller.modules.bill_store import BillItemStore
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture(scope="module")
+def store() -> BillItemStore:
+    state = FakeAliyunState(bill_items=600)
+    items = [
+        state.bill_item("2025-03", subscription_type, index)
+        for subscription_type in ("PayAsYouGo", "Subscription")
+        for index in range(state.bill_items_for(subscription_type))
+    ]
+    # 同一产品代码在不同行使用不同的显示名称，分组显示名称应取最后出现的一行
+    for row, item in enumerate(items):
+        item["ProductName"] = f"{item['ProductName']} #{row % 7}"
+    store = BillItemStore(keep_raw=False, dimensions=required_fields(GROUP_KEYS))
+    for start in range(0, len(items), 50):
+        store.append_page(items[start:start + 50])
+    return store
+
+
+def _groups(group_codes, totals, counts, last_rows) -> dict:
+    return {
+        tuple(codes): (round(total, 6), int(count), last_row)
+        for codes, total, count, last_row in zip(zip(*group_codes), totals, counts, last_rows)
+    }
+
+
+def _combined_size(store, fields) -> int:
+    return math.prod(max(len(store.dictionaries[field]), 1) for field in fields)
+
+
+PATHS = [
+    pytest.param("bincount", ("product",), id="dense-single"),
+    pytest.param("bincount", ("product", "subscription", "region"), id="dense-multi"),
+    pytest.param("unique", ("instance", "region", "product"), id="unique-multi"),
+    pytest.param("stacked", ("instance", "item", "tag"), id="stacked-multi"),
+]
+
+
+@pytest.mark.parametrize("path, group_keys", PATHS)
+def test_group_numpy_matches_python(store, monkeypatch, path, group_keys):
+    fields = [GROUP_KEYS[key][0] for key in group_keys]
+    columns = [store.codes[field] for field in fields]
+    sizes = [len(store.dictionaries[field]) for field in fields]
+    if path == "unique":
+        monkeypatch.setattr(bill_aggregate, "_DENSE_KEY_LIMIT", 0)
+        assert _combined_size(store, fields) > 2 * len(store)
+    elif path == "stacked":
+        monkeypatch.setattr(bill_aggregate, "_MAX_COMBINED_KEY", 1)
+    else:
+        assert _combined_size(store, fields) <= bill_aggregate._DENSE_KEY_LIMIT
+
+    expected = _groups(*bill_aggregate._group_python(columns, store.amounts))
+    assert _groups(*bill_aggregate._group_numpy(np, columns, sizes, store.amounts, True)) == expected
+    assert len(expected) > 1
+
+
+@pytest.mark.parametrize("path, group_keys", PATHS)
+def test_aggregate_backends_agree(store, monkeypatch, path, group_keys):
+    if path == "unique":
+        monkeypatch.setattr(bill_aggregate, "_DENSE_KEY_LIMIT", 0)
+    elif path == "stacked":
+        monkeypatch.setattr(bill_aggregate, "_MAX_COMBINED_KEY", 1)
+
+    def rows(use_numpy):
+        result = aggregate(store, group_keys, use_numpy=use_numpy)
+        return sorted(result.to_map()["rows"], key=lambda row: tuple(str(row[key]) for key in result.group_keys))
+
+    assert rows(True) == rows(False)
+
+
+def test_labels_use_last_row(store):
+    result = aggregate(store, ("product",), use_numpy=True)
+    last_names = {}
+    for code, name in zip(store.column("ProductCode"), store.column("ProductName")):
+        last_names[code] = name
+    assert {row["product"]: row["product_name"] for row in result.rows} == last_names
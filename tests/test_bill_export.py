@@ -0,0 +1,133 @@
+"""
+账单导出：CSV / JSON Lines / Parquet 的导出内容，以及导出不完整时不留下目标文件和临时文件
+"""
+import csv
+import io
+import json
+import sys
+
+import pytest
+from fake_aliyun import FakeAliyunState
+
+from aliyun_controller.batch import EXIT_FAILED, EXIT_OK
+from aliyun_controller.modules.bill_export import DEFAULT_COLUMNS, export_bill_pages
+from aliyun_controller.modules.billing import BillFetchError
+
+CYCLE = "2025-03"
+
+
+def _expected_items(state: FakeAliyunState, subscription_types=("PayAsYouGo", "Subscription")) -> list:
+    return [
+        state.bill_item(CYCLE, subscription_type, index)
+        for subscription_type in subscription_types
+        for index in range(state.bill_items_for(subscription_type))
+    ]
+
+
+def _key(item: dict) -> tuple:
+    return item["SubscriptionType"], item["InstanceID"], item["BillingDate"], item["BillingItemCode"]
+
+
+def _pages(items: list, size: int = 7):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _run_export(monkeypatch, *argv) -> int:
+    from aliyun_controller.batch import run_batch
+    from aliyun_controller.main import parse_args
+
+    monkeypatch.setattr(sys, "argv", ["aliyunctl", "bill", "export", "--cycle", CYCLE, *argv])
+    return run_batch(parse_args())
+
+
+def test_csv_contents():
+    items = _expected_items(FakeAliyunState(bill_items=20))
+    stream = io.StringIO()
+    assert export_bill_pages(_pages(items), stream) == 20
+
+    rows = list(csv.reader(io.StringIO(stream.getvalue())))
+    assert tuple(rows[0]) == DEFAULT_COLUMNS
+    assert rows[1:] == [[str(item.get(column, "") or "") for column in DEFAULT_COLUMNS] for item in items]
+
+
+def test_jsonl_contents_and_columns():
+    items = _expected_items(FakeAliyunState(bill_items=20))
+    stream = io.StringIO()
+    export_bill_pages(_pages(items), stream, "jsonl")
+    assert [json.loads(line) for line in stream.getvalue().splitlines()] == items
+
+    stream = io.StringIO()
+    export_bill_pages(_pages(items), stream, "jsonl", ("ProductCode", "PretaxAmount", "Missing"))
+    assert [json.loads(line) for line in stream.getvalue().splitlines()] == [
+        {"ProductCode": item["ProductCode"], "PretaxAmount": item["PretaxAmount"], "Missing": None} for item in items
+    ]
+
+
+def test_parquet_contents(tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    items = _expected_items(FakeAliyunState(bill_items=20))
+    path = tmp_path / "bills.parquet"
+    assert export_bill_pages(_pages(items), str(path), columns=("ProductCode", "Usage", "PretaxAmount")) == 20
+
+    table = parquet.read_table(str(path))
+    assert table.schema.field("PretaxAmount").type == "double"
+    assert table.schema.field("Usage").type == "string"
+    assert table.to_pylist() == [
+        {"ProductCode": item["ProductCode"], "Usage": item["Usage"], "PretaxAmount": item["PretaxAmount"]}
+        for item in items
+    ]
+    assert not (tmp_path / "bills.parquet.part").exists()
+
+
+def test_source_error_removes_temp_file_and_keeps_target(tmp_path):
+    items = _expected_items(FakeAliyunState(bill_items=20))
+    path = tmp_path / "bills.csv"
+    path.write_text("previous export\n", encoding="utf-8")
+
+    def failing_pages():
+        yield items[:5]
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        export_bill_pages(failing_pages(), str(path))
+    assert path.read_text(encoding="utf-8") == "previous export\n"
+    assert not (tmp_path / "bills.csv.part").exists()
+
+
+def test_reported_errors_discard_export(tmp_path):
+    items = _expected_items(FakeAliyunState(bill_items=20))
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    path = export_dir / "bills.jsonl"
+    errors = {}
+
+    def partial_pages():
+        yield items[:5]
+        errors["Subscription"] = RuntimeError("boom")
+
+    with pytest.raises(BillFetchError) as excinfo:
+        export_bill_pages(partial_pages(), str(path), errors=errors)
+    assert list(excinfo.value.errors) == ["Subscription"]
+    assert list(export_dir.iterdir()) == []
+
+
+def test_cli_export_file(fake_aliyun, unthrottled, monkeypatch, capsys, tmp_path):
+    server = fake_aliyun(bill_items=40)
+    path = tmp_path / "bills.jsonl"
+
+    assert _run_export(monkeypatch, "-o", str(path)) == EXIT_OK
+    exported = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert sorted(map(_key, exported)) == sorted(map(_key, _expected_items(server.state)))
+    assert "已导出 40 条账单明细" in capsys.readouterr().err
+    assert not (tmp_path / "bills.jsonl.part").exists()
+
+
+def test_cli_partial_export_is_not_written(fake_aliyun, unthrottled, monkeypatch, capsys, tmp_path):
+    fake_aliyun(bill_items=40, failing_subscription_types=("Subscription",))
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+
+    assert _run_export(monkeypatch, "-o", str(export_dir / "bills.csv")) == EXIT_FAILED
+    assert "内容不完整" in capsys.readouterr().err
+    assert list(export_dir.iterdir()) == []
@@ -0,0 +1,89 @@
+"""
+账单并发拉取：两种付费类型各自沿 NextToken 分页链拉取，合并顺序、限流后续拉和部分失败的语义
+"""
+import pytest
+
+from aliyun_controller import ratelimit
+from aliyun_controller.modules.billing import SUBSCRIPTION_TYPES, AliCloudBssQuerier, BillFetchError
+
+CYCLE = "2025-03"
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(ratelimit, "BACKOFF_BASE", 0.0)
+
+
+def _ids(items) -> list:
+    return [(item["SubscriptionType"], item["InstanceID"], item["BillingDate"], item["Usage"]) for item in items]
+
+
+def _expected_ids(state, subscription_types=SUBSCRIPTION_TYPES) -> list:
+    return _ids(
+        state.bill_item(CYCLE, subscription_type, index)
+        for subscription_type in subscription_types
+        for index in range(state.bill_items_for(subscription_type))
+    )
+
+
+def test_fetch_all_merges_in_type_order(fake_aliyun, unthrottled):
+    server = fake_aliyun(bill_items=2000, latency=0.01)
+    items = AliCloudBssQuerier().fetch_all_bill_details(CYCLE)
+    assert _ids(items) == _expected_ids(server.state)
+
+
+def test_pages_keep_chain_order(fake_aliyun, unthrottled):
+    server = fake_aliyun(bill_items=2000, latency=0.01)
+    pages = list(AliCloudBssQuerier().iter_all_bill_pages(CYCLE))
+
+    # 两条分页链交错到达，但每条链内的分页保持 NextToken 顺序
+    for subscription_type in SUBSCRIPTION_TYPES:
+        chain = [item for page in pages for item in page if item["SubscriptionType"] == subscription_type]
+        assert _ids(chain) == _expected_ids(server.state, (subscription_type,))
+    assert server.state.requests["DescribeInstanceBill"] == 5 + 2
+
+
+def test_throttled_page_resumes_from_same_token(fake_aliyun, unthrottled):
+    server = fake_aliyun(bill_items=2000, throttle_every=3, retry_after_ms=1)
+    items = AliCloudBssQuerier().fetch_all_bill_details(CYCLE)
+
+    assert _ids(items) == _expected_ids(server.state)
+    assert server.state.requests["DescribeInstanceBill"] > 5 + 2
+
+
+def test_partial_failure_returns_remaining_type(fake_aliyun, unthrottled, capsys):
+    server = fake_aliyun(bill_items=2000, failing_subscription_types=("Subscription",))
+    querier = AliCloudBssQuerier()
+
+    assert _ids(querier.fetch_all_bill_details(CYCLE)) == _expected_ids(server.state, ("PayAsYouGo",))
+    assert "[Subscription] 类型账单获取失败" in capsys.readouterr().out
+
+    errors = {}
+    items = [item for page in querier.iter_all_bill_pages(CYCLE, errors=errors) for item in page]
+    assert _ids(items) == _expected_ids(server.state, ("PayAsYouGo",))
+    assert list(errors) == ["Subscription"]
+
+
+def test_failed_chain_is_not_cached(fake_aliyun, unthrottled):
+    server = fake_aliyun(bill_items=2000, failing_subscription_types=("Subscription",))
+    querier = AliCloudBssQuerier()
+    list(querier.iter_all_bill_pages(CYCLE, errors={}))
+    requests = server.state.requests["DescribeInstanceBill"]
+
+    # 成功的分页链已写入缓存，失败的分页链下次重新在线拉取
+    server.state.failing_subscription_types = ()
+    items = [item for page in querier.iter_all_bill_pages(CYCLE) for item in page]
+    assert sorted(_ids(items)) == sorted(_expected_ids(server.state))
+    assert server.state.requests["DescribeInstanceBill"] == requests + 2
+
+
+def test_all_types_failing_raises(fake_aliyun, unthrottled):
+    fake_aliyun(bill_items=100, failing_subscription_types=SUBSCRIPTION_TYPES)
+    querier = AliCloudBssQuerier()
+
+    with pytest.raises(BillFetchError) as excinfo:
+        querier.fetch_all_bill_details(CYCLE)
+    assert list(excinfo.value.errors) == list(SUBSCRIPTION_TYPES)
+
+    with pytest.raises(BillFetchError):
+        list(querier.iter_all_bill_pages(CYCLE))
@@ -0,0 +1,93 @@
+"""
+多月份对比（--from/--to）：跨年的月份列表、环比变化，以及某月查询失败时环比从下一个月重新计算
+"""
+import sys
+
+import pytest
+
+from aliyun_controller.modules import billing
+from aliyun_controller.modules.bill_reports import BillSession
+from aliyun_controller.modules.billing import BillFetchError, iter_billing_cycles, range_billing_module
+
+# 各月份各产品的金额；None 表示该月查询失败
+AMOUNTS = {
+    "2024-11": {"ecs": 100.0},
+    "2024-12": {"ecs": 150.0, "oss": 50.0},
+    "2025-01": None,
+    "2025-02": {"ecs": 120.0},
+}
+
+
+class _RangeQuerier:
+    def iter_all_bill_pages(self, billing_cycle: str, errors: dict = None, fetched: dict = None):
+        amounts = AMOUNTS[billing_cycle]
+        if amounts is None:
+            raise BillFetchError(f"账单周期 {billing_cycle} 的所有类型账单均获取失败")
+        yield [
+            {"ProductCode": code, "ProductName": code.upper(), "PretaxAmount": amount, "SubscriptionType": "PayAsYouGo"}
+            for code, amount in amounts.items()
+        ]
+
+
+def test_cycles_cross_year_boundary():
+    assert iter_billing_cycles("2024-11", "2025-2") == ["2024-11", "2024-12", "2025-01", "2025-02"]
+    assert iter_billing_cycles("2025-03", "2025-03") == ["2025-03"]
+    assert iter_billing_cycles("2025-03", "2025-02") == []
+
+
+@pytest.mark.parametrize("current, previous, expected", [
+    (150.0, 100.0, ("+50.00", "+50.0%")),
+    (80.0, 100.0, ("-20.00", "-20.0%")),
+    (50.0, 0.0, ("+50.00", "-")),
+    (100.0, None, ("-", "-")),
+])
+def test_format_change(current, previous, expected):
+    assert billing._format_change(current, previous) == expected
+
+
+def _rows(output: str) -> dict:
+    """
+    解析对比表，返回 {(名称, 月份): 该行月份之后的各列}
+    """
+    rows = {}
+    for line in output.splitlines():
+        tokens = line.split()
+        for i, token in enumerate(tokens):
+            if token in AMOUNTS:
+                rows[(tokens[0], token)] = tokens[i + 1:]
+                break
+    return rows
+
+
+def test_range_deltas(monkeypatch, capsys):
+    session = BillSession(querier=_RangeQuerier())
+    monkeypatch.setattr(billing, "get_bill_session", lambda: session)
+
+    range_billing_module("2024-11", "2025-02")
+    output = capsys.readouterr().out
+    rows = _rows(output)
+
+    assert rows[("ECS", "2024-11")] == ["100.00", "-", "-"]
+    assert rows[("ECS", "2024-12")] == ["150.00", "+50.00", "+50.0%"]
+    assert rows[("ECS", "2025-01")] == ["查询失败"]
+    # 失败月份之后没有可比较的上月金额
+    assert rows[("ECS", "2025-02")] == ["120.00", "-", "-"]
+    assert rows[("OSS", "2024-11")] == ["0.00", "-", "-"]
+    assert rows[("OSS", "2024-12")] == ["50.00", "+50.00", "-"]
+    assert rows[("总计", "2024-12")] == ["200.00", "+100.00", "+100.0%"]
+    assert rows[("总计", "2025-02")] == ["120.00", "-", "-"]
+    # 产品按区间总金额从大到小排列
+    assert output.index("ECS") < output.index("OSS")
+
+
+@pytest.mark.parametrize("argv, message", [
+    (("--from", "2025-01"), "--from 和 --to 必须同时指定"),
+    (("--from", "2025-03", "--to", "2025-01"), "--from 不能晚于 --to"),
+])
+def test_range_arguments_are_validated(monkeypatch, capsys, argv, message):
+    from aliyun_controller.main import parse_args
+
+    monkeypatch.setattr(sys, "argv", ["aliyunctl", *argv])
+    with pytest.raises(SystemExit):
+        parse_args()
+    assert message in capsys.readouterr().err
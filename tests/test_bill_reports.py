@@ -0,0 +1,69 @@
+"""
+会话级账单缓存：不完整的账单数据不会被缓存；读自本地缓存的数据沿用缓存的拉取时间
+"""
+import datetime
+import sqlite3
+import time
+
+from fake_aliyun import FakeAliyunState
+
+from aliyun_controller.cache import OPEN_CYCLE_TTL
+
+from aliyun_controller.modules.bill_reports import BillSession
+
+
+class _FlakyQuerier:
+    """
+    第一种类型的账单总能拉到，fail 为真时第二种类型失败
+    """
+
+    def __init__(self):
+        self.fail = True
+        self.calls = 0
+        self._state = FakeAliyunState(bill_items=3)
+
+    def iter_all_bill_pages(self, billing_cycle: str, errors: dict = None, fetched: dict = None):
+        self.calls += 1
+        yield [self._state.bill_item(billing_cycle, "PayAsYouGo", index) for index in range(3)]
+        if self.fail:
+            errors["Subscription"] = RuntimeError("boom")
+            return
+        yield [self._state.bill_item(billing_cycle, "Subscription", index) for index in range(3)]
+
+
+def test_partial_store_is_not_cached():
+    querier = _FlakyQuerier()
+    session = BillSession(querier=querier)
+
+    assert len(session.get_store("2025-03")) == 3
+    assert session.run_reports("2025-03", ("item_count",)) == {"item_count": 3}
+    assert querier.calls == 2
+
+    querier.fail = False
+    assert len(session.get_store("2025-03")) == 6
+    assert session.run_reports("2025-03", ("item_count",)) == {"item_count": 6}
+    assert querier.calls == 3
+
+
+def test_session_keeps_fetch_time_of_cached_bills(fake_aliyun, unthrottled):
+    from aliyun_controller.modules.billing import AliCloudBssQuerier
+
+    server = fake_aliyun(bill_items=40)
+    cycle = datetime.date.today().strftime("%Y-%m")
+    querier = AliCloudBssQuerier()
+    list(querier.iter_all_bill_pages(cycle))
+    requests = server.state.requests["DescribeInstanceBill"]
+
+    # 本地缓存还有 60 秒过期，其中一种类型的缓存被删除、需要在线拉取
+    cached_at = time.time() - OPEN_CYCLE_TTL + 60
+    with sqlite3.connect(str(querier.cache.path)) as conn:
+        conn.execute("UPDATE bill_meta SET fetched_at = ?", (cached_at,))
+        conn.execute("DELETE FROM bill_meta WHERE subscription_type = 'Subscription'")
+
+    session = BillSession(querier=querier)
+    started = time.time()
+    assert len(session.get_store(cycle)) == 40
+    assert server.state.requests["DescribeInstanceBill"] == requests + 1
+    # 会话中的数据随最早的那份缓存一起过期，而不是从读取缓存时起再保留 OPEN_CYCLE_TTL 秒
+    fetched_at, _ = session._stores[cycle]
+    assert fetched_at == cached_at < started
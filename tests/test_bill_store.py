@@ -0,0 +1,93 @@
+"""
+列式账单存储：逐页追加后按行、按列取回的内容与原始明细一致
+"""
+import json
+import math
+
+import pytest
+from fake_aliyun import FakeAliyunState
+
+from aliyun_controller.modules.bill_store import DIMENSION_FIELDS, BillItemStore
+
+
+@pytest.fixture(scope="module")
+def items() -> list:
+    state = FakeAliyunState(bill_items=250)
+    items = [
+        state.bill_item("2025-03", subscription_type, index)
+        for subscription_type in ("PayAsYouGo", "Subscription")
+        for index in range(state.bill_items_for(subscription_type))
+    ]
+    # 缺失或无法解析的字段
+    del items[3]["ProductCode"]
+    items[4]["PretaxAmount"] = None
+    items[5]["Usage"] = "n/a"
+    items[6]["UsageUnit"] = "gb"
+    return items
+
+
+def _pages(items: list, size: int = 40) -> list:
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def test_round_trip(items):
+    store = BillItemStore().extend_pages(_pages(items))
+
+    assert len(store) == len(items)
+    assert list(store.iter_items()) == items
+    for row in (0, 39, 40, 41, len(items) - 1):
+        assert store.item(row) == items[row]
+    with pytest.raises(IndexError):
+        store.item(len(items))
+
+    assert store.column("ProductName") == [item["ProductName"] for item in items]
+    assert store.column("InstanceID") == [item["InstanceID"] for item in items]
+    assert store.column("ProductCode")[3] == "Unknown"
+    assert store.column("UsageUnit")[6] == "GB"
+    assert store.amounts[4] == 0.0
+    assert math.isnan(store.usages[5])
+    assert store.amounts[10] == items[10]["PretaxAmount"]
+    assert store.usages[10] == float(items[10]["Usage"])
+
+
+def test_dictionary_encoding_shares_values(items):
+    store = BillItemStore(keep_raw=False, dimensions=("Region",))
+    store.extend_pages(_pages(items))
+
+    assert sorted(store.values("Region")) == sorted({item["Region"] for item in items})
+    assert len(store.codes["Region"]) == len(items)
+    assert store.column("Region") == [item["Region"] for item in items]
+
+
+def test_extend_pages_appends_and_skips_empty_pages(items):
+    store = BillItemStore()
+    assert store.extend_pages([items[:10], [], items[10:25]]) is store
+    store.extend_pages(iter([items[25:30]]))
+    assert list(store.iter_items()) == items[:30]
+    assert store.item(24) == items[24]
+    assert store.item(25) == items[25]
+
+
+def test_columns_only_store_refuses_raw_access(items):
+    store = BillItemStore(keep_raw=False).extend_pages(_pages(items))
+    assert store.column("ProductCode")[0] == items[0]["ProductCode"]
+    for access in (lambda: store.item(0), lambda: list(store.iter_items()), lambda: store.add_dimensions(("Tag",))):
+        with pytest.raises(ValueError):
+            access()
+
+
+def test_add_dimensions_matches_encoding_on_append(items):
+    store = BillItemStore().extend_pages(_pages(items))
+    store.add_dimensions(DIMENSION_FIELDS)
+    encoded = BillItemStore(keep_raw=False, dimensions=DIMENSION_FIELDS).extend_pages(_pages(items))
+
+    for field in DIMENSION_FIELDS:
+        assert store.column(field) == encoded.column(field) == [item.get(field, "") for item in items]
+    codes = store.codes["Tag"]
+    store.add_dimensions(("Tag",))
+    assert store.codes["Tag"] is codes
+
+
+def test_columnar_store_is_smaller_than_items(items):
+    store = BillItemStore(keep_raw=False, dimensions=("InstanceID",)).extend_pages(_pages(items))
+    assert store.nbytes() < len(json.dumps(items)) / 4
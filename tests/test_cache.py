@@ -0,0 +1,133 @@
+"""
+账单本地缓存：周期有效期规则和分页写入
+"""
+import datetime
+import sqlite3
+
+import pytest
+
+from aliyun_controller.cache import OPEN_CYCLE_TTL, BillCache, is_fresh_cycle, is_settled_cycle
+
+
+def _ts(*args) -> float:
+    return datetime.datetime(*args).timestamp()
+
+
+@pytest.mark.parametrize("fetched_at, settled", [
+    (_ts(2025, 3, 15, 12), False),       # 月中拉取
+    (_ts(2025, 3, 31, 23, 59), False),   # 月末最后一天拉取
+    (_ts(2025, 4, 1, 8), False),         # 出账后但仍在结算期内
+    (_ts(2025, 4, 1, 23, 59), False),
+    (_ts(2025, 4, 2), True),             # 最后一个账单日结束两天后
+    (_ts(2025, 6, 1), True),
+])
+def test_is_settled_cycle(fetched_at, settled):
+    assert is_settled_cycle("2025-03", fetched_at) is settled
+
+
+def test_is_settled_cycle_handles_short_months():
+    assert not is_settled_cycle("2024-02", _ts(2024, 3, 1, 12))
+    assert is_settled_cycle("2024-02", _ts(2024, 3, 2))
+
+
+def test_settled_fetch_is_fresh_forever():
+    fetched_at = _ts(2025, 4, 10)
+    assert is_fresh_cycle("2025-03", fetched_at, now=_ts(2030, 1, 1))
+
+
+def test_unsettled_fetch_of_closed_cycle_expires_after_ttl():
+    # 月末拉取的数据在月份结束后不能被当作最终结果永久使用
+    fetched_at = _ts(2025, 3, 31, 22)
+    assert is_fresh_cycle("2025-03", fetched_at, now=fetched_at + OPEN_CYCLE_TTL - 1)
+    assert not is_fresh_cycle("2025-03", fetched_at, now=fetched_at + OPEN_CYCLE_TTL + 1)
+    assert not is_fresh_cycle("2025-03", fetched_at, now=_ts(2025, 5, 1))
+
+
+def test_open_cycle_uses_ttl():
+    now = datetime.datetime.now()
+    cycle = now.strftime("%Y-%m")
+    fetched_at = now.timestamp()
+    assert is_fresh_cycle(cycle, fetched_at, now=fetched_at + 1)
+    assert not is_fresh_cycle(cycle, fetched_at, now=fetched_at + OPEN_CYCLE_TTL + 1)
+
+
+def _commit_pages(cache: BillCache, pages: list, billing_cycle: str = "2025-03", subscription_type: str = "PayAsYouGo"):
+    writer = cache.page_writer(billing_cycle, subscription_type)
+    for items in pages:
+        writer.append(items)
+    writer.commit()
+    return writer
+
+
+def _set_fetched_at(cache: BillCache, fetched_at: float):
+    with sqlite3.connect(str(cache.path)) as conn:
+        conn.execute("UPDATE bill_meta SET fetched_at = ?", (fetched_at,))
+
+
+def test_bill_cache_is_fresh_for_settled_fetch(config_dir):
+    cache = BillCache(config_dir / "cache.sqlite3")
+    assert not cache.is_fresh("2025-03", "PayAsYouGo")
+    _commit_pages(cache, [[{"id": 1}]])
+    _set_fetched_at(cache, _ts(2025, 4, 5))
+    assert cache.is_fresh("2025-03", "PayAsYouGo")
+
+
+def test_bill_cache_refetches_month_cached_before_settlement(config_dir):
+    cache = BillCache(config_dir / "cache.sqlite3")
+    _commit_pages(cache, [[{"id": 1}]])
+    _set_fetched_at(cache, _ts(2025, 3, 31, 23))
+    assert not cache.is_fresh("2025-03", "PayAsYouGo")
+
+
+def test_bill_session_refetches_month_fetched_before_settlement():
+    from aliyun_controller.modules.bill_reports import BillSession
+
+    session = BillSession(querier=object())
+    assert session._is_fresh("2025-03", _ts(2025, 4, 3))
+    assert not session._is_fresh("2025-03", _ts(2025, 3, 31, 23))
+
+
+def _cached_pages(cache: BillCache) -> list:
+    return list(cache.iter_pages("2025-03", "PayAsYouGo"))
+
+
+def test_commit_replaces_previous_generation(config_dir):
+    cache = BillCache(config_dir / "cache.sqlite3")
+    _commit_pages(cache, [[{"id": 1}], [{"id": 2}]])
+    _commit_pages(cache, [[{"id": 3}]])
+    assert _cached_pages(cache) == [[{"id": 3}]]
+    with sqlite3.connect(str(cache.path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM bill_pages").fetchone()[0] == 1
+
+
+def test_interleaved_writers_keep_complete_page_set(config_dir):
+    # 两个进程同时拉取同一周期：先提交的写入器不能删除仍在写入的分页
+    cache_a = BillCache(config_dir / "cache.sqlite3")
+    cache_b = BillCache(config_dir / "cache.sqlite3")
+    pages_a = [[{"writer": "a", "page": n}] for n in range(3)]
+    pages_b = [[{"writer": "b", "page": n}] for n in range(3)]
+
+    writer_a = cache_a.page_writer("2025-03", "PayAsYouGo")
+    writer_b = cache_b.page_writer("2025-03", "PayAsYouGo")
+    writer_a.append(pages_a[0])
+    writer_b.append(pages_b[0])
+    writer_a.append(pages_a[1])
+    writer_a.append(pages_a[2])
+    writer_a.commit()
+    assert _cached_pages(cache_a) == pages_a
+
+    writer_b.append(pages_b[1])
+    writer_b.append(pages_b[2])
+    writer_b.commit()
+    assert _cached_pages(cache_b) == pages_b
+    with sqlite3.connect(str(cache_a.path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM bill_pages").fetchone()[0] == 3
+
+
+def test_discarded_writer_leaves_committed_pages(config_dir):
+    cache = BillCache(config_dir / "cache.sqlite3")
+    failed = cache.page_writer("2025-03", "PayAsYouGo")
+    failed.append([{"writer": "failed"}])
+    _commit_pages(cache, [[{"writer": "ok"}]])
+    failed.discard()
+    assert _cached_pages(cache) == [[{"writer": "ok"}]]
@@ -0,0 +1,79 @@
+"""
+共享 SDK 客户端：同一账号同一服务只创建一个客户端，配置变化后重建；配置文件按修改时间缓存解析结果
+"""
+import os
+
+import pytest
+from conftest import write_config
+
+from aliyun_controller import config
+from aliyun_controller.clients import get_bss_client, get_dns_client
+
+ENDPOINT = "127.0.0.1:1"
+
+
+def _touch(path, seconds: int = 10):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10**9))
+
+
+def test_queriers_share_one_client_per_service(config_dir):
+    from aliyun_controller.modules.billing import AliCloudBssQuerier
+    from aliyun_controller.modules.dns import AliCloudDnsQuerier
+
+    write_config(config_dir, ENDPOINT)
+    assert AliCloudBssQuerier().client is AliCloudBssQuerier().client is get_bss_client()
+    assert AliCloudDnsQuerier().client is get_dns_client()
+    assert get_bss_client() is not get_dns_client()
+
+
+def test_profiles_use_separate_clients(config_dir):
+    write_config(config_dir, ENDPOINT, profiles={"other": {"access_key_id": "other", "access_key_secret": "other"}})
+    assert get_bss_client("other") is get_bss_client("other")
+    assert get_bss_client("other") is not get_bss_client()
+
+
+def test_client_is_rebuilt_only_when_its_settings_change(config_dir):
+    write_config(config_dir, ENDPOINT)
+    client = get_bss_client()
+
+    # 文件被重写但内容不变：沿用原客户端
+    write_config(config_dir, ENDPOINT)
+    _touch(config_dir / "config.yaml")
+    assert get_bss_client() is client
+
+    write_config(config_dir, ENDPOINT, runtime={"read_timeout": 30000})
+    _touch(config_dir / "config.yaml", 20)
+    assert get_bss_client() is not client
+
+
+def test_config_is_parsed_once_per_version(config_dir, monkeypatch):
+    calls = []
+    parse = config._parse_config
+    monkeypatch.setattr(config, "_parse_config", lambda path: calls.append(path) or parse(path))
+
+    write_config(config_dir, ENDPOINT)
+    for _ in range(3):
+        assert config.load_config()["runtime"] == config.RUNTIME_DEFAULTS
+    assert len(calls) == 1
+
+    write_config(config_dir, ENDPOINT, runtime={"max_idle_conns": 64})
+    _touch(config_dir / "config.yaml")
+    assert config.load_config()["runtime"]["max_idle_conns"] == 64
+    assert len(calls) == 2
+
+    # 调用方修改返回值不会污染缓存
+    config.load_config()["runtime"] = None
+    assert config.load_config()["runtime"]["max_idle_conns"] == 64
+
+
+@pytest.mark.parametrize("runtime", [
+    {"read_timeout": 0},
+    {"read_timeout": "10s"},
+    {"max_idle_conns": True},
+    {"keepalive": 1},
+])
+def test_invalid_runtime_is_rejected(config_dir, runtime):
+    write_config(config_dir, ENDPOINT, runtime=runtime)
+    with pytest.raises(ValueError):
+        config.load_config()
@@ -0,0 +1,120 @@
+"""
+按日增量同步（--daily-sync）：对照本地模拟服务验证哪些日期分区被复用、哪些被重新拉取
+"""
+import datetime
+import sqlite3
+
+import pytest
+
+from aliyun_controller.cache import OPEN_CYCLE_TTL, is_settled_day
+from aliyun_controller.modules.billing import SUBSCRIPTION_TYPES, AliCloudBssQuerier
+
+PAST_CYCLE = "2025-03"
+PAST_CYCLE_DAYS = 31
+
+
+@pytest.fixture
+def bss(fake_aliyun, unthrottled):
+    server = fake_aliyun(bill_items=400, billing_cycle_days=PAST_CYCLE_DAYS)
+    return server, AliCloudBssQuerier()
+
+
+def _bill_requests(server) -> int:
+    return server.state.requests.get("DescribeInstanceBill", 0)
+
+
+def _execute(querier, sql: str, *params):
+    with sqlite3.connect(str(querier.day_store.path)) as conn:
+        conn.execute(sql, params)
+
+
+def test_settled_partitions_are_reused(bss, monkeypatch):
+    server, querier = bss
+    partitions = PAST_CYCLE_DAYS * len(SUBSCRIPTION_TYPES)
+
+    stats = querier.sync_daily_bills(PAST_CYCLE)
+    assert (stats["fetched"], stats["reused"], stats["failed"]) == (partitions, 0, {})
+    assert _bill_requests(server) == partitions
+
+    # 结算后拉取的分区即使使用 --refresh 也不再重新拉取
+    monkeypatch.setenv("ALIYUN_CONTROLLER_REFRESH", "1")
+    stats = querier.sync_daily_bills(PAST_CYCLE)
+    assert (stats["fetched"], stats["reused"]) == (0, partitions)
+    assert _bill_requests(server) == partitions
+
+
+def test_partitions_fetched_within_settlement_margin_are_refetched(bss):
+    server, querier = bss
+    querier.sync_daily_bills(PAST_CYCLE)
+    fetched_at = datetime.datetime(2025, 3, 31, 23).timestamp()
+    _execute(querier, "UPDATE bill_days SET fetched_at = ?", fetched_at)
+    requests = _bill_requests(server)
+
+    stats = querier.sync_daily_bills(PAST_CYCLE)
+    # 只有 3-30、3-31 在两天的结算期内拉取，其余日期已是最终结果
+    assert stats["fetched"] == 2 * len(SUBSCRIPTION_TYPES)
+    assert _bill_requests(server) - requests == stats["fetched"]
+    meta = querier.day_store.load_meta(PAST_CYCLE)
+    assert meta[("2025-03-29", "PayAsYouGo")] == fetched_at
+    assert meta[("2025-03-31", "PayAsYouGo")] > fetched_at
+
+
+def test_recent_partitions_are_replaced_after_ttl_or_refresh(fake_aliyun, unthrottled, monkeypatch):
+    today = datetime.date.today()
+    cycle = today.strftime("%Y-%m")
+    server = fake_aliyun(bill_items=400, billing_cycle_days=31)
+    querier = AliCloudBssQuerier()
+
+    querier.sync_daily_bills(cycle)
+    meta = querier.day_store.load_meta(cycle)
+    recent = [partition for partition, fetched_at in meta.items() if not is_settled_day(partition[0], fetched_at)]
+    assert recent
+
+    # TTL 内不重新拉取
+    stats = querier.sync_daily_bills(cycle)
+    assert stats["fetched"] == 0
+
+    # --refresh 只重新拉取仍可能变化的分区，并整体替换分区内容
+    billing_date, subscription_type = recent[0]
+    _execute(
+        querier, "UPDATE bill_days SET items = '[]' WHERE billing_date = ? AND subscription_type = ?",
+        billing_date, subscription_type,
+    )
+    monkeypatch.setenv("ALIYUN_CONTROLLER_REFRESH", "1")
+    stats = querier.sync_daily_bills(cycle)
+    assert stats["fetched"] == len(recent)
+    assert any(
+        item["BillingDate"] == billing_date and item["SubscriptionType"] == subscription_type
+        for items in querier.day_store.iter_days(cycle)
+        for item in items
+    )
+    monkeypatch.delenv("ALIYUN_CONTROLLER_REFRESH")
+
+    # 超过 TTL 后同样重新拉取
+    _execute(querier, "UPDATE bill_days SET fetched_at = fetched_at - ?", OPEN_CYCLE_TTL + 1)
+    meta = querier.day_store.load_meta(cycle)
+    expected = sum(1 for partition, fetched_at in meta.items() if not is_settled_day(partition[0], fetched_at))
+    requests = _bill_requests(server)
+    stats = querier.sync_daily_bills(cycle)
+    assert stats["fetched"] == expected
+    assert _bill_requests(server) - requests == expected
+
+
+def _item_key(item: dict) -> tuple:
+    return (item["BillingDate"], item["SubscriptionType"], item["InstanceID"], item["BillingItemCode"], item["PretaxAmount"])
+
+
+def test_daily_partitions_match_monthly_bill(bss):
+    server, querier = bss
+    querier.sync_daily_bills(PAST_CYCLE)
+    daily = [item for items in querier.day_store.iter_days(PAST_CYCLE) for item in items]
+    monthly = [
+        item
+        for subscription_type in SUBSCRIPTION_TYPES
+        for items in querier.iter_bill_pages(PAST_CYCLE, subscription_type)
+        for item in items
+    ]
+
+    assert len(daily) == len(monthly) == server.state.bill_items
+    assert round(sum(item["PretaxAmount"] for item in daily), 2) == round(sum(item["PretaxAmount"] for item in monthly), 2)
+    assert sorted(map(_item_key, daily)) == sorted(map(_item_key, monthly))
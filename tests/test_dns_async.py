@@ -0,0 +1,31 @@
+"""
+异步批量拉取解析记录：使用查询器所属账号的客户端和限速器
+"""
+from conftest import write_config
+
+from aliyun_controller import ratelimit
+from aliyun_controller.modules.dns import _preload_all_domain_records, get_dns_querier
+
+
+def _profile(server) -> dict:
+    return {
+        "access_key_id": "test",
+        "access_key_secret": "test",
+        "endpoints": {"dns": {"endpoint": server.endpoint, "protocol": "http"}},
+    }
+
+
+def test_preload_uses_querier_profile(config_dir, fake_aliyun):
+    default = fake_aliyun(domains=2, records_per_domain=1)
+    staging = fake_aliyun(domains=2, records_per_domain=3)
+    write_config(config_dir, default.endpoint, profiles={"staging": _profile(staging)})
+
+    querier = get_dns_querier("staging")
+    domain_names = [domain["DomainName"] for domain in querier.get_domains()]
+    _preload_all_domain_records(querier, domain_names)
+
+    assert all(len(querier.get_domain_records(domain_name)) == 3 for domain_name in domain_names)
+    assert "DescribeDomainRecords" not in default.state.requests
+    assert staging.state.requests["DescribeDomainRecords"] == len(domain_names)
+    assert ("staging", "describe_domain_records") in ratelimit._limiters
+    assert "describe_domain_records" not in ratelimit._limiters
@@ -0,0 +1,68 @@
+"""
+域名列表：拉取全部分页并按页码顺序合并，在会话内缓存，过期或刷新后重新拉取
+"""
+import asyncio
+
+import pytest
+
+from aliyun_controller.modules import dns, dns_async
+from aliyun_controller.modules.dns import AliCloudDnsQuerier, DnsQueryError
+
+
+@pytest.fixture(autouse=True)
+def small_pages(monkeypatch):
+    monkeypatch.setattr(dns, "DOMAINS_PAGE_SIZE", 5)
+    monkeypatch.setattr(dns_async, "DOMAINS_PAGE_SIZE", 5)
+
+
+def _names(domains) -> list:
+    return [domain["DomainName"] for domain in domains]
+
+
+def test_all_pages_are_fetched_in_order(fake_aliyun, unthrottled):
+    server = fake_aliyun(domains=23, records_per_domain=0)
+    assert _names(AliCloudDnsQuerier().get_domains()) == server.state.domain_names()
+    assert server.state.requests["DescribeDomains"] == 5
+
+
+def test_async_pages_are_fetched_in_order(fake_aliyun, unthrottled):
+    server = fake_aliyun(domains=23, records_per_domain=0)
+    domains = asyncio.run(dns_async.AsyncAliCloudDnsQuerier().get_domains())
+    assert _names(domains) == server.state.domain_names()
+
+
+def test_domain_list_is_cached(fake_aliyun, unthrottled, monkeypatch):
+    server = fake_aliyun(domains=7, records_per_domain=0)
+    querier = AliCloudDnsQuerier()
+
+    domains = querier.get_domains()
+    domains.clear()
+    assert len(querier.get_domains()) == 7
+    assert server.state.requests["DescribeDomains"] == 2
+
+    server.state.domain_count = 12
+    assert len(querier.get_domains()) == 7
+    assert len(querier.get_domains(refresh=True)) == 12
+    assert server.state.requests["DescribeDomains"] == 2 + 3
+
+    monkeypatch.setattr(dns, "DOMAINS_CACHE_TTL", 0)
+    querier.get_domains()
+    assert server.state.requests["DescribeDomains"] == 2 + 3 + 3
+
+
+def test_failure_raises_instead_of_returning_partial_list(fake_aliyun, unthrottled, monkeypatch):
+    fake_aliyun(domains=12, records_per_domain=0)
+    querier = AliCloudDnsQuerier()
+    fetch_page = querier._fetch_domains_page
+
+    def failing_page(page_number):
+        if page_number == 3:
+            raise RuntimeError("boom")
+        return fetch_page(page_number)
+
+    monkeypatch.setattr(querier, "_fetch_domains_page", failing_page)
+    with pytest.raises(DnsQueryError):
+        querier.get_domains()
+
+    monkeypatch.setattr(querier, "_fetch_domains_page", fetch_page)
+    assert len(querier.get_domains()) == 12
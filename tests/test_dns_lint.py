@@ -0,0 +1,152 @@
+"""
+dns lint：每条检查规则的样例数据，以及发现错误级问题时的退出码
+"""
+import json
+import sys
+
+import pytest
+
+from aliyun_controller.modules.dns_lint import lint_records
+
+
+def _record(rr, record_type, value, ttl=600, record_id=None, line="default"):
+    return {"RecordId": record_id or f"{rr}-{record_type}-{value}", "RR": rr, "Type": record_type,
+            "Value": value, "TTL": ttl, "Line": line}
+
+
+def _found(issues: dict) -> set:
+    return {(rule, issue["domain_name"], issue["rr"], issue["type"]) for rule, found in issues.items() for issue in found}
+
+
+LINT_CASES = [
+    pytest.param(
+        {"a.com": [
+            _record("@", "A", "1.2.3.4"),
+            _record("www", "CNAME", "a.com"),
+            _record("mail", "MX", "mx.example.net"),
+            _record("@", "TXT", "v=spf1 ~all"),
+        ]},
+        set(), id="clean",
+    ),
+    pytest.param(
+        {"a.com": [
+            _record("v4", "A", "999.1.1.1"),
+            _record("v6", "AAAA", "not-an-ip"),
+            _record("host", "CNAME", "bad_host!"),
+            _record("dot", "CNAME", "target.example.net."),
+            _record("ok", "A", "10.0.0.1"),
+        ]},
+        {
+            ("invalid_value", "a.com", "v4", "A"),
+            ("invalid_value", "a.com", "v6", "AAAA"),
+            ("invalid_value", "a.com", "host", "CNAME"),
+            ("invalid_value", "a.com", "dot", "CNAME"),
+        },
+        id="invalid_value",
+    ),
+    pytest.param(
+        {"a.com": [
+            _record("www", "CNAME", "target.example.net"),
+            _record("www", "TXT", "hello"),
+            _record("api", "CNAME", "target.example.net"),
+        ]},
+        {("cname_conflict", "a.com", "www", "CNAME")},
+        id="cname_conflict",
+    ),
+    pytest.param(
+        {"a.com": [
+            _record("www", "A", "1.2.3.4", record_id="1"),
+            _record("WWW", "A", "1.2.3.4", record_id="2"),
+            _record("api", "CNAME", "Target.Example.net", record_id="3"),
+            _record("api", "CNAME", "target.example.net", record_id="4", line="telecom"),
+        ]},
+        {("duplicate", "a.com", "WWW", "A")},
+        id="duplicate",
+    ),
+    pytest.param(
+        {
+            "a.com": [_record(f"h{i}", "A", f"10.0.0.{i}") for i in range(5)] + [
+                _record("short", "A", "10.0.1.1", ttl=60),
+                _record("long", "A", "10.0.1.2", ttl=6000),
+                _record("near", "A", "10.0.1.3", ttl=1200),
+            ],
+            # 记录太少的域名不检查
+            "b.com": [_record("@", "A", "1.2.3.4", ttl=600), _record("x", "A", "1.2.3.5", ttl=86400)],
+        },
+        {("ttl_outlier", "a.com", "short", "A"), ("ttl_outlier", "a.com", "long", "A")},
+        id="ttl_outlier",
+    ),
+    pytest.param(
+        {
+            "a.com": [
+                _record("missing", "CNAME", "nothing.b.com"),
+                _record("exists", "CNAME", "www.b.com"),
+                _record("apex", "CNAME", "b.com"),
+                _record("wild", "CNAME", "x.wild.b.com"),
+                _record("deep", "CNAME", "host.sub.b.com"),
+                _record("external", "CNAME", "nothing.example.net"),
+                _record("self", "CNAME", "gone.a.com"),
+            ],
+            "b.com": [
+                _record("@", "A", "1.2.3.4"),
+                _record("www", "A", "1.2.3.4"),
+                _record("*.wild", "A", "1.2.3.4"),
+                _record("sub", "NS", "ns1.other.net"),
+            ],
+        },
+        {("dangling_cname", "a.com", "missing", "CNAME"), ("dangling_cname", "a.com", "self", "CNAME")},
+        id="dangling_cname",
+    ),
+]
+
+
+@pytest.mark.parametrize("records_by_domain, expected", LINT_CASES)
+def test_lint_rules(records_by_domain, expected):
+    assert _found(lint_records(records_by_domain)) == expected
+
+
+def test_wildcard_does_not_cover_its_parent():
+    records_by_domain = {"a.com": [_record("www", "CNAME", "wild.a.com"), _record("*.wild", "A", "1.2.3.4")]}
+    assert _found(lint_records(records_by_domain)) == {("dangling_cname", "a.com", "www", "CNAME")}
+
+
+def test_domain_filter_still_resolves_against_all_domains():
+    records_by_domain = {
+        "a.com": [_record("ok", "CNAME", "www.b.com"), _record("bad", "CNAME", "nothing.b.com")],
+        "b.com": [_record("www", "A", "1.2.3.4"), _record("v4", "A", "999.1.1.1")],
+    }
+    issues = lint_records(records_by_domain, domains=["a.com"])
+    assert _found(issues) == {("dangling_cname", "a.com", "bad", "CNAME")}
+
+
+def _run_lint(monkeypatch, *argv) -> int:
+    from aliyun_controller.batch import run_batch
+    from aliyun_controller.main import parse_args
+
+    monkeypatch.setattr(sys, "argv", ["aliyunctl", "dns", "lint", "--format", "json", *argv])
+    return run_batch(parse_args())
+
+
+def _seed(server, domain_name, records):
+    for record in records:
+        server.state.add_domain_record({
+            "DomainName": domain_name, "RR": record["RR"], "Type": record["Type"],
+            "Value": record["Value"], "TTL": record["TTL"],
+        })
+
+
+def test_exit_code_follows_error_level_findings(fake_aliyun, unthrottled, monkeypatch, capsys):
+    server = fake_aliyun(domains=2, records_per_domain=0)
+    clean, broken = server.state.domain_names()
+    _seed(server, clean, [_record("@", "A", "1.2.3.4"), _record("www", "A", "1.2.3.4"), _record("dup", "A", "1.2.3.4"),
+                          _record("dup", "A", "1.2.3.4")])
+    _seed(server, broken, [_record("www", "CNAME", f"nothing.{clean}")])
+
+    # 只有警告时退出码为 0
+    assert _run_lint(monkeypatch, clean) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert list(report["issues"]) == ["duplicate"]
+
+    assert _run_lint(monkeypatch) == 1
+    report = json.loads(capsys.readouterr().out)
+    assert [issue["domain_name"] for issue in report["issues"]["dangling_cname"]] == [broken]
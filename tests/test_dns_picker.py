@@ -0,0 +1,90 @@
+"""
+解析记录选择器的过滤：通过管道输入驱动 InquirerPy 提示
+"""
+import asyncio
+
+import pytest
+from prompt_toolkit.application import create_app_session
+from prompt_toolkit.input import create_pipe_input
+from prompt_toolkit.output import DummyOutput
+from pfzy.score import fzy_scorer, substr_scorer
+
+from aliyun_controller.modules.dns_picker import RecordIndex, _make_picker
+
+RECORDS = [
+    {"RR": "www", "Type": "A", "Value": "1.1.1.1", "TTL": 600},
+    {"RR": "mail", "Type": "MX", "Value": "mx.example.net", "TTL": 600},
+    {"RR": "api", "Type": "CNAME", "Value": "backend.example.net", "TTL": 600},
+]
+ACTIONS = [{"name": "[返回]", "value": "back"}]
+
+
+@pytest.fixture
+def pipe_input():
+    with create_pipe_input() as pipe, create_app_session(input=pipe, output=DummyOutput()):
+        yield pipe
+
+
+async def _wait_for(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("选择器没有完成过滤")
+
+
+def test_typing_filters_and_selects_record(pipe_input):
+    picker = _make_picker("选择记录", RecordIndex(RECORDS), 0, 1, ACTIONS)
+
+    async def run():
+        task = asyncio.ensure_future(picker.execute_async())
+        pipe_input.send_text("mail")
+        await _wait_for(lambda: picker.content_control.choice_count == 1)
+        pipe_input.send_text("\r")
+        return await task
+
+    assert asyncio.run(run()) == 1
+
+
+def _filter(control, text):
+    control._current_text = lambda: text
+    return [choice["name"] for choice in asyncio.run(control._filter_choices(0))]
+
+
+def test_incremental_filter_resets_when_match_mode_changes(pipe_input):
+    index = RecordIndex([])
+    index.names = ["acd-exact", "a-c-d"]
+    picker = _make_picker("选择记录", index, 0, 1, [{"name": name, "value": name} for name in index.names])
+    control = picker.content_control
+
+    control._scorer = substr_scorer
+    assert _filter(control, "ac") == ["acd-exact"]
+    # 切换为模糊匹配后追加字符，不能只在精确匹配的结果中继续过滤
+    control._scorer = fzy_scorer
+    assert sorted(_filter(control, "acd")) == ["a-c-d", "acd-exact"]
+
+
+def test_incremental_filter_narrows_previous_matches(pipe_input):
+    picker = _make_picker("选择记录", RecordIndex(RECORDS), 0, 1, ACTIONS)
+    control = picker.content_control
+    assert len(_filter(control, "e")) == 2
+    assert len(_filter(control, "ex")) == 2
+    assert len(_filter(control, "exz")) == 0
+    assert len(_filter(control, "")) == len(RECORDS) + len(ACTIONS)
+
+
+def test_picker_renders_and_navigates_incremental_control(pipe_input):
+    from aliyun_controller.modules.dns_picker import _IncrementalFuzzyControl
+
+    picker = _make_picker("选择记录", RecordIndex(RECORDS), 0, 1, ACTIONS)
+    assert isinstance(picker.content_control, _IncrementalFuzzyControl)
+    assert picker.choice_window.content is picker.content_control
+    assert picker.content_control.choice_count == len(RECORDS) + len(ACTIONS)
+
+    async def run():
+        task = asyncio.ensure_future(picker.execute_async())
+        # 在第一项按 ↑ 循环到末尾的操作项
+        pipe_input.send_text("\x1b[A\r")
+        return await task
+
+    assert asyncio.run(run()) == "back"
@@ -0,0 +1,170 @@
+"""
+DNS 解析记录：增删改后就地修补会话缓存，不重新拉取整个域名；记录选择器索引随记录变化失效；
+分页并发拉取后按页码顺序合并
+"""
+import time
+
+import pytest
+
+from aliyun_controller.modules.dns import AliCloudDnsQuerier, DnsQueryError
+
+
+def _view(records) -> list:
+    return sorted((r["RecordId"], r["RR"], r["Type"], r["Value"], r["TTL"], r["Line"]) for r in records)
+
+
+@pytest.fixture
+def dns(fake_aliyun, unthrottled):
+    server = fake_aliyun(domains=2, records_per_domain=5)
+    querier = AliCloudDnsQuerier()
+    domain_name = server.state.domain_names()[0]
+    querier.get_domain_records(domain_name)
+    return server, querier, domain_name
+
+
+def _requests(server) -> int:
+    return server.state.requests.get("DescribeDomainRecords", 0)
+
+
+def _assert_matches_server(querier, domain_name):
+    assert _view(querier.get_domain_records(domain_name)) == _view(
+        AliCloudDnsQuerier().get_domain_records(domain_name, refresh=True)
+    )
+
+
+def test_records_are_cached_and_copied(dns):
+    server, querier, domain_name = dns
+    records = querier.get_domain_records(domain_name)
+    records.clear()
+    assert len(querier.get_domain_records(domain_name)) == 5
+    assert _requests(server) == 1
+
+    querier.get_domain_records(domain_name, refresh=True)
+    assert _requests(server) == 2
+
+
+def test_add_update_delete_patch_cache(dns):
+    server, querier, domain_name = dns
+
+    assert querier.add_domain_record(domain_name, "new", "A", "1.2.3.4", ttl=300)
+    added = [r for r in querier.get_domain_records(domain_name) if r["RR"] == "new"]
+    assert len(added) == 1
+    _assert_matches_server(querier, domain_name)
+
+    record_id = added[0]["RecordId"]
+    assert querier.update_domain_record(record_id, "new", "A", "5.6.7.8", ttl=120)
+    assert [(r["Value"], r["TTL"]) for r in querier.get_domain_records(domain_name) if r["RecordId"] == record_id] == [
+        ("5.6.7.8", 120)
+    ]
+    _assert_matches_server(querier, domain_name)
+
+    assert querier.delete_domain_record(record_id)
+    assert record_id not in {r["RecordId"] for r in querier.get_domain_records(domain_name)}
+    _assert_matches_server(querier, domain_name)
+
+    # 只有首次加载时拉取过该域名的记录
+    assert _requests(server) == 1 + 3
+
+
+def test_failed_mutation_leaves_cache_untouched(dns):
+    server, querier, domain_name = dns
+    before = _view(querier.get_domain_records(domain_name))
+
+    assert not querier.update_domain_record("missing", "www", "A", "1.2.3.4")
+    assert not querier.delete_domain_record("missing")
+    assert not querier.add_domain_record(domain_name, "bad", "A", "999.1.1.1")
+    assert _view(querier.get_domain_records(domain_name)) == before
+    assert _requests(server) == 1
+
+
+def test_update_only_touches_matching_record_in_other_domains(dns):
+    server, querier, domain_name = dns
+    other_domain = server.state.domain_names()[1]
+    other_before = _view(querier.get_domain_records(other_domain))
+
+    record_id = querier.get_domain_records(domain_name)[0]["RecordId"]
+    assert querier.update_domain_record(record_id, "host0", "A", "9.9.9.9")
+    assert _view(querier.get_domain_records(other_domain)) == other_before
+
+
+def test_record_index_is_reused_until_records_change(dns):
+    server, querier, domain_name = dns
+    index = querier.get_record_index(domain_name)
+    assert querier.get_record_index(domain_name) is index
+    assert len(index) == 5
+
+    mutations = [
+        lambda: querier.add_domain_record(domain_name, "idx", "A", "1.2.3.4"),
+        lambda: querier.update_domain_record(index.records[0]["RecordId"], "host0", "A", "9.9.9.9"),
+        lambda: querier.delete_domain_record(index.records[1]["RecordId"]),
+        lambda: querier.invalidate_domain_records(domain_name),
+        lambda: querier.prime_domain_records({domain_name: querier.get_domain_records(domain_name)}),
+    ]
+    for mutate in mutations:
+        previous = querier.get_record_index(domain_name)
+        mutate()
+        current = querier.get_record_index(domain_name)
+        assert current is not previous
+        assert _view(current.records) == _view(querier.get_domain_records(domain_name))
+
+    current = querier.get_record_index(domain_name)
+    assert querier.get_record_index(domain_name, refresh=True) is not current
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    from aliyun_controller.modules import dns, dns_async
+
+    monkeypatch.setattr(dns, "RECORDS_PAGE_SIZE", 7)
+    monkeypatch.setattr(dns_async, "RECORDS_PAGE_SIZE", 7)
+
+
+def _server_order(server, domain_name) -> list:
+    return [record["RecordId"] for record in server.state._domain_records(domain_name)]
+
+
+def test_parallel_pages_merge_in_page_order(fake_aliyun, unthrottled, small_pages, monkeypatch):
+    server = fake_aliyun(domains=1, records_per_domain=40)
+    domain_name = server.state.domain_names()[0]
+    querier = AliCloudDnsQuerier()
+
+    # 页码越小返回越慢，分页到达顺序与页码顺序相反
+    fetch_page = querier._fetch_records_page
+
+    def slow_early_pages(domain_name, page_number):
+        time.sleep((6 - page_number) * 0.02)
+        return fetch_page(domain_name, page_number)
+
+    monkeypatch.setattr(querier, "_fetch_records_page", slow_early_pages)
+    records = querier.get_domain_records(domain_name)
+    assert [record["RecordId"] for record in records] == _server_order(server, domain_name)
+    assert server.state.requests["DescribeDomainRecords"] == 6
+
+
+def test_async_pages_merge_in_page_order(fake_aliyun, unthrottled, small_pages):
+    from aliyun_controller.modules.dns_async import fetch_all_domain_records
+
+    server = fake_aliyun(domains=2, records_per_domain=40)
+    records_by_domain, errors = fetch_all_domain_records()
+    assert errors == {}
+    for domain_name in server.state.domain_names():
+        assert [record["RecordId"] for record in records_by_domain[domain_name]] == _server_order(server, domain_name)
+
+
+def test_failed_page_fails_whole_domain(fake_aliyun, unthrottled, small_pages, monkeypatch):
+    server = fake_aliyun(domains=1, records_per_domain=40)
+    domain_name = server.state.domain_names()[0]
+    querier = AliCloudDnsQuerier()
+    fetch_page = querier._fetch_records_page
+
+    def failing_page(domain_name, page_number):
+        if page_number == 4:
+            raise RuntimeError("boom")
+        return fetch_page(domain_name, page_number)
+
+    monkeypatch.setattr(querier, "_fetch_records_page", failing_page)
+    # 不返回缺页的记录列表，也不缓存
+    with pytest.raises(DnsQueryError):
+        querier.get_domain_records(domain_name)
+    monkeypatch.setattr(querier, "_fetch_records_page", fetch_page)
+    assert len(querier.get_domain_records(domain_name)) == 40
@@ -0,0 +1,235 @@
+"""
+dns sync：期望状态文件解析和同步计划
+"""
+import textwrap
+
+import pytest
+
+from aliyun_controller.modules.dns_sync import (
+    DEFAULT_MX_PRIORITY,
+    SyncPlan,
+    apply_plan,
+    load_desired_records,
+    plan_sync,
+    validate_plan,
+)
+
+
+def _existing(record_id, rr, record_type, value, ttl=600, line="default", **extra):
+    return {"RecordId": record_id, "RR": rr, "Type": record_type, "Value": value, "TTL": ttl, "Line": line, **extra}
+
+
+def _desired(rr, record_type, value, ttl=600, line="default", **extra):
+    return {"RR": rr, "Type": record_type, "Value": value, "TTL": ttl, "Line": line, **extra}
+
+
+def _summary(plan) -> dict:
+    return {
+        "adds": [(r["RR"], r["Type"], r["Value"]) for r in plan.adds],
+        "updates": [(record_id, r["RR"], r["Type"], r["Value"], r["TTL"]) for record_id, r in plan.updates],
+        "deletes": [r["RecordId"] for r in plan.deletes],
+    }
+
+
+_EMPTY = {"adds": [], "updates": [], "deletes": []}
+
+PLAN_CASES = [
+    pytest.param(
+        [_existing("1", "www", "A", "1.1.1.1")],
+        [_desired("www", "A", "1.1.1.1")],
+        True, _EMPTY, id="unchanged",
+    ),
+    pytest.param(
+        [_existing("1", "www", "CNAME", "Target.Example.net")],
+        [_desired("www", "CNAME", "target.example.net.")],
+        True, _EMPTY, id="hostname-case-and-trailing-dot",
+    ),
+    pytest.param(
+        [],
+        [_desired("www", "A", "1.1.1.1")],
+        True, {**_EMPTY, "adds": [("www", "A", "1.1.1.1")]}, id="add",
+    ),
+    pytest.param(
+        [_existing("1", "www", "A", "1.1.1.1", ttl=600)],
+        [_desired("www", "A", "1.1.1.1", ttl=300)],
+        True, {**_EMPTY, "updates": [("1", "www", "A", "1.1.1.1", 300)]}, id="ttl-update",
+    ),
+    pytest.param(
+        [_existing("1", "www", "A", "1.1.1.1")],
+        [_desired("www", "A", "2.2.2.2")],
+        True, {**_EMPTY, "updates": [("1", "www", "A", "2.2.2.2", 600)]}, id="value-change-paired-update",
+    ),
+    pytest.param(
+        [_existing("1", "www", "A", "1.1.1.1"), _existing("2", "old", "A", "3.3.3.3")],
+        [_desired("www", "A", "1.1.1.1")],
+        True, {**_EMPTY, "deletes": ["2"]}, id="delete-extra",
+    ),
+    pytest.param(
+        [_existing("1", "www", "A", "1.1.1.1"), _existing("2", "www", "A", "1.1.1.1")],
+        [_desired("www", "A", "1.1.1.1")],
+        True, {**_EMPTY, "deletes": ["2"]}, id="delete-duplicate",
+    ),
+    pytest.param(
+        [_existing("1", "www", "A", "1.1.1.1"), _existing("2", "old", "A", "3.3.3.3")],
+        [_desired("www", "A", "2.2.2.2")],
+        False, {**_EMPTY, "adds": [("www", "A", "2.2.2.2")]}, id="no-delete-adds-instead-of-pairing",
+    ),
+    pytest.param(
+        [_existing("1", "www", "A", "1.1.1.1", line="telecom")],
+        [_desired("www", "A", "1.1.1.1")],
+        True, {**_EMPTY, "adds": [("www", "A", "1.1.1.1")], "deletes": ["1"]}, id="line-is-part-of-identity",
+    ),
+    pytest.param(
+        [_existing("1", "@", "MX", "mx.example.net", Priority=10)],
+        [_desired("@", "MX", "mx.example.net", Priority=20)],
+        True, {**_EMPTY, "updates": [("1", "@", "MX", "mx.example.net", 600)]}, id="mx-priority-update",
+    ),
+    pytest.param(
+        [_existing("1", "@", "MX", "mx.example.net", Priority=10)],
+        [_desired("@", "MX", "mx.example.net")],
+        True, _EMPTY, id="mx-priority-unmanaged",
+    ),
+]
+
+
+@pytest.mark.parametrize("existing, desired, delete_extra, expected", PLAN_CASES)
+def test_plan_sync(existing, desired, delete_extra, expected):
+    assert _summary(plan_sync(existing, desired, delete_extra=delete_extra)) == expected
+
+
+ZONE_CASES = [
+    pytest.param(
+        """
+        $TTL 300
+        @       IN  A      1.2.3.4
+        www         CNAME  @
+                    TXT    "hello"
+        """,
+        [("@", "A", "1.2.3.4", 300), ("www", "CNAME", "example.com", 300), ("www", "TXT", "hello", 300)],
+        id="ttl-directive-and-continuation",
+    ),
+    pytest.param(
+        """
+        @  3600 IN SOA ns1.example.com. admin.example.com. (
+                2024010101 ; serial
+                3600 600 86400 300 )
+        @  IN NS  ns1.alidns.com.
+        sub IN NS ns1.other.net.
+        """,
+        [("sub", "NS", "ns1.other.net", 600)],
+        id="skip-soa-and-apex-ns",
+    ),
+    pytest.param(
+        """
+        $ORIGIN example.com.
+        api     60 IN CNAME backend
+        $ORIGIN dev.example.com.
+        app        IN A     10.0.0.1
+        """,
+        [("api", "CNAME", "backend.example.com", 60), ("app.dev", "A", "10.0.0.1", 600)],
+        id="origin-and-relative-names",
+    ),
+    pytest.param(
+        """
+        @  IN TXT "v=spf1 include:a.net" " ~all" ; comment
+        t  IN TXT "semi;colon"
+        """,
+        [("@", "TXT", "v=spf1 include:a.net ~all", 600), ("t", "TXT", "semi;colon", 600)],
+        id="txt-quoting",
+    ),
+    pytest.param(
+        """
+        _sip._tcp  IN SRV 1 5 5060 sip.example.com.
+        """,
+        [("_sip._tcp", "SRV", "1 5 5060 sip.example.com", 600)],
+        id="srv-priority-in-value",
+    ),
+]
+
+
+def _write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(textwrap.dedent(content), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("zone, expected", ZONE_CASES)
+def test_load_zone_records(tmp_path, zone, expected):
+    records = load_desired_records(_write(tmp_path, "example.com.zone", zone), "example.com")
+    assert [(r["RR"], r["Type"], r["Value"], r["TTL"]) for r in records] == expected
+
+
+def test_zone_mx_priority_is_kept(tmp_path):
+    zone = """
+    @  IN MX 10 mx1
+    @  IN MX 20 mx2.example.net.
+    """
+    records = load_desired_records(_write(tmp_path, "example.com.zone", zone), "example.com")
+    assert [(r["Value"], r["Priority"]) for r in records] == [("mx1.example.com", 10), ("mx2.example.net", 20)]
+
+
+@pytest.mark.parametrize("zone", [
+    "@  IN MX 0 mx1.example.net.\n",
+    "@  IN MX 51 mx1.example.net.\n",
+    "@  IN MX mx1.example.net.\n",
+    "other.net.  IN A 1.2.3.4\n",
+    "www  1h IN A 1.2.3.4\n",
+    "$TTL 1d\nwww  IN A 1.2.3.4\n",
+    "$INCLUDE other.zone\n",
+    "$GENERATE 1-10 host$ A 10.0.0.$\n",
+])
+def test_zone_rejects_unsupported_records(tmp_path, zone):
+    with pytest.raises(ValueError):
+        load_desired_records(_write(tmp_path, "example.com.zone", zone), "example.com")
+
+
+def test_yaml_priority(tmp_path):
+    path = _write(tmp_path, "records.yaml", """
+    records:
+      - {rr: "@", type: MX, value: mx1.example.net, priority: 5}
+      - {rr: www, type: A, value: 1.2.3.4}
+    """)
+    records = load_desired_records(path, "example.com")
+    assert records[0]["Priority"] == 5
+    assert "Priority" not in records[1]
+
+    path = _write(tmp_path, "bad.yaml", """
+    - {rr: www, type: A, value: 1.2.3.4, priority: 5}
+    """)
+    with pytest.raises(ValueError):
+        load_desired_records(path, "example.com")
+
+
+def test_yaml_mx_without_priority_uses_default(tmp_path):
+    path = _write(tmp_path, "records.yaml", """
+    - {rr: "@", type: MX, value: mx1.example.net}
+    """)
+    assert load_desired_records(path, "example.com")[0]["Priority"] == DEFAULT_MX_PRIORITY
+
+
+def test_validate_plan_rejects_mx_without_priority():
+    from aliyun_controller.modules.dns import AliCloudDnsQuerier
+
+    plan = SyncPlan()
+    plan.adds.append(_desired("@", "MX", "mx1.example.net"))
+    plan.adds.append(_desired("www", "A", "1.2.3.4"))
+    querier = AliCloudDnsQuerier(client=object())
+    assert validate_plan(querier, plan) == [plan.adds[0]]
+
+
+def test_apply_plan_sends_mx_priority(fake_aliyun, unthrottled):
+    from aliyun_controller.modules.dns import AliCloudDnsQuerier
+
+    server = fake_aliyun(domains=1, records_per_domain=0)
+    domain_name = server.state.domain_names()[0]
+    querier = AliCloudDnsQuerier()
+    desired = [_desired("@", "MX", "mx1.example.net", Priority=5)]
+    plan = plan_sync(querier.get_domain_records(domain_name), desired)
+    assert apply_plan(querier, domain_name, plan)["add"] == {"succeeded": 1, "failed": 0}
+
+    desired = [_desired("@", "MX", "mx1.example.net", Priority=15)]
+    plan = plan_sync(querier.get_domain_records(domain_name, refresh=True), desired)
+    assert [record_id for record_id, _ in plan.updates]
+    apply_plan(querier, domain_name, plan)
+    records = querier.get_domain_records(domain_name, refresh=True)
+    assert [(r["Value"], r["Priority"]) for r in records] == [("mx1.example.net", 15)]
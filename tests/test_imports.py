@@ -0,0 +1,27 @@
+"""
+批处理子命令路径上的模块不应导入交互界面依赖（InquirerPy / prompt_toolkit）
+"""
+import subprocess
+import sys
+
+HEADLESS_MODULES = (
+    "aliyun_controller.batch",
+    "aliyun_controller.modules.accounts",
+    "aliyun_controller.modules.dns",
+    "aliyun_controller.modules.dns_async",
+    "aliyun_controller.modules.dns_index",
+    "aliyun_controller.modules.dns_lint",
+    "aliyun_controller.modules.dns_sync",
+    "aliyun_controller.modules.billing",
+)
+
+
+def test_headless_modules_do_not_import_prompt_toolkit():
+    code = (
+        "import importlib, sys\n"
+        f"for name in {HEADLESS_MODULES!r}:\n"
+        "    importlib.import_module(name)\n"
+        "print(','.join(sorted(m for m in sys.modules if m.split('.')[0] in ('InquirerPy', 'prompt_toolkit'))))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
@@ -0,0 +1,42 @@
+"""
+命令行参数：账号参数与性能剖析开关不会混淆
+"""
+import sys
+
+import pytest
+
+from aliyun_controller.main import parse_args
+
+
+def _parse(monkeypatch, *argv):
+    monkeypatch.setattr(sys, "argv", ["aliyunctl", *argv])
+    return parse_args()
+
+
+def test_accounts_flag(monkeypatch):
+    args = _parse(monkeypatch, "--accounts", "prod,staging", "--profile", "bill", "summary")
+    assert args.profiles == ("prod", "staging")
+    assert args.profile is True
+    assert _parse(monkeypatch, "--all-accounts", "dns", "domains").all_profiles
+
+
+@pytest.mark.parametrize("argv", [
+    ("--profile", "prod"),
+    ("--profile", "prod", "bill", "summary"),
+    ("--profile=prod",),
+])
+def test_profile_with_account_name_fails_clearly(monkeypatch, capsys, argv):
+    with pytest.raises(SystemExit) as excinfo:
+        _parse(monkeypatch, *argv)
+    assert excinfo.value.code == 2
+    assert "--accounts prod" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("argv", [
+    ("--profile", "bill", "summary"),
+    ("--profile", "dns", "domains"),
+    ("--profile", "--refresh"),
+    ("--profile",),
+])
+def test_profile_followed_by_command_or_option(monkeypatch, argv):
+    assert _parse(monkeypatch, *argv).profile is True
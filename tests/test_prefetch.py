@@ -0,0 +1,96 @@
+"""
+后台预取：预取线程不输出内容，不完整的结果不会留在会话中
+"""
+import sys
+import threading
+
+from conftest import write_config
+from fake_aliyun import FakeAliyunState
+
+from aliyun_controller import console, prefetch, ratelimit
+from aliyun_controller.modules import bill_reports
+from aliyun_controller.modules.bill_reports import BillSession
+
+
+def test_prefetch_thread_output_is_discarded(capsys):
+    console.install_stream_filters()
+
+    def noisy():
+        print("prefetch stdout")
+        print("prefetch stderr", file=sys.stderr)
+        raise RuntimeError("boom")
+
+    thread = threading.Thread(target=prefetch._run_quietly, args=(noisy,))
+    thread.start()
+    thread.join()
+    print("foreground")
+
+    out, err = capsys.readouterr()
+    assert out == "foreground\n"
+    assert err == ""
+
+
+class _SlowPartialQuerier:
+    """
+    第一次拉取（预取）等待 release 后只返回部分结果，之后的拉取返回完整结果
+    """
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = 0
+        self._state = FakeAliyunState(bill_items=2)
+
+    def iter_all_bill_pages(self, billing_cycle: str, errors: dict = None, fetched: dict = None):
+        self.calls += 1
+        first = self.calls == 1
+        yield [self._state.bill_item(billing_cycle, "PayAsYouGo", index) for index in range(2)]
+        if first:
+            self.started.set()
+            self.release.wait(5)
+            errors["Subscription"] = RuntimeError("boom")
+            return
+        yield [self._state.bill_item(billing_cycle, "Subscription", index) for index in range(2)]
+
+
+def test_foreground_does_not_reuse_partial_prefetch():
+    querier = _SlowPartialQuerier()
+    session = BillSession(querier=querier)
+    thread = threading.Thread(
+        target=prefetch._run_quietly, args=(session.run_reports, "2025-03", ("item_count",))
+    )
+    thread.start()
+    assert querier.started.wait(5)
+
+    foreground = {}
+    waiter = threading.Thread(target=lambda: foreground.update(session.run_reports("2025-03", ("item_count",))))
+    waiter.start()
+    querier.release.set()
+    thread.join(5)
+    waiter.join(5)
+
+    assert foreground == {"item_count": 4}
+    assert querier.calls == 2
+    # 完整结果才会被缓存
+    assert session.run_reports("2025-03", ("item_count",)) == {"item_count": 4}
+    assert querier.calls == 2
+
+
+def test_multi_account_prefetch_workers_are_silenced(config_dir, fake_aliyun, capsys):
+    server = fake_aliyun(bill_items=40, failing_subscription_types=("Subscription",))
+    endpoints = {service: {"endpoint": server.endpoint, "protocol": "http"} for service in ("bss", "dns")}
+    profiles = {name: {"access_key_id": "test", "access_key_secret": "test", "endpoints": endpoints} for name in ("a", "b")}
+    write_config(config_dir, server.endpoint, profiles=profiles)
+    for name in profiles:
+        ratelimit._limiters[(name, "describe_instance_bill")] = ratelimit.AdaptiveRateLimiter(rate=10000, max_rate=10000)
+
+    for thread in prefetch.start_prefetch(profiles=["a", "b"]):
+        thread.join(30)
+    print("foreground")
+
+    out, err = capsys.readouterr()
+    assert out == "foreground\n"
+    assert err == ""
+    # 两个账号的工作线程都拉取了账单，但不完整的结果没有留在会话中
+    assert server.state.requests["DescribeInstanceBill"] >= 4
+    assert all(not session._stores for session in bill_reports._sessions.values())
@@ -0,0 +1,111 @@
+"""
+性能剖析：接口调用和处理阶段的统计、百分位计算，以及 --profile-json 输出的结构
+"""
+import json
+import sys
+
+import pytest
+
+from aliyun_controller import profiling, ratelimit
+
+CALL_KEYS = {"count", "total_ms", "p50_ms", "p95_ms", "max_ms", "pages", "errors", "items", "bytes"}
+PHASE_KEYS = {"count", "total_ms", "p50_ms", "p95_ms", "max_ms"}
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(profiling, "_enabled", True)
+    profiling.reset()
+    yield
+    profiling.reset()
+
+
+def test_disabled_profiling_records_nothing():
+    profiling.reset()
+    profiling.record_call("op", 0.1)
+    profiling.record_items("op", 10)
+    with profiling.phase("stage"):
+        pass
+    assert profiling.get_report()["calls"] == {}
+    assert profiling.get_report()["phases"] == {}
+
+
+@pytest.mark.parametrize("values, p50, p95", [
+    ([0.005], 5.0, 5.0),
+    ([i / 1000 for i in range(1, 21)], 10.0, 19.0),
+    ([i / 1000 for i in range(100, 0, -1)], 50.0, 95.0),
+])
+def test_nearest_rank_percentiles(enabled, values, p50, p95):
+    for value in values:
+        profiling.record_phase("stage", value)
+    stats = profiling.get_report()["phases"]["stage"]
+    assert stats["count"] == len(values)
+    assert stats["p50_ms"] == pytest.approx(p50)
+    assert stats["p95_ms"] == pytest.approx(p95)
+    assert stats["max_ms"] == pytest.approx(max(values) * 1000)
+    assert stats["total_ms"] == pytest.approx(sum(values) * 1000)
+
+
+def test_bill_command_report(enabled, fake_aliyun, unthrottled, monkeypatch, capsys, tmp_path):
+    from aliyun_controller.batch import run_batch
+    from aliyun_controller.main import parse_args
+
+    monkeypatch.setattr(ratelimit, "BACKOFF_BASE", 0.0)
+    server = fake_aliyun(bill_items=1000, throttle_every=4, retry_after_ms=1)
+    monkeypatch.setattr(sys, "argv", ["aliyunctl", "bill", "summary", "--cycle", "2025-03", "--format", "json"])
+    assert run_batch(parse_args()) == 0
+    capsys.readouterr()
+
+    path = tmp_path / "profile.json"
+    profiling.finish(str(path))
+    table = capsys.readouterr().err
+    assert "describe_instance_bill" in table
+    assert f"剖析结果已写入 {path}" in table
+
+    report = json.loads(path.read_text(encoding="utf-8"))
+    assert set(report) == {"generated_at", "calls", "phases"}
+    assert all(set(stats) == CALL_KEYS for stats in report["calls"].values())
+    assert all(set(stats) == PHASE_KEYS for stats in report["phases"].values())
+
+    # 每次尝试单独计入，被限流的尝试计为失败；成功的尝试即分页数
+    bill = report["calls"]["describe_instance_bill"]
+    assert bill["count"] == server.state.requests["DescribeInstanceBill"]
+    assert bill["errors"] > 0
+    assert bill["pages"] == bill["count"] - bill["errors"] == 3 + 1
+    assert bill["items"] == 1000
+    assert bill["bytes"] > 0
+    assert {"bill.encode", "aggregate.summary", "render.json"} <= set(report["phases"])
+
+
+def test_unwritable_json_path_is_reported(enabled, capsys, tmp_path):
+    profiling.finish(str(tmp_path / "missing" / "profile.json"))
+    err = capsys.readouterr().err
+    assert "没有记录到任何接口调用" in err
+    assert "写入剖析结果失败" in err
+
+
+def test_profile_json_enables_profiling_and_writes_report(fake_aliyun, unthrottled, monkeypatch, config_dir, tmp_path):
+    import atexit
+
+    from aliyun_controller.main import main
+
+    fake_aliyun(bill_items=40)
+    monkeypatch.setattr(profiling, "_enabled", False)
+    registered = []
+    monkeypatch.setattr(atexit, "register", lambda func, *args: registered.append((func, args)))
+    path = tmp_path / "profile.json"
+    monkeypatch.setattr(sys, "argv", [
+        "aliyunctl", "--dir", str(config_dir), "--profile-json", str(path), "bill", "traffic", "--cycle", "2025-03",
+    ])
+
+    profiling.reset()
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+    assert excinfo.value.code == 0
+    assert profiling.is_enabled()
+    for func, args in registered:
+        func(*args)
+
+    report = json.loads(path.read_text(encoding="utf-8"))
+    assert report["calls"]["describe_instance_bill"]["items"] == 40
+    profiling.reset()
@@ -0,0 +1,189 @@
+"""
+请求层的错误分类与重试：对照本地模拟服务验证连接失败、5xx 和限流都会重试；
+限流后速率和并发上限都会收缩，在途请求数不超过并发上限
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from aliyun_controller import ratelimit
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(ratelimit, "BACKOFF_BASE", 0.0)
+
+
+def _describe_domains():
+    from alibabacloud_alidns20150109 import models as alidns_20150109_models
+
+    from aliyun_controller.clients import get_dns_client
+
+    client = get_dns_client()
+    attempts = []
+
+    def describe_domains(request):
+        attempts.append(request)
+        return client.describe_domains(request)
+
+    def call(**kwargs):
+        request = alidns_20150109_models.DescribeDomainsRequest(page_number=1, page_size=10)
+        return ratelimit.call_api("describe_domains", describe_domains, request, **kwargs)
+
+    return call, attempts
+
+
+def test_wrapped_retry_error_is_transient():
+    from Tea.exceptions import RetryError, UnretryableException
+
+    error = UnretryableException(None, RetryError("connection refused"))
+    assert ratelimit.is_transient_error(error)
+    assert not ratelimit.is_throttling_error(error)
+
+
+def test_connection_error_is_retried(fake_aliyun, unthrottled):
+    server = fake_aliyun(domains=1, records_per_domain=0)
+    server.stop()
+    call, attempts = _describe_domains()
+    with pytest.raises(Exception) as excinfo:
+        call()
+    assert ratelimit.is_transient_error(excinfo.value)
+    assert len(attempts) == ratelimit.MAX_ATTEMPTS
+
+
+def test_server_error_is_retried(fake_aliyun, unthrottled):
+    server = fake_aliyun(domains=3, records_per_domain=0, server_error_every=2)
+    call, attempts = _describe_domains()
+    for _ in range(2):
+        assert call().body.total_count == 3
+    # 第 2 个请求返回 503，重试后成功
+    assert server.state.requests["DescribeDomains"] == 3
+    assert len(attempts) == 3
+
+
+def test_server_error_is_not_retried_for_non_idempotent_calls(fake_aliyun, unthrottled):
+    server = fake_aliyun(domains=3, records_per_domain=0, server_error_every=1)
+    call, attempts = _describe_domains()
+    with pytest.raises(Exception) as excinfo:
+        call(idempotent=False)
+    assert ratelimit.is_transient_error(excinfo.value)
+    assert server.state.requests["DescribeDomains"] == 1
+
+
+def test_throttling_is_retried_and_slows_down(fake_aliyun, unthrottled):
+    server = fake_aliyun(domains=3, records_per_domain=0, throttle_every=2, retry_after_ms=1)
+    call, attempts = _describe_domains()
+    rate = ratelimit.get_limiter("describe_domains").rate
+    for _ in range(2):
+        assert call(idempotent=False).body.total_count == 3
+    assert server.state.requests["DescribeDomains"] == 3
+    assert ratelimit.get_limiter("describe_domains").rate < rate
+
+
+def test_concurrency_limit_follows_aimd():
+    limiter = ratelimit.AdaptiveRateLimiter(concurrency=8, max_concurrency=10)
+    limiter.on_throttled()
+    assert limiter.concurrency_limit == 4
+    for _ in range(5):
+        limiter.on_throttled()
+    assert limiter.concurrency_limit == ratelimit.MIN_CONCURRENCY
+
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.concurrency_limit == 2
+    for _ in range(1000):
+        limiter.on_success()
+    assert limiter.concurrency_limit == 10
+
+
+class _InFlight:
+    """
+    记录被调用函数同时在途的最大数量
+    """
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.current -= 1
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    limiter = ratelimit.AdaptiveRateLimiter(rate=10000, max_rate=10000, concurrency=2, max_concurrency=2)
+    monkeypatch.setitem(ratelimit._limiters, "limited", limiter)
+    return limiter
+
+
+def test_sync_calls_respect_concurrency_limit(limited):
+    tracker = _InFlight()
+
+    def slow_call():
+        with tracker:
+            time.sleep(0.02)
+        return True
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: ratelimit.call_api("limited", slow_call), range(16)))
+    assert all(results)
+    assert tracker.peak == 2
+    assert limited.in_flight == 0
+
+
+def test_async_calls_respect_concurrency_limit(limited):
+    tracker = _InFlight()
+
+    async def slow_call():
+        with tracker:
+            await asyncio.sleep(0.02)
+        return True
+
+    async def run():
+        return await asyncio.gather(*(ratelimit.call_api_async("limited", slow_call) for _ in range(16)))
+
+    assert all(asyncio.run(run()))
+    assert tracker.peak == 2
+    assert limited.in_flight == 0
+
+
+def test_failed_and_cancelled_calls_release_their_slot(limited):
+    def failing_call():
+        raise ValueError("boom")
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            ratelimit.call_api("limited", failing_call)
+    assert limited.in_flight == 0
+
+    async def run():
+        task = asyncio.create_task(ratelimit.call_api_async("limited", asyncio.sleep, 10))
+        await asyncio.sleep(0.01)
+        assert limited.in_flight == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert limited.in_flight == 0
+
+
+def test_throttling_shrinks_concurrency(fake_aliyun, unthrottled):
+    fake_aliyun(domains=3, records_per_domain=0, throttle_every=2, retry_after_ms=1)
+    call, attempts = _describe_domains()
+    limiter = ratelimit.get_limiter("describe_domains")
+    concurrency = limiter.concurrency
+    call()
+    call()
+    assert limiter.concurrency < concurrency
+    assert limiter.in_flight == 0